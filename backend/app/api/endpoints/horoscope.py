@@ -1,16 +1,29 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from app.models.horoscope_schemas import (
     HoroscopeRequest,
+    HoroscopeBatchRequest,
     HoroscopePrediction,
-    TimeFrame
+    TimeFrame,
+    TransitWindow,
+    AstroEvent,
+    Planet
 )
-from app.services.horoscope_service import HoroscopeService
-from datetime import datetime
+from app.services.horoscope_service import get_horoscope_service
+from app.services.transit_snapshot import get_transit_snapshot
+from app.services.transit_windows import get_transit_windows
+from app.services.event_index import EVENT_KINDS, EventIndexNotReady, get_event_index
+from app.services.ephemeris import run_ephemeris
+from datetime import datetime, timezone
+from typing import List, Optional
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Largest batch accepted by /predict/batch
+BATCH_MAX_ITEMS = int(os.getenv("HOROSCOPE_BATCH_MAX_ITEMS", "10000"))
+
 @router.post("/predict", response_model=HoroscopePrediction)
 async def generate_horoscope(request: HoroscopeRequest):
     """
@@ -20,17 +33,19 @@ async def generate_horoscope(request: HoroscopeRequest):
     try:
         logger.debug("Received request: %s", request.dict())
         
-        horoscope_service = HoroscopeService()
+        horoscope_service = get_horoscope_service()
         
-        # Calculate transits
-        transits = horoscope_service.calculate_current_transits()
-        logger.debug("Calculated transits: %s", [t.dict() for t in transits])
+        # Read transits from the shared snapshot
+        snapshot = await run_ephemeris(get_transit_snapshot().snapshot)
+        logger.debug("Calculated transits: %s", [t.dict() for t in snapshot.transits])
         
         # Generate prediction using birth details if provided
-        prediction = horoscope_service.generate_prediction(
+        prediction = await run_ephemeris(
+            horoscope_service.generate_prediction,
             time_frame=request.time_frame,
             birth_details=request.birth_details,
-            transits=transits
+            transits=snapshot.transits,
+            moment=snapshot.computed_for
         )
         logger.debug("Generated prediction: %s", prediction.dict())
         
@@ -40,14 +55,79 @@ async def generate_horoscope(request: HoroscopeRequest):
         logger.error("Error in generate_horoscope: %s", str(e), exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/predict/batch", response_model=List[HoroscopePrediction])
+async def generate_horoscope_batch(request: HoroscopeBatchRequest):
+    """
+    Generate one horoscope prediction per birth details, in request order.
+    All predictions share one transit snapshot and their natal charts and
+    aspects are computed together.
+    """
+    if len(request.birth_details) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"A batch holds at most {BATCH_MAX_ITEMS} birth details")
+    try:
+        snapshot = await run_ephemeris(get_transit_snapshot().snapshot)
+        return await run_ephemeris(
+            get_horoscope_service().generate_predictions,
+            request.time_frame,
+            request.birth_details,
+            snapshot.transits,
+            snapshot.computed_for
+        )
+    except Exception as e:
+        logger.error("Error in generate_horoscope_batch: %s", str(e), exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/transits/current")
 async def get_current_transits():
     """
     Get current planetary transits with their degrees and house positions.
     """
     try:
-        horoscope_service = HoroscopeService()
-        transits = horoscope_service.calculate_current_transits()
+        transits = await run_ephemeris(get_transit_snapshot().get)
         return {"transits": transits}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e)) 
+
+@router.get("/transits/window", response_model=TransitWindow)
+async def get_transit_window(time_frame: TimeFrame):
+    """
+    Sign ingresses, retrograde/direct stations and peak aspects of the
+    current week, month or year.
+    """
+    if time_frame == TimeFrame.DAILY:
+        raise HTTPException(status_code=400, detail="Use /transits/current for daily transits")
+    try:
+        return await run_ephemeris(get_transit_windows().get, time_frame)
+    except Exception as e:
+        logger.error("Error in get_transit_window: %s", str(e), exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/events", response_model=List[AstroEvent])
+async def get_events(
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    planet: Optional[Planet] = None,
+    kind: Optional[str] = Query(None, pattern=f"^({'|'.join(EVENT_KINDS)})$"),
+    limit: int = Query(1000, ge=1, le=100000)
+):
+    """
+    Sign ingresses, nakshatra changes, retrograde/direct stations and
+    eclipses from ``from`` to ``to`` (UTC unless an offset is given),
+    answered from the precomputed event index.
+    """
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    event_index = get_event_index()
+    if not event_index.covers(start, end):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Events are indexed from {event_index.start.isoformat()} to {event_index.end.isoformat()}"
+        )
+    try:
+        return event_index.query(start, end, planet=planet, kind=kind, limit=limit)
+    except EventIndexNotReady as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
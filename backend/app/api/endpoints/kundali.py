@@ -1,75 +1,398 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional, Tuple
 from app.models.schemas import BirthDetailsRequest, BirthDetails, KundaliResponse
-from app.services.kundali_generator import KundaliGenerator
+from app.services.kundali_generator import INSIGHT_MODES, KundaliGenerator
+from app.services.chart_renderer import DEFAULT_THEME, THEMES, chart_size
+from app.services.render_pool import RenderQueueFull
+from app.services.chart_store import MEDIA_TYPES, get_chart_store
 from app.services.location_service import LocationService
+from app.services.natal_cache import NatalChartData, get_natal_cache
+from app.services.ephemeris import run_ephemeris
+from app.services.job_queue import Job, JobQueueFull, ProgressCallback, get_job_queue
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import datetime
-import io
 import base64
-import sys
-from io import StringIO
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.post("/generate", response_model=KundaliResponse)
-async def generate_kundali_api(birth_details: BirthDetailsRequest):
+THEME_PATTERN = f"^({'|'.join(THEMES)})$"
+INSIGHTS_PATTERN = f"^({'|'.join(INSIGHT_MODES)})$"
+
+# Largest batch accepted by /batch, and how many of its Kundalis are built at once
+BATCH_MAX_ITEMS = int(os.getenv("KUNDALI_BATCH_MAX_ITEMS", "500"))
+BATCH_CONCURRENCY = int(os.getenv("KUNDALI_BATCH_CONCURRENCY", "16"))
+
+# Preferred order when the client accepts several formats equally
+FORMAT_PREFERENCE = ("webp", "png", "svg")
+
+def negotiate_chart_format(accept: Optional[str]) -> Optional[str]:
+    """Pick svg, png or webp from an Accept header; None if none is acceptable"""
+    if not accept:
+        return "png"
+    explicit = {}
+    wildcard_q = 0.0
+    for item in accept.split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if media_type in ("*/*", "image/*"):
+            wildcard_q = max(wildcard_q, q)
+        for chart_format, chart_media_type in MEDIA_TYPES.items():
+            if media_type == chart_media_type:
+                explicit[chart_format] = q
+    acceptable = [chart_format for chart_format in FORMAT_PREFERENCE if explicit.get(chart_format, 0) > 0]
+    if acceptable:
+        return max(acceptable, key=lambda chart_format: explicit[chart_format])
+    # Plain PNG for clients that accept any image, unless they refuse it
+    if wildcard_q > 0:
+        for chart_format in ("png", "webp", "svg"):
+            if explicit.get(chart_format, wildcard_q) > 0:
+                return chart_format
+    return None
+
+@router.get("/charts/{chart_id}", name="get_chart")
+async def get_chart(
+    chart_id: str = Path(..., pattern="^[0-9a-f]{32}$"),
+    format: Optional[str] = Query(None, pattern="^(svg|png|webp)$"),
+    size: Optional[int] = Query(None, ge=64, le=4096),
+    dpi: int = Query(300, ge=72, le=600),
+    theme: str = Query(DEFAULT_THEME, pattern=THEME_PATTERN),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Serve a chart image. The format comes from ``format`` or, failing that,
+    the Accept header (SVG, PNG or WebP). ``size`` is rounded up to one of
+    CHART_SIZES. Rendered variants are cached and carry a strong ETag; a
+    matching If-None-Match gets 304 without rendering.
+    """
+    if size is not None:
+        size = chart_size(size)
+    chart_format = format or negotiate_chart_format(accept)
+    if chart_format is None:
+        raise HTTPException(status_code=406, detail="Charts are available as image/svg+xml, image/png or image/webp")
+    store = get_chart_store()
+    if store.get(chart_id) is None:
+        raise HTTPException(status_code=404, detail="Chart not found")
+
+    headers = {
+        "ETag": store.etag(chart_id, chart_format, size=size, dpi=dpi, theme=theme),
+        # Chart IDs are content addressed, so a URL never changes meaning
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Vary": "Accept"
+    }
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or headers["ETag"] in tags:
+            return Response(status_code=304, headers=headers)
+
     try:
-        # Validate inputs
-        if not (1900 <= birth_details.year <= datetime.date.today().year):
-            raise HTTPException(status_code=400, detail="Invalid year")
-        if not (1 <= birth_details.month <= 12):
-            raise HTTPException(status_code=400, detail="Invalid month")
-        if not (1 <= birth_details.day <= 31):
-            raise HTTPException(status_code=400, detail="Invalid day")
-        if not (0 <= birth_details.hour <= 23):
-            raise HTTPException(status_code=400, detail="Invalid hour")
-        if not (0 <= birth_details.minute <= 59):
-            raise HTTPException(status_code=400, detail="Invalid minute")
-        if birth_details.gender.upper() not in ['M', 'F']:
-            raise HTTPException(status_code=400, detail="Invalid gender")
-
-        # Get coordinates
+        variant = await store.variant(chart_id, chart_format, size=size, dpi=dpi, theme=theme)
+    except RenderQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Chart rendering timed out")
+    if variant is None:
+        raise HTTPException(status_code=404, detail="Chart not found")
+    return Response(content=variant.content, media_type=variant.media_type, headers=headers)
+
+def validate_birth_details(birth_details: BirthDetailsRequest):
+    if not (1900 <= birth_details.year <= datetime.date.today().year):
+        raise HTTPException(status_code=400, detail="Invalid year")
+    if not (1 <= birth_details.month <= 12):
+        raise HTTPException(status_code=400, detail="Invalid month")
+    if not (1 <= birth_details.day <= 31):
+        raise HTTPException(status_code=400, detail="Invalid day")
+    if not (0 <= birth_details.hour <= 23):
+        raise HTTPException(status_code=400, detail="Invalid hour")
+    if not (0 <= birth_details.minute <= 59):
+        raise HTTPException(status_code=400, detail="Invalid minute")
+    if birth_details.gender.upper() not in ['M', 'F']:
+        raise HTTPException(status_code=400, detail="Invalid gender")
+
+def to_birth_details(birth_details: BirthDetailsRequest, latitude: float, longitude: float) -> BirthDetails:
+    return BirthDetails(
+        date=datetime.date(birth_details.year, birth_details.month, birth_details.day),
+        time=datetime.time(birth_details.hour, birth_details.minute),
+        city=birth_details.city,
+        latitude=latitude,
+        longitude=longitude,
+        gender=birth_details.gender,
+        country=birth_details.country
+    )
+
+async def build_kundali(
+    birth_details: BirthDetailsRequest,
+    request: Request,
+    chart_format: str,
+    theme: str,
+    insights: str,
+    progress: Optional[ProgressCallback] = None,
+    coordinates: Optional[Tuple[float, float]] = None,
+    chart: Optional[NatalChartData] = None
+) -> KundaliResponse:
+    """
+    Geocode, compute and describe a Kundali. Stage messages go to
+    ``progress`` and are also collected into ``analysis_text``, so every
+    request or job keeps its own output. ``coordinates`` and ``chart``,
+    when a batch has already looked them up, skip those stages.
+    """
+    messages = []
+
+    def report(stage: str, message: str):
+        logger.debug(message)
+        messages.append(message)
+        if progress is not None:
+            progress(stage, message)
+
+    # Get coordinates
+    if coordinates is None:
         location_service = LocationService()
-        print(f"\nFetching coordinates for {birth_details.city}, {birth_details.country}...")
-        latitude, longitude = location_service.get_coordinates(birth_details.city, birth_details.country)
-        print(f"Location found: {latitude:.4f}°N, {longitude:.4f}°E")
-
-        # Create birth details object
-        birth_details_obj = BirthDetails(
-            date=datetime.date(birth_details.year, birth_details.month, birth_details.day),
-            time=datetime.time(birth_details.hour, birth_details.minute),
-            city=birth_details.city,
-            latitude=latitude,
-            longitude=longitude,
-            gender=birth_details.gender,
-            country=birth_details.country
+        report("geocoding", f"Fetching coordinates for {birth_details.city}, {birth_details.country}...")
+        coordinates = await run_in_threadpool(
+            location_service.get_coordinates, birth_details.city, birth_details.country
         )
+    latitude, longitude = coordinates
+    report("geocoding", f"Location found: {latitude:.4f}°N, {longitude:.4f}°E")
 
-        # Capture print output
-        old_stdout = sys.stdout
-        sys.stdout = mystdout = StringIO()
-
-        # Generate Kundali
-        print("\nGenerating Kundali...")
-        generator = KundaliGenerator()
-        kundali_data = generator.generate_kundali(birth_details_obj)
-
-        # Get the captured output
-        sys.stdout = old_stdout
-        analysis_text = mystdout.getvalue()
-
-        # Save chart to bytes buffer
-        chart_buffer = io.BytesIO()
-        generator.current_figure.savefig(chart_buffer, format='png', dpi=300, bbox_inches='tight')
-        chart_buffer.seek(0)
-        chart_base64 = base64.b64encode(chart_buffer.getvalue()).decode()
-
-        return KundaliResponse(
-            kundali_data=kundali_data,
-            chart_base64=chart_base64,
-            analysis_text=analysis_text
-        )
+    # Create birth details object
+    birth_details_obj = to_birth_details(birth_details, latitude, longitude)
+
+    # Generate Kundali
+    generator = KundaliGenerator()
+    kundali_data = await generator.generate_kundali(
+        birth_details_obj,
+        chart_format=chart_format,
+        theme=theme,
+        insights_mode=insights,
+        progress=report,
+        chart=chart
+    )
 
+    chart_base64 = base64.b64encode(generator.chart_png).decode() if generator.chart_png else None
+
+    return KundaliResponse(
+        kundali_data=kundali_data,
+        chart_id=generator.chart_id,
+        chart_url=str(request.url_for("get_chart", chart_id=generator.chart_id)),
+        chart_base64=chart_base64,
+        chart_svg=generator.chart_svg,
+        analysis_text="\n".join(messages)
+    )
+
+@router.post("/generate", response_model=KundaliResponse)
+async def generate_kundali_api(
+    birth_details: BirthDetailsRequest,
+    request: Request,
+    chart_format: str = Query("none", pattern="^(none|png|svg)$"),
+    theme: str = Query(DEFAULT_THEME, pattern=THEME_PATTERN),
+    insights: str = Query("llm", pattern=INSIGHTS_PATTERN)
+):
+    """
+    Generate a Kundali. The chart is served separately at ``chart_url``;
+    ``chart_format=png`` or ``svg`` also inlines it in the response.
+    ``insights=rules`` skips the LLM entirely and ``hybrid`` only uses an
+    LLM answer that is already cached.
+    """
+    try:
+        validate_birth_details(birth_details)
+        return await build_kundali(birth_details, request, chart_format, theme, insights)
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except RenderQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Chart rendering timed out")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/batch")
+async def generate_kundali_batch(
+    items: List[BirthDetailsRequest],
+    request: Request,
+    chart_format: str = Query("none", pattern="^(none|png|svg)$"),
+    theme: str = Query(DEFAULT_THEME, pattern=THEME_PATTERN),
+    insights: str = Query("llm", pattern=INSIGHTS_PATTERN)
+):
+    """
+    Generate many Kundalis in one request. Each distinct place is geocoded
+    once and every chart is computed in a single ephemeris pass; insights
+    and renders then run concurrently. Results stream back as NDJSON in
+    completion order, one line per item: ``{"index", "status": "ok",
+    "result"}`` with the ``/generate`` body, or ``{"index", "status":
+    "error", "status_code", "error"}``. A failed item never fails the batch.
+    """
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"A batch holds at most {BATCH_MAX_ITEMS} items")
+
+    def error_line(index: int, status_code: int, detail: str) -> str:
+        return json.dumps({"index": index, "status": "error", "status_code": status_code, "error": detail}) + "\n"
+
+    async def results():
+        failed: Dict[int, str] = {}
+        for index, birth_details in enumerate(items):
+            try:
+                validate_birth_details(birth_details)
+                datetime.datetime(birth_details.year, birth_details.month, birth_details.day)
+            except HTTPException as e:
+                failed[index] = error_line(index, e.status_code, e.detail)
+            except ValueError as e:
+                failed[index] = error_line(index, 400, str(e))
+        for line in failed.values():
+            yield line
+
+        # Geocode each distinct place once
+        limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+        location_service = LocationService()
+        places: Dict[Tuple[str, str], List[int]] = {}
+        for index, birth_details in enumerate(items):
+            if index not in failed:
+                place = (birth_details.city.strip().lower(), (birth_details.country or "").strip().lower())
+                places.setdefault(place, []).append(index)
+
+        async def geocode(index: int):
+            async with limit:
+                return await run_in_threadpool(
+                    location_service.get_coordinates, items[index].city, items[index].country
+                )
+
+        found = await asyncio.gather(*(geocode(indexes[0]) for indexes in places.values()), return_exceptions=True)
+        coordinates: Dict[int, Tuple[float, float]] = {}
+        for indexes, result in zip(places.values(), found):
+            for index in indexes:
+                if isinstance(result, Exception):
+                    yield error_line(index, 400, str(result))
+                else:
+                    coordinates[index] = result
+
+        # Every remaining chart in one ephemeris pass
+        indexes = list(coordinates)
+        try:
+            charts = await run_ephemeris(
+                get_natal_cache().charts,
+                [
+                    datetime.datetime(items[i].year, items[i].month, items[i].day, items[i].hour, items[i].minute)
+                    for i in indexes
+                ],
+                [coordinates[i][0] for i in indexes],
+                [coordinates[i][1] for i in indexes],
+                b'P'  # Placidus house system
+            )
+        except Exception as e:
+            for index in indexes:
+                yield error_line(index, 500, str(e))
+            return
+
+        async def build(index: int, chart: NatalChartData) -> str:
+            async with limit:
+                try:
+                    kundali = await build_kundali(
+                        items[index], request, chart_format, theme, insights,
+                        coordinates=coordinates[index], chart=chart
+                    )
+                except RenderQueueFull as e:
+                    return error_line(index, 503, str(e))
+                except asyncio.TimeoutError:
+                    return error_line(index, 504, "Chart rendering timed out")
+                except Exception as e:
+                    return error_line(index, 500, str(e))
+            return json.dumps({"index": index, "status": "ok", "result": kundali.model_dump()}) + "\n"
+
+        tasks = [asyncio.ensure_future(build(index, chart)) for index, chart in zip(indexes, charts)]
+        try:
+            for line in asyncio.as_completed(tasks):
+                yield await line
+                if await request.is_disconnected():
+                    return
+        finally:
+            # Stop work nobody will read when the client goes away
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(
+        results(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/jobs", status_code=202)
+async def submit_kundali_job(
+    birth_details: BirthDetailsRequest,
+    request: Request,
+    chart_format: str = Query("none", pattern="^(none|png|svg)$"),
+    theme: str = Query(DEFAULT_THEME, pattern=THEME_PATTERN),
+    insights: str = Query("llm", pattern=INSIGHTS_PATTERN)
+):
+    """
+    Queue a Kundali generation and return its job ID at once. Poll
+    ``status_url`` or follow ``events_url`` (server-sent events) for the
+    stages as they complete; the finished job's ``result`` is the body
+    ``/generate`` would have returned.
+    """
+    validate_birth_details(birth_details)
+
+    async def work(progress: ProgressCallback) -> dict:
+        kundali = await build_kundali(birth_details, request, chart_format, theme, insights, progress)
+        return kundali.model_dump()
+
+    try:
+        job = get_job_queue().submit("kundali", work)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": str(request.url_for("get_kundali_job", job_id=job.id)),
+        "events_url": str(request.url_for("get_kundali_job_events", job_id=job.id))
+    }
+
+def find_job(job_id: str) -> Job:
+    job = get_job_queue().get(job_id)
+    if job is None or job.kind != "kundali":
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/jobs/{job_id}", name="get_kundali_job")
+async def get_kundali_job(job_id: str = Path(..., pattern="^[0-9a-f]{32}$")):
+    """Status, progress events and, once finished, the result or error of a job"""
+    return find_job(job_id).to_dict()
+
+@router.get("/jobs/{job_id}/events", name="get_kundali_job_events")
+async def get_kundali_job_events(
+    request: Request,
+    job_id: str = Path(..., pattern="^[0-9a-f]{32}$"),
+    last_event_id: Optional[int] = Header(None)
+):
+    """
+    Follow a job as server-sent events: one ``event: progress`` per stage
+    (with the event's sequence number as its ID, so reconnecting with
+    Last-Event-ID resumes), then ``event: done`` with the finished job.
+    """
+    job = find_job(job_id)
+
+    async def event_stream():
+        async for event in job.follow(after=last_event_id if last_event_id is not None else -1):
+            if await request.is_disconnected():
+                return
+            yield f"id: {event['seq']}\nevent: progress\ndata: {json.dumps(event)}\n\n"
+        yield f"event: done\ndata: {json.dumps(job.to_dict(include_events=False))}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
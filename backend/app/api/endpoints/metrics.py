@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from app.core.cache import cache_stats
+
+router = APIRouter()
+
+@router.get("/caches")
+async def get_cache_metrics():
+    """
+    Hit/miss counters and sizes of the in-process caches, for tuning.
+    """
+    return {"caches": cache_stats()}
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from .endpoints import kundali, horoscope, subscription
+from .endpoints import kundali, horoscope, subscription, metrics
 from ..routers.chatbot_router import router as chat_router
 
 router = APIRouter()
@@ -29,4 +29,11 @@ router.include_router(
     subscription.router,
     prefix="/subscription",
     tags=["Subscription"]
+)
+
+# Include the metrics router
+router.include_router(
+    metrics.router,
+    prefix="/metrics",
+    tags=["Metrics"]
 ) 
\ No newline at end of file
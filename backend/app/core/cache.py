@@ -0,0 +1,204 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sentinel returned on a cache miss, so that None can be cached
+MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU cache with an optional per-entry TTL and hit/miss counters"""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+
+class SQLiteCache:
+    """Persistent key/value cache in a SQLite file, shareable between worker processes.
+
+    Values are stored as JSON, so they must be JSON-serializable. The
+    database runs in WAL mode so several uvicorn workers can read and write
+    the same file concurrently.
+    """
+
+    def __init__(self, path: str, table: str = "cache", ttl: Optional[float] = None):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            self._connection.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Any = MISSING) -> Any:
+        value, _ = self.get_with_expiry(key, default)
+        return value
+
+    def get_with_expiry(self, key: str, default: Any = MISSING) -> Tuple[Any, Optional[float]]:
+        """Return the value and its expiry time (None when it never expires)"""
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is not None and (row[1] is None or row[1] > time.time()):
+            self.hits += 1
+            return json.loads(row[0]), row[1]
+        self.misses += 1
+        return default, None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        payload = json.dumps(value, separators=(",", ":"))
+        try:
+            with self._lock:
+                self._connection.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, payload, expires_at)
+                )
+                self._connection.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error writing to cache {self.path}: {str(e)}")
+
+    def delete(self, key: str):
+        with self._lock:
+            self._connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._connection.commit()
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._connection.execute(
+                f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            )
+            self._connection.commit()
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+
+class TieredCache:
+    """In-memory LRU in front of an optional SQLite tier.
+
+    SQLite hits are promoted to memory for what is left of their TTL, so an
+    entry expires at the same moment in every worker.
+    """
+
+    def __init__(self, memory: LRUCache, persistent: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.persistent = persistent
+
+    def get(self, key: str, default: Any = MISSING) -> Any:
+        value = self.memory.get(key)
+        if value is not MISSING:
+            return value
+        if self.persistent is not None:
+            value, expires_at = self.persistent.get_with_expiry(key)
+            if value is not MISSING:
+                ttl = None
+                if expires_at is not None:
+                    ttl = expires_at - time.time()
+                    if self.memory.ttl is not None:
+                        ttl = min(ttl, self.memory.ttl)
+                self.memory.set(key, value, ttl)
+                return value
+        return default
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.memory.set(key, value, ttl)
+        if self.persistent is not None:
+            self.persistent.set(key, value, ttl)
+
+    def delete(self, key: str):
+        self.memory.delete(key)
+        if self.persistent is not None:
+            self.persistent.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"memory": self.memory.stats()}
+        if self.persistent is not None:
+            stats["persistent"] = self.persistent.stats()
+        return stats
+
+
+_registry: Dict[str, Any] = {}
+
+
+def register_cache(name: str, cache: Any):
+    """Expose a cache's stats() under ``name`` in the metrics endpoint"""
+    _registry[name] = cache
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Stats of every registered cache"""
+    return {name: cache.stats() for name, cache in _registry.items()}
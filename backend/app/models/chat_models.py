@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
 class BirthDetails(BaseModel):
@@ -14,6 +14,8 @@ class BirthDetails(BaseModel):
 class ChatRequest(BaseModel):
     message: str
     birth_details: Optional[BirthDetails] = None
+    session_id: Optional[str] = Field(None, max_length=128)
 
 class ChatResponse(BaseModel):
-    response: str 
\ No newline at end of file
+    response: str
+    session_id: Optional[str] = None 
\ No newline at end of file
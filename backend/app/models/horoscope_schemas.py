@@ -46,6 +46,60 @@ class TransitInfo(BaseModel):
     degree: float
     is_retrograde: bool
     zodiac_sign: ZodiacSign
+    longitude: Optional[float] = None  # absolute sidereal longitude
+    speed: Optional[float] = None  # degrees per day
+
+    class Config:
+        frozen = True  # shared between requests through the transit snapshot
+
+class SignIngress(BaseModel):
+    planet: Planet
+    from_sign: ZodiacSign
+    to_sign: ZodiacSign
+    time: datetime
+    is_retrograde: bool
+
+    class Config:
+        frozen = True
+
+class Station(BaseModel):
+    planet: Planet
+    turns: str  # "retrograde" or "direct"
+    time: datetime
+    zodiac_sign: ZodiacSign
+    degree: float
+
+    class Config:
+        frozen = True
+
+class PeakAspect(BaseModel):
+    first: Planet
+    second: Planet
+    aspect: str
+    time: datetime
+    orb: float
+
+    class Config:
+        frozen = True
+
+class TransitWindow(BaseModel):
+    time_frame: TimeFrame
+    start: datetime
+    end: datetime
+    ingresses: List[SignIngress]
+    stations: List[Station]
+    aspects: List[PeakAspect]
+
+    class Config:
+        frozen = True  # shared between requests through the window cache
+
+class AstroEvent(BaseModel):
+    time: datetime
+    planet: Planet
+    event: str  # ingress, nakshatra, station_retrograde, station_direct, solar_eclipse or lunar_eclipse
+    zodiac_sign: Optional[ZodiacSign] = None  # sign entered, or the sign of a station
+    nakshatra: Optional[str] = None  # nakshatra entered
+    eclipse_type: Optional[str] = None
 
 class BirthDetails(BaseModel):
     year: int = Field(..., description="Birth year", example=1990)
@@ -82,6 +136,10 @@ class HoroscopeRequest(BaseModel):
             }
         }
 
+class HoroscopeBatchRequest(BaseModel):
+    time_frame: TimeFrame
+    birth_details: List[BirthDetails]
+
 class NatalChart(BaseModel):
     ascendant: float
     ascendant_sign: ZodiacSign
@@ -98,4 +156,5 @@ class HoroscopePrediction(BaseModel):
     lucky_color: str
     transits: List[TransitInfo]
     natal_chart: Optional[NatalChart] = None  # Include natal chart if birth details provided
+    window: Optional[TransitWindow] = None  # Events of the week, month or year for those time frames
     timestamp: datetime 
\ No newline at end of file
@@ -15,7 +15,10 @@ class BirthDetailsRequest(BaseModel):
 
 class KundaliResponse(BaseModel):
     kundali_data: dict
-    chart_base64: str
+    chart_id: Optional[str] = None
+    chart_url: Optional[str] = None
+    chart_base64: Optional[str] = None  # PNG, only when requested inline
+    chart_svg: Optional[str] = None
     analysis_text: str
 
 @dataclass
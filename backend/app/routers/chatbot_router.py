@@ -1,30 +1,101 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Cookie, Depends, HTTPException, Request, Response
+from typing import Optional
+from fastapi.responses import StreamingResponse
 from ..services.chatbot_service import ChatbotService
 from ..models.chat_models import ChatRequest, ChatResponse
+import json
+import logging
 import uuid
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(tags=["chat"])
 chatbot_service = ChatbotService()
 
+SESSION_COOKIE = "soulbuddy_session"
+SESSION_COOKIE_MAX_AGE = 30 * 24 * 3600
+
+def resolve_session_id(request: ChatRequest, cookie_session: Optional[str], response: Response) -> str:
+    """Use the client-supplied session ID, then the session cookie, else issue a new one"""
+    session_id = request.session_id or cookie_session
+    if not session_id or len(session_id) > 128:
+        session_id = str(uuid.uuid4())
+    response.set_cookie(SESSION_COOKIE, session_id, max_age=SESSION_COOKIE_MAX_AGE, httponly=True, samesite="lax")
+    return session_id
+
 @router.post("/chat", response_model=ChatResponse)
-async def chat_with_bot(request: ChatRequest):
+async def chat_with_bot(
+    request: ChatRequest,
+    response: Response,
+    soulbuddy_session: Optional[str] = Cookie(None)
+):
     try:
-        # Generate a unique user ID for this session
-        user_id = str(uuid.uuid4())
+        user_id = resolve_session_id(request, soulbuddy_session, response)
         
-        response = await chatbot_service.chat(
+        reply = await chatbot_service.chat(
             user_id=user_id,
             message=request.message,
             birth_details=request.birth_details
         )
-        return ChatResponse(response=response)
+        return ChatResponse(response=reply, session_id=user_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/chat/stream")
+async def stream_chat_with_bot(
+    request: ChatRequest,
+    http_request: Request,
+    soulbuddy_session: Optional[str] = Cookie(None)
+):
+    """
+    Stream the reply as server-sent events: one `data: {"delta": ...}` event per
+    chunk, then `event: done`. The upstream completion is cancelled if the
+    client disconnects. The session ID is returned in the X-Session-Id header.
+    """
+    headers = Response()
+    user_id = resolve_session_id(request, soulbuddy_session, headers)
+
+    async def event_stream():
+        stream = chatbot_service.chat_stream(
+            user_id=user_id,
+            message=request.message,
+            birth_details=request.birth_details
+        )
+        try:
+            async for delta in stream:
+                if await http_request.is_disconnected():
+                    break
+                yield f"data: {json.dumps({'delta': delta})}\n\n"
+            else:
+                yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming chat reply: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'detail': 'Unable to generate a reply right now'})}\n\n"
+        finally:
+            await stream.aclose()
+
+    streaming_response = StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Session-Id": user_id}
+    )
+    streaming_response.raw_headers.extend(
+        (name, value) for name, value in headers.raw_headers if name == b"set-cookie"
+    )
+    return streaming_response
+
 @router.post("/chat/clear-history")
-async def clear_chat_history(user_id: str):
+async def clear_chat_history(
+    user_id: Optional[str] = None,
+    soulbuddy_session: Optional[str] = Cookie(None)
+):
     try:
-        chatbot_service.clear_history(user_id)
+        session_id = user_id or soulbuddy_session
+        if not session_id:
+            raise HTTPException(status_code=400, detail="user_id or session cookie is required")
+        chatbot_service.clear_history(session_id)
         return {"message": "Chat history cleared successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from ..services.recommendation_service import RecommendationService
+from ..services.recommendation_service import get_recommendation_service
 from ..models.horoscope_schemas import BirthDetails
 import logging
 
@@ -51,7 +51,7 @@ async def get_personalized_recommendations(request: RecommendationRequest):
         
         try:
             # Get recommendations using the service
-            recommendations = await RecommendationService().get_personalized_recommendations(birth_details)
+            recommendations = await get_recommendation_service().get_personalized_recommendations(birth_details)
             
             return {
                 "status": "success",
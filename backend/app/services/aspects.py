@@ -0,0 +1,160 @@
+"""Vectorized aspect engine.
+
+Takes two sets of longitudes (and optionally their daily speeds) and finds
+the aspect between every pair in one NumPy pass. The same call serves
+transit-to-natal, transit-to-transit and natal-to-natal matrices; leading
+dimensions broadcast, so a batch of N natal charts against one set of
+transits is a single (N, transits, planets) evaluation.
+"""
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+
+# Aspect name -> (exact angle, orb) in degrees
+DEFAULT_ORBS: Dict[str, Tuple[float, float]] = {
+    "conjunction": (0, 10),
+    "sextile": (60, 6),
+    "square": (90, 8),
+    "trine": (120, 10),
+    "opposition": (180, 10),
+}
+
+
+class AspectTable:
+    """Aspect names with their exact angles and orbs, as arrays for the engine"""
+
+    def __init__(self, orbs: Optional[Dict[str, Tuple[float, float]]] = None):
+        orbs = DEFAULT_ORBS if orbs is None else orbs
+        self.names: Tuple[str, ...] = tuple(orbs)
+        self.angles = np.array([angle for angle, _ in orbs.values()], dtype=np.float64)
+        self.orbs = np.array([orb for _, orb in orbs.values()], dtype=np.float64)
+
+
+DEFAULT_TABLE = AspectTable()
+
+
+class AspectMatrix(NamedTuple):
+    """Aspects between every pair, shaped like the broadcast of (..., n_a, 1) and (..., 1, n_b)
+
+    ``aspect`` indexes the table's names (-1 for no aspect or a NaN
+    longitude), ``separation`` is the angle between the pair (0-180),
+    ``orb`` how far it is from exact and ``applying`` whether that distance
+    is shrinking.
+    """
+    aspect: np.ndarray
+    separation: np.ndarray
+    orb: np.ndarray
+    applying: np.ndarray
+
+
+class Aspect(NamedTuple):
+    first: int
+    second: int
+    aspect: str
+    separation: float
+    orb: float
+    applying: bool
+
+
+def aspect_matrix(
+    longitudes_a: np.ndarray,
+    longitudes_b: np.ndarray,
+    speeds_a: Optional[np.ndarray] = None,
+    speeds_b: Optional[np.ndarray] = None,
+    table: AspectTable = DEFAULT_TABLE
+) -> AspectMatrix:
+    """Find the aspect between each of ``longitudes_a`` (..., n_a) and each of ``longitudes_b`` (..., n_b)
+
+    Where several aspects are within orb the tightest wins. Missing speeds
+    are taken as zero (e.g. natal points, which do not move).
+    """
+    longitudes_a = np.asarray(longitudes_a, dtype=np.float64)[..., :, np.newaxis]
+    longitudes_b = np.asarray(longitudes_b, dtype=np.float64)[..., np.newaxis, :]
+
+    # Signed angle from a to b in [-180, 180)
+    difference = (longitudes_b - longitudes_a + 180.0) % 360.0 - 180.0
+    separation = np.abs(difference)
+
+    deviation = separation[..., np.newaxis] - table.angles
+    within = np.abs(deviation) <= table.orbs
+    tightest = np.where(within, np.abs(deviation), np.inf).argmin(axis=-1)
+    aspect = np.where(within.any(axis=-1), tightest, -1)
+    signed_orb = np.take_along_axis(deviation, tightest[..., np.newaxis], axis=-1)[..., 0]
+
+    # The separation grows when b gains on a in the direction they are apart
+    relative_speed = np.zeros(())
+    if speeds_b is not None:
+        relative_speed = relative_speed + np.asarray(speeds_b, dtype=np.float64)[..., np.newaxis, :]
+    if speeds_a is not None:
+        relative_speed = relative_speed - np.asarray(speeds_a, dtype=np.float64)[..., :, np.newaxis]
+    separation_rate = np.sign(difference) * relative_speed
+    applying = (aspect >= 0) & (np.sign(signed_orb) * separation_rate < 0)
+
+    return AspectMatrix(
+        aspect=aspect,
+        separation=separation,
+        orb=np.abs(signed_orb),
+        applying=applying
+    )
+
+
+def find_aspects(
+    longitudes_a: Sequence[float],
+    longitudes_b: Optional[Sequence[float]] = None,
+    speeds_a: Optional[Sequence[float]] = None,
+    speeds_b: Optional[Sequence[float]] = None,
+    table: AspectTable = DEFAULT_TABLE
+) -> List[Aspect]:
+    """List the aspects between two sets of longitudes, tightest first.
+
+    Without ``longitudes_b`` the set is aspected against itself and each
+    pair is reported once.
+    """
+    same_set = longitudes_b is None
+    if same_set:
+        longitudes_b, speeds_b = longitudes_a, speeds_a
+    matrix = aspect_matrix(
+        np.asarray(longitudes_a, dtype=np.float64),
+        np.asarray(longitudes_b, dtype=np.float64),
+        None if speeds_a is None else np.asarray(speeds_a, dtype=np.float64),
+        None if speeds_b is None else np.asarray(speeds_b, dtype=np.float64),
+        table
+    )
+    found = matrix.aspect >= 0
+    if same_set:
+        found = np.triu(found, k=1)
+    aspects = [
+        Aspect(
+            first=int(first),
+            second=int(second),
+            aspect=table.names[matrix.aspect[first, second]],
+            separation=float(matrix.separation[first, second]),
+            orb=float(matrix.orb[first, second]),
+            applying=bool(matrix.applying[first, second])
+        )
+        for first, second in zip(*np.nonzero(found))
+    ]
+    return sorted(aspects, key=lambda aspect: aspect.orb)
+
+
+_aspect_table: Optional[AspectTable] = None
+
+
+def get_aspect_table() -> AspectTable:
+    """Return the process-wide aspect table.
+
+    ASPECT_ORBS overrides it as comma-separated ``name:angle:orb`` entries,
+    e.g. ``conjunction:0:8,sextile:60:4,square:90:7,trine:120:8,opposition:180:8``.
+    """
+    global _aspect_table
+    if _aspect_table is None:
+        spec = os.getenv("ASPECT_ORBS")
+        if spec:
+            orbs = {}
+            for entry in spec.split(","):
+                name, angle, orb = entry.strip().split(":")
+                orbs[name] = (float(angle), float(orb))
+            _aspect_table = AspectTable(orbs)
+        else:
+            _aspect_table = DEFAULT_TABLE
+    return _aspect_table
@@ -0,0 +1,353 @@
+"""Kundali chart renderer.
+
+The static part of the chart (circles, house spokes, zodiac labels and the
+watermark) is laid out once into an SVG template; each chart only adds its
+planet glyphs and ascendant marker. PNGs are drawn with Pillow rather than
+through a matplotlib figure: the static part is rasterized once per size and
+theme, and each chart pastes that background into a reused per-thread canvas
+before drawing its overlay. The layout matches the original polar plot: 0°
+at the top, angles running clockwise, planets on the 0.45 ring.
+"""
+import io
+import logging
+import math
+import os
+import threading
+from typing import Dict, NamedTuple, Optional, Tuple
+from xml.sax.saxutils import escape
+from PIL import Image, ImageDraw, ImageFont
+from app.core.cache import MISSING, LRUCache, register_cache
+
+logger = logging.getLogger(__name__)
+
+# Planet glyphs, ordered as GRAHAS
+PLANET_SYMBOLS = {
+    'Sun': '☉',
+    'Moon': '☽',
+    'Mars': '♂',
+    'Mercury': '☿',
+    'Jupiter': '♃',
+    'Venus': '♀',
+    'Saturn': '♄',
+    'Rahu': '☊',
+    'Ketu': '☋'
+}
+
+ZODIAC_SIGNS = [
+    'Aries ♈', 'Taurus ♉', 'Gemini ♊', 'Cancer ♋',
+    'Leo ♌', 'Virgo ♍', 'Libra ♎', 'Scorpio ♏',
+    'Sagittarius ♐', 'Capricorn ♑', 'Aquarius ♒', 'Pisces ♓'
+]
+
+# Radii in units of the outer circle
+CIRCLE_RADII = (0.3, 0.6, 1.0)
+PLANET_RADIUS = 0.45
+SIGN_LABEL_RADIUS = 1.1
+ASC_LABEL_RADIUS = 1.15
+# Outermost radius that has to fit inside the image, leaving room for labels
+VIEW_RADIUS = 1.3
+
+
+
+class ChartTheme(NamedTuple):
+    background: str
+    ink: str
+    accent: str  # ascendant marker
+    watermark: str  # watermark colour, blended at half opacity over the background
+
+
+THEMES = {
+    "classic": ChartTheme(background="#ffffff", ink="#000000", accent="#ff0000", watermark="#808080"),
+    "dark": ChartTheme(background="#12121c", ink="#e6e6f0", accent="#ff5c5c", watermark="#6e6e80"),
+}
+DEFAULT_THEME = "classic"
+
+FONT_FAMILY = "DejaVu Sans, Segoe UI Symbol, sans-serif"
+WATERMARK = "Generated by SoulBuddy"
+
+# Pillow draws lines without anti-aliasing, so rasters are drawn this much
+# larger and box-downsampled
+SUPERSAMPLE = 2
+# Sizes a requested chart size is rounded up to (the largest caps it), so
+# only a few canvases and backgrounds are ever drawn
+CHART_SIZES = (256, 512, 800, 1200, 1600, 2048)
+# Encoder settings per raster format. Higher zlib levels shrink PNG charts
+# little and cost far more time; lossless WebP suits the flat line art.
+RASTER_OPTIONS = {
+    "PNG": {"compress_level": 3},
+    "WEBP": {"lossless": True, "method": 2},
+}
+
+
+def find_font_path() -> Optional[str]:
+    """A TrueType font with the astrological glyphs: CHART_FONT_PATH, else matplotlib's DejaVu Sans"""
+    path = os.getenv("CHART_FONT_PATH")
+    if path:
+        return path
+    try:
+        import matplotlib
+        path = os.path.join(matplotlib.get_data_path(), "fonts", "ttf", "DejaVuSans.ttf")
+        return path if os.path.exists(path) else None
+    except ImportError:
+        return None
+
+
+def chart_size(size: int) -> int:
+    """Round a requested chart size up to the next of CHART_SIZES, capped at the largest"""
+    for step in CHART_SIZES:
+        if size <= step:
+            return step
+    return CHART_SIZES[-1]
+
+
+class ChartRenderer:
+    def __init__(self, size: int = 1200, font_path: Optional[str] = None, max_backgrounds: int = 8):
+        self.size = size
+        self.font_path = font_path or find_font_path()
+        self._fonts: Dict[int, ImageFont.FreeTypeFont] = {}
+        self._font_lock = threading.Lock()
+        self._svg_templates: Dict[str, Tuple[str, str]] = {}
+        # Rasterized backgrounds keyed by (canvas size, theme)
+        self.backgrounds = LRUCache(maxsize=max_backgrounds)
+        self._canvases = threading.local()
+
+    @staticmethod
+    def polar_to_xy(theta_degrees: float, r: float, center: float, scale: float) -> Tuple[float, float]:
+        """Map a chart angle (clockwise from the top) and radius to image coordinates"""
+        theta = math.radians(theta_degrees)
+        return center + scale * r * math.sin(theta), center - scale * r * math.cos(theta)
+
+    def _geometry(self, size: int) -> Tuple[float, float]:
+        center = size / 2
+        return center, center / VIEW_RADIUS
+
+    # SVG
+
+    def _svg_template(self, theme: str) -> Tuple[str, str]:
+        template = self._svg_templates.get(theme)
+        if template is None:
+            template = self._svg_templates[theme] = self._build_svg_template(THEMES[theme])
+        return template
+
+    def _build_svg_template(self, theme: ChartTheme) -> Tuple[str, str]:
+        size = self.size
+        center, scale = self._geometry(size)
+        # The <svg> tag itself is written per chart, as its display size varies
+        parts = [f'<rect width="{size}" height="{size}" fill="{theme.background}"/>']
+        for r in CIRCLE_RADII:
+            parts.append(
+                f'<circle cx="{center:.1f}" cy="{center:.1f}" r="{scale * r:.1f}" '
+                f'fill="none" stroke="{theme.ink}" stroke-width="1.5"/>'
+            )
+        for house in range(12):
+            x1, y1 = self.polar_to_xy(house * 30, CIRCLE_RADII[0], center, scale)
+            x2, y2 = self.polar_to_xy(house * 30, CIRCLE_RADII[-1], center, scale)
+            parts.append(
+                f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}" '
+                f'stroke="{theme.ink}" stroke-width="1"/>'
+            )
+        font_size = size / 60
+        for i, sign in enumerate(ZODIAC_SIGNS):
+            x, y = self.polar_to_xy(90 - i * 30, SIGN_LABEL_RADIUS, center, scale)
+            parts.append(
+                f'<text x="{x:.1f}" y="{y:.1f}" font-size="{font_size:.1f}" '
+                f'text-anchor="middle" dominant-baseline="central">{escape(sign)}</text>'
+            )
+        parts.append(
+            f'<text x="{size * 0.99:.1f}" y="{size * 0.99:.1f}" font-size="{size / 100:.1f}" '
+            f'text-anchor="end" fill="{theme.watermark}" fill-opacity="0.5">{WATERMARK}</text>'
+        )
+        return "".join(parts), "</svg>"
+
+    def render_svg(
+        self,
+        planet_positions: Dict[str, float],
+        ascendant: float,
+        theme: str = DEFAULT_THEME,
+        size: Optional[int] = None
+    ) -> str:
+        """Return the chart as an SVG document, ``size`` pixels square (scaled from the template)"""
+        head, tail = self._svg_template(theme)
+        chart_theme = THEMES[theme]
+        accent = chart_theme.accent
+        center, scale = self._geometry(self.size)
+        font_size = self.size / 60
+        display_size = size or self.size
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{display_size}" height="{display_size}" '
+            f'viewBox="0 0 {self.size} {self.size}" font-family="{FONT_FAMILY}" fill="{chart_theme.ink}">',
+            head
+        ]
+        for planet, longitude in planet_positions.items():
+            x, y = self.polar_to_xy(90 - longitude, PLANET_RADIUS, center, scale)
+            parts.append(
+                f'<text x="{x:.1f}" y="{y:.1f}" font-size="{font_size:.1f}" text-anchor="middle" '
+                f'dominant-baseline="central">{PLANET_SYMBOLS[planet]} {planet}</text>'
+            )
+        x1, y1 = self.polar_to_xy(90 - ascendant, CIRCLE_RADII[0], center, scale)
+        x2, y2 = self.polar_to_xy(90 - ascendant, CIRCLE_RADII[-1], center, scale)
+        parts.append(
+            f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}" stroke="{accent}" stroke-width="3"/>'
+        )
+        x, y = self.polar_to_xy(90 - ascendant, ASC_LABEL_RADIUS, center, scale)
+        parts.append(
+            f'<text x="{x:.1f}" y="{y:.1f}" font-size="{font_size:.1f}" fill="{accent}" '
+            f'text-anchor="middle" dominant-baseline="central">ASC</text>'
+        )
+        parts.append(tail)
+        return "".join(parts)
+
+    # Raster
+
+    def _font(self, size: int) -> ImageFont.ImageFont:
+        with self._font_lock:
+            font = self._fonts.get(size)
+            if font is None:
+                if self.font_path:
+                    font = ImageFont.truetype(self.font_path, size)
+                else:
+                    logger.warning("No TrueType font found for chart glyphs; using Pillow's default font")
+                    font = ImageFont.load_default(size)
+                self._fonts[size] = font
+            return font
+
+    def _draw_background(self, draw: ImageDraw.ImageDraw, size: int, theme: ChartTheme):
+        center, scale = self._geometry(size)
+        line_width = max(1, size // 600)
+        for r in CIRCLE_RADII:
+            radius = scale * r
+            draw.ellipse(
+                (center - radius, center - radius, center + radius, center + radius),
+                outline=theme.ink,
+                width=line_width
+            )
+        for house in range(12):
+            draw.line(
+                [
+                    self.polar_to_xy(house * 30, CIRCLE_RADII[0], center, scale),
+                    self.polar_to_xy(house * 30, CIRCLE_RADII[-1], center, scale),
+                ],
+                fill=theme.ink,
+                width=line_width
+            )
+        font = self._font(round(size / 60))
+        for i, sign in enumerate(ZODIAC_SIGNS):
+            draw.text(
+                self.polar_to_xy(90 - i * 30, SIGN_LABEL_RADIUS, center, scale),
+                sign, fill=theme.ink, font=font, anchor="mm"
+            )
+        watermark = Image.blend(
+            Image.new("RGB", (1, 1), theme.background),
+            Image.new("RGB", (1, 1), theme.watermark),
+            0.5
+        ).getpixel((0, 0))
+        draw.text(
+            (size * 0.99, size * 0.99), WATERMARK,
+            fill=watermark, font=self._font(round(size / 100)), anchor="rs"
+        )
+
+    def background(self, canvas_size: int, theme: str) -> Image.Image:
+        """The static chart layer for a canvas size and theme, rasterized once and shared read-only"""
+        key = (canvas_size, theme)
+        image = self.backgrounds.get(key)
+        if image is MISSING:
+            # Threads racing on a cold key each draw it once; the last one wins
+            chart_theme = THEMES[theme]
+            image = Image.new("RGB", (canvas_size, canvas_size), chart_theme.background)
+            self._draw_background(ImageDraw.Draw(image), canvas_size, chart_theme)
+            self.backgrounds.set(key, image)
+            logger.info(f"Rasterized {theme} chart background at {canvas_size}px")
+        return image
+
+    def _canvas(self, canvas_size: int) -> Image.Image:
+        # One scratch canvas per thread, overwritten by each chart and
+        # replaced when a chart of another size comes along
+        canvas = getattr(self._canvases, "canvas", None)
+        if canvas is None or canvas.width != canvas_size:
+            canvas = self._canvases.canvas = Image.new("RGB", (canvas_size, canvas_size))
+        return canvas
+
+    def _draw_overlay(
+        self,
+        draw: ImageDraw.ImageDraw,
+        size: int,
+        planet_positions: Dict[str, float],
+        ascendant: float,
+        theme: ChartTheme
+    ):
+        center, scale = self._geometry(size)
+        font = self._font(round(size / 60))
+        for planet, longitude in planet_positions.items():
+            draw.text(
+                self.polar_to_xy(90 - longitude, PLANET_RADIUS, center, scale),
+                f"{PLANET_SYMBOLS[planet]} {planet}", fill=theme.ink, font=font, anchor="mm"
+            )
+        draw.line(
+            [
+                self.polar_to_xy(90 - ascendant, CIRCLE_RADII[0], center, scale),
+                self.polar_to_xy(90 - ascendant, CIRCLE_RADII[-1], center, scale),
+            ],
+            fill=theme.accent,
+            width=max(2, size // 300)
+        )
+        draw.text(
+            self.polar_to_xy(90 - ascendant, ASC_LABEL_RADIUS, center, scale),
+            "ASC", fill=theme.accent, font=font, anchor="mm"
+        )
+
+    def render_image(
+        self,
+        planet_positions: Dict[str, float],
+        ascendant: float,
+        size: Optional[int] = None,
+        theme: str = DEFAULT_THEME
+    ) -> Image.Image:
+        """Draw the chart as an RGB image of ``size`` pixels square"""
+        size = size or self.size
+        canvas_size = size * SUPERSAMPLE
+        canvas = self._canvas(canvas_size)
+        canvas.paste(self.background(canvas_size, theme))
+        self._draw_overlay(ImageDraw.Draw(canvas), canvas_size, planet_positions, ascendant, THEMES[theme])
+        return canvas.reduce(SUPERSAMPLE)
+
+    def render_raster(
+        self,
+        planet_positions: Dict[str, float],
+        ascendant: float,
+        image_format: str = "PNG",
+        size: Optional[int] = None,
+        theme: str = DEFAULT_THEME,
+        dpi: int = 300
+    ) -> bytes:
+        """Return the chart encoded as PNG or WebP; ``dpi`` is recorded as the image's print resolution"""
+        buffer = io.BytesIO()
+        self.render_image(planet_positions, ascendant, size, theme).save(
+            buffer, format=image_format, dpi=(dpi, dpi), **RASTER_OPTIONS[image_format]
+        )
+        return buffer.getvalue()
+
+    def render_png(
+        self,
+        planet_positions: Dict[str, float],
+        ascendant: float,
+        size: Optional[int] = None,
+        theme: str = DEFAULT_THEME,
+        dpi: int = 300
+    ) -> bytes:
+        """Return the chart as PNG bytes"""
+        return self.render_raster(planet_positions, ascendant, "PNG", size, theme, dpi)
+
+    def stats(self) -> Dict:
+        return {"backgrounds": self.backgrounds.stats()}
+
+
+_renderer: Optional[ChartRenderer] = None
+
+
+def get_chart_renderer() -> ChartRenderer:
+    """Return the process-wide chart renderer; CHART_SIZE sets the default size in pixels"""
+    global _renderer
+    if _renderer is None:
+        _renderer = ChartRenderer(size=int(os.getenv("CHART_SIZE", "1200")))
+        register_cache("chart_renderer", _renderer)
+    return _renderer
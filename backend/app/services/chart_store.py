@@ -0,0 +1,159 @@
+"""Content-addressed store of Kundali charts and their rendered variants.
+
+A chart ID is derived from the chart's content (planet longitudes and the
+ascendant), so the same chart always gets the same ID and URL. The chart
+data behind an ID is kept in a tiered cache (SQLite when CHART_STORE_DB is
+set, so every worker can serve any ID); rendered bytes for each (format,
+size, dpi, theme) variant are kept in memory. A variant's strong ETag is
+derived from the same key, so a conditional request can be answered without
+rendering.
+"""
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, NamedTuple, Optional, Tuple
+from app.core.cache import MISSING, LRUCache, SQLiteCache, TieredCache, register_cache
+from app.services.chart_renderer import DEFAULT_THEME, ChartRenderer, get_chart_renderer
+from app.services.render_pool import RenderPool, get_render_pool
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {
+    "svg": "image/svg+xml",
+    "png": "image/png",
+    "webp": "image/webp",
+}
+
+# Longitudes are rounded before hashing, far below anything visible on a chart
+ID_DECIMALS = 4
+
+# Part of every ETag; bump it when the rendered output changes
+RENDER_VERSION = 1
+
+
+class ChartVariant(NamedTuple):
+    content: bytes
+    media_type: str
+    etag: str
+
+
+class ChartStore:
+    def __init__(
+        self,
+        renderer: ChartRenderer,
+        render_pool: RenderPool,
+        charts: TieredCache,
+        max_variants: int = 256
+    ):
+        self.renderer = renderer
+        self.render_pool = render_pool
+        self.charts = charts
+        self.variants = LRUCache(maxsize=max_variants)
+
+    def put(self, planet_positions: Dict[str, float], ascendant: float) -> str:
+        """Store a chart and return its content-derived ID"""
+        chart = {
+            "planet_positions": {
+                planet: round(float(longitude), ID_DECIMALS) for planet, longitude in planet_positions.items()
+            },
+            "ascendant": round(float(ascendant), ID_DECIMALS)
+        }
+        canonical = json.dumps(chart, sort_keys=True, separators=(",", ":"))
+        chart_id = hashlib.sha256(canonical.encode()).hexdigest()[:32]
+        if self.charts.get(chart_id) is MISSING:
+            self.charts.set(chart_id, chart)
+        return chart_id
+
+    def get(self, chart_id: str) -> Optional[Dict]:
+        chart = self.charts.get(chart_id)
+        return None if chart is MISSING else chart
+
+    def variant_key(
+        self,
+        chart_id: str,
+        chart_format: str = "png",
+        size: Optional[int] = None,
+        dpi: int = 300,
+        theme: str = DEFAULT_THEME
+    ) -> Tuple[str, str, int, int, str]:
+        size = size or self.renderer.size
+        if chart_format == "svg":
+            dpi = 0  # resolution independent
+        return (chart_id, chart_format, size, dpi, theme)
+
+    def etag(
+        self,
+        chart_id: str,
+        chart_format: str = "png",
+        size: Optional[int] = None,
+        dpi: int = 300,
+        theme: str = DEFAULT_THEME
+    ) -> str:
+        """Strong ETag of a variant; chart IDs are content addressed, so the key identifies the bytes"""
+        key = self.variant_key(chart_id, chart_format, size, dpi, theme)
+        canonical = json.dumps([RENDER_VERSION, *key], separators=(",", ":"))
+        return f'"{hashlib.sha256(canonical.encode()).hexdigest()[:32]}"'
+
+    async def variant(
+        self,
+        chart_id: str,
+        chart_format: str = "png",
+        size: Optional[int] = None,
+        dpi: int = 300,
+        theme: str = DEFAULT_THEME
+    ) -> Optional[ChartVariant]:
+        """Rendered bytes of a chart, rendering them on first request; None for an unknown ID"""
+        key = self.variant_key(chart_id, chart_format, size, dpi, theme)
+        chart_id, chart_format, size, dpi, theme = key
+        variant = self.variants.get(key)
+        if variant is not MISSING:
+            return variant
+
+        chart = self.get(chart_id)
+        if chart is None:
+            return None
+        if chart_format == "svg":
+            content = self.renderer.render_svg(
+                chart["planet_positions"], chart["ascendant"], theme=theme, size=size
+            ).encode()
+        else:
+            content = await self.render_pool.render_raster(
+                chart["planet_positions"], chart["ascendant"], chart_format.upper(), size, theme, dpi
+            )
+        variant = ChartVariant(
+            content=content,
+            media_type=MEDIA_TYPES[chart_format],
+            etag=self.etag(*key)
+        )
+        self.variants.set(key, variant)
+        return variant
+
+    def stats(self) -> Dict:
+        return {"charts": self.charts.stats(), "variants": self.variants.stats()}
+
+
+_chart_store: Optional[ChartStore] = None
+
+
+def get_chart_store() -> ChartStore:
+    """Return the process-wide chart store.
+
+    CHART_STORE_SIZE caps the charts kept in memory, CHART_STORE_DB adds a
+    SQLite tier shared by all workers and CHART_VARIANT_CACHE_SIZE caps the
+    rendered images kept in memory.
+    """
+    global _chart_store
+    if _chart_store is None:
+        db_path = os.getenv("CHART_STORE_DB")
+        _chart_store = ChartStore(
+            get_chart_renderer(),
+            get_render_pool(),
+            TieredCache(
+                LRUCache(maxsize=int(os.getenv("CHART_STORE_SIZE", "10000"))),
+                SQLiteCache(db_path, table="charts") if db_path else None
+            ),
+            max_variants=int(os.getenv("CHART_VARIANT_CACHE_SIZE", "256"))
+        )
+        register_cache("charts", _chart_store)
+    return _chart_store
@@ -1,15 +1,21 @@
-from typing import List, Dict, Optional
-import os
-from groq import Groq
-from dotenv import load_dotenv
+import asyncio
+import logging
+from typing import AsyncIterator, List, Dict, Optional
 from ..models.chat_models import BirthDetails
+from .llm_gateway import LLMGateway, LLMUnavailable, get_llm_gateway, llm_deadline, run_with_deadline
+from .session_store import SessionStore, get_session_store
 
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+ERROR_REPLY = "I apologize, but I'm having trouble processing your request right now. Please try again later."
+BUSY_REPLY = "I'm taking longer than usual to gather my thoughts. Please try again in a moment."
 
 class ChatbotService:
-    def __init__(self):
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        self.chat_history: Dict[str, List[Dict[str, str]]] = {}
+    def __init__(self, llm: Optional[LLMGateway] = None, sessions: Optional[SessionStore] = None):
+        self.llm = llm or get_llm_gateway()
+        self.sessions = sessions or get_session_store()
+        # Seconds to wait for a reply (or for a streamed reply to start) before apologising
+        self.deadline = llm_deadline("chat", 20)
         
     def _get_system_prompt(self, birth_details: Optional[BirthDetails] = None) -> str:
         base_prompt = """You are SoulBuddy, a compassionate and insightful AI companion focused on spiritual and personal growth. 
@@ -26,42 +32,81 @@ class ChatbotService:
         
         return base_prompt
     
-    async def chat(self, user_id: str, message: str, birth_details: Optional[BirthDetails] = None) -> str:
-        # Initialize chat history for new users
-        if user_id not in self.chat_history:
-            self.chat_history[user_id] = []
-            
-        # Add user message to history
-        self.chat_history[user_id].append({"role": "user", "content": message})
-        
-        # Prepare messages for the API call
+    def _prepare_messages(self, user_id: str, message: str, birth_details: Optional[BirthDetails]) -> List[Dict[str, str]]:
+        # Prepare messages for the API call; the user message joins the
+        # history together with the reply (see _record_turn)
         messages = [{"role": "system", "content": self._get_system_prompt(birth_details)}]
-        messages.extend(self.chat_history[user_id][-10:])  # Keep last 10 messages for context
+        messages.extend(self.sessions.get_history(user_id, limit=9))  # Keep last 10 messages for context
+        messages.append({"role": "user", "content": message})
+        return messages
+
+    def _record_turn(self, user_id: str, message: str, reply: str) -> None:
+        """Add a user message and the reply to it to the history"""
+        self.sessions.append(user_id, "user", message)
+        self.sessions.append(user_id, "assistant", reply)
+
+    async def _reply(self, user_id: str, message: str, messages: List[Dict[str, str]]) -> str:
+        # Make API call to Groq through the shared async gateway. A reply that
+        # arrives after the deadline is still recorded, so the history stays
+        # in user/assistant pairs either way.
+        assistant_message = await self.llm.complete(
+            messages,
+            temperature=0.7,
+            max_tokens=600,
+            top_p=1
+        )
+        self._record_turn(user_id, message, assistant_message)
+        return assistant_message
+
+    async def chat(self, user_id: str, message: str, birth_details: Optional[BirthDetails] = None) -> str:
+        messages = self._prepare_messages(user_id, message, birth_details)
         
         try:
-            # Make API call to Groq
-            response = self.client.chat.completions.create(
-                model="mixtral-8x7b-32768",  # Using Mixtral model for better performance
-                messages=messages,
-                temperature=0.7,
-                max_tokens=600,
-                top_p=1,
-                stream=False
+            # Slow or paused provider: ask to try again; failing one: apologise
+            return await run_with_deadline(
+                self._reply(user_id, message, messages),
+                self.deadline,
+                lambda: BUSY_REPLY,
+                call_site="chat",
+                error_fallback=lambda: ERROR_REPLY
             )
             
-            # Extract the response
-            assistant_message = response.choices[0].message.content
-            
-            # Add assistant response to history
-            self.chat_history[user_id].append({"role": "assistant", "content": assistant_message})
-            
-            return assistant_message
-            
         except Exception as e:
-            print(f"Error in chatbot service: {str(e)}")
-            return "I apologize, but I'm having trouble processing your request right now. Please try again later."
+            logger.error(f"Error in chatbot service: {str(e)}")
+            return ERROR_REPLY
     
+    async def chat_stream(
+        self,
+        user_id: str,
+        message: str,
+        birth_details: Optional[BirthDetails] = None
+    ) -> AsyncIterator[str]:
+        """Yield the assistant reply piece by piece as the LLM generates it.
+
+        The message and the assembled reply are added to the history once the
+        stream ends; if the consumer goes away early, whatever was generated
+        so far is kept.
+        If the reply does not start within the chat deadline, or the provider
+        is failing, an apology is sent instead.
+        """
+        messages = self._prepare_messages(user_id, message, birth_details)
+        parts: List[str] = []
+        stream = self.llm.stream(messages, temperature=0.7, max_tokens=600, top_p=1, timeout=self.deadline)
+        try:
+            async for delta in stream:
+                parts.append(delta)
+                yield delta
+        except (asyncio.TimeoutError, LLMUnavailable) as e:
+            if parts:
+                raise
+            logger.warning(f"Chat reply did not start: {type(e).__name__}")
+            yield BUSY_REPLY
+        finally:
+            # Closing our stream cancels the upstream completion
+            await stream.aclose()
+            if parts:
+                self._record_turn(user_id, message, "".join(parts))
+
     def clear_history(self, user_id: str) -> None:
         """Clear chat history for a specific user"""
-        if user_id in self.chat_history:
-            self.chat_history[user_id] = [] 
\ No newline at end of file
+        self.sessions.clear(user_id) 
\ No newline at end of file
@@ -0,0 +1,278 @@
+import swisseph as swe
+import numpy as np
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence, Tuple, Union
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Order of the nine grahas in every array produced by this module
+GRAHAS = ("sun", "moon", "mars", "mercury", "jupiter", "venus", "saturn", "rahu", "ketu")
+RAHU_INDEX = GRAHAS.index("rahu")
+KETU_INDEX = GRAHAS.index("ketu")
+
+# Swiss Ephemeris bodies for every graha except Ketu, which is derived from Rahu
+SWE_BODIES = (
+    swe.SUN,
+    swe.MOON,
+    swe.MARS,
+    swe.MERCURY,
+    swe.JUPITER,
+    swe.VENUS,
+    swe.SATURN,
+    swe.MEAN_NODE,  # North Node
+)
+
+
+# Swiss Ephemeris keeps the sidereal mode and its calculation caches in
+# process-global C state, so every swe.* call made while serving requests
+# goes through this lock. Holding it across set_sid_mode and the calculations
+# that depend on it keeps concurrent threads from mixing ayanamsas.
+_swe_lock = threading.RLock()
+
+
+class EphemerisPositions(NamedTuple):
+    """Longitudes and daily speeds with shape (n_days, 9), columns ordered as GRAHAS"""
+    longitudes: np.ndarray
+    speeds: np.ndarray
+
+    @property
+    def is_retrograde(self) -> np.ndarray:
+        return self.speeds < 0
+
+
+def julian_days(moments: Sequence[datetime]) -> np.ndarray:
+    """Convert UTC datetimes to Julian days (UT) in one vectorized pass.
+
+    Matches swe.julday for the Gregorian calendar, truncated to the minute
+    like the per-request calculations always have been.
+    """
+    fields = np.array(
+        [(m.year, m.month, m.day, m.hour, m.minute) for m in moments],
+        dtype=np.int64
+    ).reshape(-1, 5)
+    year, month, day, hour, minute = fields.T
+
+    a = (14 - month) // 12
+    y = year + 4800 - a
+    m = month + 12 * a - 3
+    day_number = day + (153 * m + 2) // 5 + 365 * y + y // 4 - y // 100 + y // 400 - 32045
+    return day_number - 0.5 + (hour + minute / 60.0) / 24.0
+
+
+def julian_day(moment: datetime) -> float:
+    """Convert a single UTC datetime to a Julian day (UT)"""
+    return float(julian_days([moment])[0])
+
+
+class EphemerisEngine:
+    """Batch ephemeris core: all nine grahas for an array of Julian days in one pass.
+
+    When a precomputed Chebyshev table is supplied, requests it covers are
+    answered from the table and everything else goes to Swiss Ephemeris.
+    """
+
+    def __init__(self, table=None):
+        swe.set_ephe_path()
+        self.table = table
+
+    def positions(
+        self,
+        julian_days: Union[Sequence[float], np.ndarray],
+        sidereal: bool = False,
+        ayanamsa: int = swe.SIDM_LAHIRI
+    ) -> EphemerisPositions:
+        """Calculate longitude and speed of the nine grahas for every Julian day.
+
+        With ``sidereal`` set the longitudes are measured against the given
+        ``ayanamsa`` (a ``swe.SIDM_*`` constant), otherwise they are tropical.
+        Bodies Swiss Ephemeris cannot compute are returned as NaN.
+        """
+        jds = np.atleast_1d(np.asarray(julian_days, dtype=np.float64))
+        if self.table is not None and self.table.covers(jds, sidereal, ayanamsa):
+            return self.table.positions(jds, sidereal, ayanamsa)
+
+        longitudes = np.full((jds.size, len(GRAHAS)), np.nan)
+        speeds = np.full((jds.size, len(GRAHAS)), np.nan)
+
+        flags = swe.FLG_SWIEPH | swe.FLG_SPEED
+        if sidereal:
+            flags |= swe.FLG_SIDEREAL
+
+        calc_ut = swe.calc_ut
+        with _swe_lock:
+            if sidereal:
+                swe.set_sid_mode(ayanamsa)
+            for column, body in enumerate(SWE_BODIES):
+                body_longitudes = longitudes[:, column]
+                body_speeds = speeds[:, column]
+                for row, jd in enumerate(jds.tolist()):
+                    try:
+                        position = calc_ut(jd, body, flags)[0]
+                    except swe.Error as e:
+                        logger.error(f"Error calculating {GRAHAS[column]} for JD {jd}: {e}")
+                        continue
+                    body_longitudes[row] = position[0]
+                    body_speeds[row] = position[3]
+
+        # Ketu is always exactly opposite Rahu and moves with it
+        longitudes[:, KETU_INDEX] = (longitudes[:, RAHU_INDEX] + 180.0) % 360.0
+        speeds[:, KETU_INDEX] = speeds[:, RAHU_INDEX]
+
+        return EphemerisPositions(longitudes=longitudes, speeds=speeds)
+
+    def body_positions(
+        self,
+        julian_days: Union[Sequence[float], np.ndarray],
+        columns: Union[Sequence[int], np.ndarray],
+        sidereal: bool = False,
+        ayanamsa: int = swe.SIDM_LAHIRI
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Longitude and speed of one graha per Julian day, ``columns`` indexing GRAHAS.
+
+        For searches that follow a different planet in every row, so each
+        row costs one calculation instead of nine.
+        """
+        jds = np.atleast_1d(np.asarray(julian_days, dtype=np.float64))
+        columns = np.broadcast_to(np.asarray(columns, dtype=np.int64), jds.shape)
+        if self.table is not None and self.table.covers(jds, sidereal, ayanamsa):
+            positions = self.table.positions(jds, sidereal, ayanamsa)
+            rows = np.arange(jds.size)
+            return positions.longitudes[rows, columns], positions.speeds[rows, columns]
+
+        longitudes = np.full(jds.size, np.nan)
+        speeds = np.full(jds.size, np.nan)
+
+        flags = swe.FLG_SWIEPH | swe.FLG_SPEED
+        if sidereal:
+            flags |= swe.FLG_SIDEREAL
+
+        calc_ut = swe.calc_ut
+        # Ketu is computed as Rahu and turned around afterwards
+        bodies = [SWE_BODIES[RAHU_INDEX if column == KETU_INDEX else column] for column in columns.tolist()]
+        with _swe_lock:
+            if sidereal:
+                swe.set_sid_mode(ayanamsa)
+            for row, (jd, body) in enumerate(zip(jds.tolist(), bodies)):
+                try:
+                    position = calc_ut(jd, body, flags)[0]
+                except swe.Error as e:
+                    logger.error(f"Error calculating {GRAHAS[columns[row]]} for JD {jd}: {e}")
+                    continue
+                longitudes[row] = position[0]
+                speeds[row] = position[3]
+
+        is_ketu = columns == KETU_INDEX
+        longitudes[is_ketu] = (longitudes[is_ketu] + 180.0) % 360.0
+        return longitudes, speeds
+
+    def houses(
+        self,
+        julian_days: Union[Sequence[float], np.ndarray],
+        latitudes: Union[Sequence[float], np.ndarray],
+        longitudes: Union[Sequence[float], np.ndarray],
+        house_system: bytes = b'P'
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Calculate tropical house cusps (N x 12) and ascendants (N) for each moment and place"""
+        jds, lats, lons = np.broadcast_arrays(
+            np.atleast_1d(np.asarray(julian_days, dtype=np.float64)),
+            np.atleast_1d(np.asarray(latitudes, dtype=np.float64)),
+            np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+        )
+        cusps = np.empty((jds.size, 12))
+        ascendants = np.empty(jds.size)
+
+        with _swe_lock:
+            for row, (jd, lat, lon) in enumerate(zip(jds.tolist(), lats.tolist(), lons.tolist())):
+                house_cusps, ascmc = swe.houses(jd, lat, lon, house_system)
+                cusps[row] = house_cusps[:12]
+                ascendants[row] = ascmc[0]
+
+        return cusps, ascendants
+
+    def ayanamsa_offset(self, julian_day: float, from_ayanamsa: int, to_ayanamsa: int) -> float:
+        """Degrees to add to a sidereal longitude against ``from_ayanamsa`` to measure it against ``to_ayanamsa``"""
+        with _swe_lock:
+            swe.set_sid_mode(from_ayanamsa)
+            from_value = swe.get_ayanamsa_ut(julian_day)
+            swe.set_sid_mode(to_ayanamsa)
+            to_value = swe.get_ayanamsa_ut(julian_day)
+        return from_value - to_value
+
+    def eclipses(self, start_jd: float, end_jd: float) -> List[Tuple[float, str, str]]:
+        """(Julian day of maximum, "solar" or "lunar", type) of every eclipse between two moments"""
+        found = []
+        with _swe_lock:
+            for kind, search in (("solar", swe.sol_eclipse_when_glob), ("lunar", swe.lun_eclipse_when)):
+                jd = start_jd
+                while True:
+                    flags, times = search(jd, swe.FLG_SWIEPH)
+                    if times[0] >= end_jd:
+                        break
+                    found.append((times[0], kind, eclipse_type(flags)))
+                    # Eclipses are weeks apart; step past this one
+                    jd = times[0] + 1.0
+        return sorted(found)
+
+
+def eclipse_type(flags: int) -> str:
+    """Name of the eclipse type in Swiss Ephemeris result flags"""
+    for flag, name in (
+        (swe.ECL_ANNULAR_TOTAL, "hybrid"),
+        (swe.ECL_TOTAL, "total"),
+        (swe.ECL_ANNULAR, "annular"),
+        (swe.ECL_PARTIAL, "partial"),
+        (swe.ECL_PENUMBRAL, "penumbral"),
+    ):
+        if flags & flag:
+            return name
+    return "unknown"
+
+
+_engine: Optional[EphemerisEngine] = None
+
+
+def get_ephemeris_engine() -> EphemerisEngine:
+    """Return the process-wide ephemeris engine.
+
+    Set EPHEMERIS_TABLE_PATH to a file built by app.services.ephemeris_table
+    to serve positions from the memory-mapped table.
+    """
+    global _engine
+    if _engine is None:
+        table = None
+        table_path = os.getenv("EPHEMERIS_TABLE_PATH")
+        if table_path:
+            from app.services.ephemeris_table import ChebyshevEphemeris
+            try:
+                table = ChebyshevEphemeris(table_path)
+                logger.info(f"Using ephemeris table {table_path} (max error {table.max_error:.2e} degrees)")
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not load ephemeris table {table_path}: {e}")
+        _engine = EphemerisEngine(table=table)
+    return _engine
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_ephemeris_executor() -> ThreadPoolExecutor:
+    """Return the thread pool used to keep ephemeris work off the event loop"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("EPHEMERIS_WORKERS", str(os.cpu_count() or 4))),
+            thread_name_prefix="ephemeris"
+        )
+    return _executor
+
+
+async def run_ephemeris(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking chart or ephemeris calculation on the ephemeris thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_ephemeris_executor(), functools.partial(func, *args, **kwargs))
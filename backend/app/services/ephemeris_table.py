@@ -0,0 +1,238 @@
+"""Precomputed Chebyshev ephemeris table.
+
+The build step samples Swiss Ephemeris for the eight computed grahas (Ketu is
+derived from Rahu) and for the supported ayanamsas over a date range, fits one
+Chebyshev polynomial per body per fixed-length segment and writes the
+coefficients to a flat little-endian binary file:
+
+    header   HEADER_FORMAT (magic, version, counts, jd_start, segment_days, max_error)
+    ids      int32[n_bodies] Swiss Ephemeris body ids, int32[n_ayanamsas] SIDM ids
+    coeffs   float64[n_segments][n_bodies + n_ayanamsas][degree + 1], 64-byte aligned
+
+The reader memory-maps the file, so every uvicorn worker shares the same
+pages, and evaluates positions with a handful of multiply-adds per body.
+
+Accuracy: the guaranteed bound is ``MAX_ALLOWED_ERROR``, 0.001 degrees (3.6
+arc seconds) from swe.calc_ut. The build measures the worst error halfway
+between the fit nodes over the whole range, logs it and stores it in the
+header (``max_error``, logged again when the table is loaded); a table whose
+recorded error exceeds the bound is refused. The error depends on the range,
+segment length and degree, so read ``max_error`` of the table in use rather
+than assuming a figure; with the default 8-day segments and degree 12 it is
+a few 1e-4 degrees, largest for the slow outer planets.
+
+Build with:
+
+    python -m app.services.ephemeris_table --start 1900 --end 2100 --output ephemeris.bin
+"""
+import argparse
+import logging
+import mmap
+import struct
+from datetime import datetime, timezone
+from typing import Sequence, Union
+import numpy as np
+import swisseph as swe
+from numpy.polynomial import chebyshev
+from app.services.ephemeris import (
+    GRAHAS, KETU_INDEX, RAHU_INDEX, SWE_BODIES,
+    EphemerisPositions, julian_day
+)
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SBEPHEM\0"
+VERSION = 1
+HEADER_FORMAT = "<8sIIIIIddd"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+ALIGNMENT = 64
+
+DEFAULT_SEGMENT_DAYS = 8.0
+DEFAULT_DEGREE = 12
+MAX_ALLOWED_ERROR = 1e-3  # degrees
+
+# Ayanamsas stored alongside the tropical longitudes
+TABLE_AYANAMSAS = (swe.SIDM_LAHIRI, swe.SIDM_FAGAN_BRADLEY)
+
+
+def _chebyshev_basis(x: np.ndarray, degree: int):
+    """Return T_k(x) and dT_k/dx for k = 0..degree, each with shape (len(x), degree + 1)"""
+    t = np.empty((x.size, degree + 1))
+    u = np.empty((x.size, degree + 1))  # Chebyshev polynomials of the second kind
+    t[:, 0] = 1.0
+    u[:, 0] = 1.0
+    if degree > 0:
+        t[:, 1] = x
+        u[:, 1] = 2.0 * x
+    for k in range(2, degree + 1):
+        t[:, k] = 2.0 * x * t[:, k - 1] - t[:, k - 2]
+        u[:, k] = 2.0 * x * u[:, k - 1] - u[:, k - 2]
+
+    dt = np.zeros_like(t)
+    dt[:, 1:] = np.arange(1, degree + 1) * u[:, :-1]
+    return t, dt
+
+
+def _sample(julian_days: np.ndarray) -> np.ndarray:
+    """Tropical longitudes of SWE_BODIES followed by TABLE_AYANAMSAS, shape (n, series)"""
+    samples = np.empty((julian_days.size, len(SWE_BODIES) + len(TABLE_AYANAMSAS)))
+    flags = swe.FLG_SWIEPH | swe.FLG_SPEED
+    jds = julian_days.tolist()
+
+    for column, body in enumerate(SWE_BODIES):
+        samples[:, column] = [swe.calc_ut(jd, body, flags)[0][0] for jd in jds]
+
+    # True ayanamsa is the difference between tropical and sidereal longitudes
+    sun_tropical = samples[:, SWE_BODIES.index(swe.SUN)]
+    for offset, ayanamsa in enumerate(TABLE_AYANAMSAS):
+        swe.set_sid_mode(ayanamsa)
+        sun_sidereal = np.array([
+            swe.calc_ut(jd, swe.SUN, flags | swe.FLG_SIDEREAL)[0][0] for jd in jds
+        ])
+        samples[:, len(SWE_BODIES) + offset] = (sun_tropical - sun_sidereal) % 360.0
+    return samples
+
+
+def build_table(
+    output_path: str,
+    start_year: int = 1900,
+    end_year: int = 2100,
+    segment_days: float = DEFAULT_SEGMENT_DAYS,
+    degree: int = DEFAULT_DEGREE
+) -> float:
+    """Fit and write a Chebyshev ephemeris table, returning the measured max error in degrees"""
+    swe.set_ephe_path()
+    jd_start = julian_day(datetime(start_year, 1, 1, tzinfo=timezone.utc))
+    jd_end = julian_day(datetime(end_year + 1, 1, 1, tzinfo=timezone.utc))
+    n_segments = int(np.ceil((jd_end - jd_start) / segment_days))
+    n_series = len(SWE_BODIES) + len(TABLE_AYANAMSAS)
+    segment_starts = jd_start + segment_days * np.arange(n_segments)
+
+    # Fit on Chebyshev nodes, verify halfway between them
+    n_nodes = 2 * (degree + 1)
+    nodes = np.cos(np.pi * (np.arange(n_nodes) + 0.5) / n_nodes)[::-1]
+    checks = (nodes[:-1] + nodes[1:]) / 2.0
+
+    logger.info(f"Sampling {n_segments} segments of {segment_days} days")
+    fit_jds = (segment_starts[:, None] + (nodes + 1.0) / 2.0 * segment_days).ravel()
+    check_jds = (segment_starts[:, None] + (checks + 1.0) / 2.0 * segment_days).ravel()
+    fit_samples = _sample(fit_jds).reshape(n_segments, n_nodes, n_series)
+    check_samples = _sample(check_jds).reshape(n_segments, checks.size, n_series)
+
+    coefficients = np.empty((n_segments, n_series, degree + 1))
+    check_basis, _ = _chebyshev_basis(checks, degree)
+    max_error = 0.0
+    for series in range(n_series):
+        # Unwrap each segment so the 360 -> 0 crossing is a smooth curve
+        unwrapped = np.unwrap(fit_samples[:, :, series], period=360.0, axis=1)
+        coefficients[:, series, :] = chebyshev.chebfit(nodes, unwrapped.T, degree).T
+
+        fitted = (coefficients[:, series, :] @ check_basis.T) % 360.0
+        error = np.abs(fitted - check_samples[:, :, series])
+        error = np.minimum(error, 360.0 - error)
+        max_error = max(max_error, float(error.max()))
+
+    logger.info(f"Chebyshev fit max error: {max_error:.2e} degrees")
+
+    ids = np.array(list(SWE_BODIES) + list(TABLE_AYANAMSAS), dtype="<i4")
+    header = struct.pack(
+        HEADER_FORMAT, MAGIC, VERSION, len(SWE_BODIES), len(TABLE_AYANAMSAS),
+        degree, n_segments, jd_start, segment_days, max_error
+    )
+    data_offset = -(-(HEADER_SIZE + ids.nbytes) // ALIGNMENT) * ALIGNMENT
+    with open(output_path, "wb") as f:
+        f.write(header)
+        f.write(ids.tobytes())
+        f.write(b"\0" * (data_offset - HEADER_SIZE - ids.nbytes))
+        f.write(coefficients.astype("<f8").tobytes())
+    return max_error
+
+
+class ChebyshevEphemeris:
+    """Memory-mapped reader for a table written by build_table.
+
+    Offers the same ``positions`` call as EphemerisEngine without touching
+    swisseph, for Julian days inside the table's range.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, n_bodies, n_ayanamsas, self.degree, self.n_segments,
+         self.jd_start, self.segment_days, self.max_error) = struct.unpack_from(HEADER_FORMAT, self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} ephemeris table")
+        if tuple(np.frombuffer(self._mmap, dtype="<i4", count=n_bodies, offset=HEADER_SIZE)) != SWE_BODIES:
+            raise ValueError(f"{path} was built for a different set of bodies")
+        if self.max_error > MAX_ALLOWED_ERROR:
+            raise ValueError(f"{path} exceeds the accuracy bound ({self.max_error:.2e} degrees)")
+
+        ids_size = 4 * (n_bodies + n_ayanamsas)
+        ayanamsa_ids = np.frombuffer(self._mmap, dtype="<i4", count=n_ayanamsas, offset=HEADER_SIZE + 4 * n_bodies)
+        self.ayanamsa_columns = {int(ayanamsa): n_bodies + i for i, ayanamsa in enumerate(ayanamsa_ids)}
+        data_offset = -(-(HEADER_SIZE + ids_size) // ALIGNMENT) * ALIGNMENT
+        self.coefficients = np.frombuffer(
+            self._mmap,
+            dtype="<f8",
+            count=self.n_segments * (n_bodies + n_ayanamsas) * (self.degree + 1),
+            offset=data_offset
+        ).reshape(self.n_segments, n_bodies + n_ayanamsas, self.degree + 1)
+        self.jd_end = self.jd_start + self.n_segments * self.segment_days
+
+    def covers(self, julian_days: np.ndarray, sidereal: bool = False, ayanamsa: int = swe.SIDM_LAHIRI) -> bool:
+        """Whether every Julian day (and the ayanamsa, if sidereal) can be served from the table"""
+        if sidereal and ayanamsa not in self.ayanamsa_columns:
+            return False
+        return bool(np.all((julian_days >= self.jd_start) & (julian_days < self.jd_end)))
+
+    def positions(
+        self,
+        julian_days: Union[Sequence[float], np.ndarray],
+        sidereal: bool = False,
+        ayanamsa: int = swe.SIDM_LAHIRI
+    ) -> EphemerisPositions:
+        """Evaluate longitude and speed of the nine grahas, like EphemerisEngine.positions"""
+        jds = np.atleast_1d(np.asarray(julian_days, dtype=np.float64))
+        if not self.covers(jds, sidereal, ayanamsa):
+            raise ValueError("Julian days or ayanamsa outside the ephemeris table")
+
+        position = (jds - self.jd_start) / self.segment_days
+        segments = np.minimum(position.astype(np.int64), self.n_segments - 1)
+        x = 2.0 * (position - segments) - 1.0
+        basis, basis_derivative = _chebyshev_basis(x, self.degree)
+
+        coefficients = self.coefficients[segments]
+        values = np.einsum("nsd,nd->ns", coefficients, basis)
+        rates = np.einsum("nsd,nd->ns", coefficients, basis_derivative) * (2.0 / self.segment_days)
+
+        n_bodies = len(SWE_BODIES)
+        longitudes = np.empty((jds.size, len(GRAHAS)))
+        speeds = np.empty((jds.size, len(GRAHAS)))
+        longitudes[:, :n_bodies] = values[:, :n_bodies]
+        speeds[:, :n_bodies] = rates[:, :n_bodies]
+        if sidereal:
+            column = self.ayanamsa_columns[ayanamsa]
+            longitudes[:, :n_bodies] -= values[:, column:column + 1]
+            speeds[:, :n_bodies] -= rates[:, column:column + 1]
+
+        longitudes[:, KETU_INDEX] = longitudes[:, RAHU_INDEX] + 180.0
+        speeds[:, KETU_INDEX] = speeds[:, RAHU_INDEX]
+        return EphemerisPositions(longitudes=longitudes % 360.0, speeds=speeds)
+
+    def close(self):
+        self.coefficients = None
+        self._mmap.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Build a Chebyshev ephemeris table")
+    parser.add_argument("--start", type=int, default=1900, help="First year covered")
+    parser.add_argument("--end", type=int, default=2100, help="Last year covered")
+    parser.add_argument("--segment-days", type=float, default=DEFAULT_SEGMENT_DAYS)
+    parser.add_argument("--degree", type=int, default=DEFAULT_DEGREE)
+    parser.add_argument("--output", required=True, help="Path of the table file to write")
+    args = parser.parse_args()
+    build_table(args.output, args.start, args.end, args.segment_days, args.degree)
@@ -0,0 +1,319 @@
+"""Index of astronomical events: sign ingresses, stations, nakshatra changes and eclipses.
+
+The nine grahas are sampled every ``step_days`` over the indexed range in
+one batched ephemeris call. Every sample interval where a sign or nakshatra
+boundary is crossed, or where the speed changes sign, brackets an event;
+all brackets are then narrowed together by bisection, one batched
+ephemeris call per step (for just the bracketed planet), to well under a
+second. Eclipses come from Swiss
+Ephemeris' own eclipse search.
+
+Events are kept in one structured NumPy array sorted by time (11 bytes an
+event) plus a view per planet, so a query is two binary searches.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import numpy as np
+import swisseph as swe
+from app.core.cache import register_cache
+from app.models.horoscope_schemas import AstroEvent, Planet, ZodiacSign
+from app.services.ephemeris import GRAHAS, EphemerisEngine, get_ephemeris_engine, julian_day, run_ephemeris
+
+logger = logging.getLogger(__name__)
+
+UNIX_EPOCH_JD = 2440587.5
+
+NAKSHATRAS = (
+    "Ashwini", "Bharani", "Krittika", "Rohini", "Mrigashira", "Ardra", "Punarvasu",
+    "Pushya", "Ashlesha", "Magha", "Purva Phalguni", "Uttara Phalguni", "Hasta",
+    "Chitra", "Swati", "Vishakha", "Anuradha", "Jyeshtha", "Mula", "Purva Ashadha",
+    "Uttara Ashadha", "Shravana", "Dhanishta", "Shatabhisha", "Purva Bhadrapada",
+    "Uttara Bhadrapada", "Revati"
+)
+NAKSHATRA_WIDTH = 360.0 / len(NAKSHATRAS)
+
+# Event kinds, stored as their index
+EVENT_KINDS = ("ingress", "nakshatra", "station_retrograde", "station_direct", "solar_eclipse", "lunar_eclipse")
+INGRESS, NAKSHATRA, STATION_RETROGRADE, STATION_DIRECT, SOLAR_ECLIPSE, LUNAR_ECLIPSE = range(len(EVENT_KINDS))
+ECLIPSE_TYPES = ("total", "annular", "hybrid", "partial", "penumbral", "unknown")
+
+# value: the new sign or nakshatra, the sign of a station, or the eclipse type
+EVENT_DTYPE = np.dtype([("jd", "<f8"), ("planet", "u1"), ("kind", "u1"), ("value", "u1")])
+
+# The mean nodes never station
+NODE_INDEXES = (GRAHAS.index("rahu"), GRAHAS.index("ketu"))
+
+
+class EventIndexNotReady(Exception):
+    """Raised when the index is queried before its first build finishes"""
+
+
+def to_julian_day(moment: datetime) -> float:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp() / 86400 + UNIX_EPOCH_JD
+
+
+def from_julian_day(jd: float) -> datetime:
+    return datetime.fromtimestamp((jd - UNIX_EPOCH_JD) * 86400, tz=timezone.utc)
+
+
+class EventIndex:
+    """Sorted array of events between ``start`` and ``end``, built in the background.
+
+    Positions use the Fagan/Bradley ayanamsa, like the current transits.
+    With ``path`` set the built array is saved there and loaded at the next
+    start instead of being rebuilt, as long as it covers the same range.
+    """
+
+    def __init__(
+        self,
+        ephemeris: EphemerisEngine,
+        start: datetime,
+        end: datetime,
+        step_days: float = 0.25,
+        iterations: int = 24,
+        path: Optional[str] = None
+    ):
+        self.ephemeris = ephemeris
+        self.start = start
+        self.end = end
+        self.step_days = step_days
+        self.iterations = iterations
+        self.path = path
+        self.events: Optional[np.ndarray] = None
+        self.by_planet: Dict[int, np.ndarray] = {}
+        self.build_seconds: Optional[float] = None
+        self._build_task: Optional[asyncio.Task] = None
+        self.counters = {"queries": 0}
+
+    @property
+    def ready(self) -> bool:
+        return self.events is not None
+
+    def start_build(self):
+        """Load or build the index on the ephemeris pool without blocking startup"""
+        if self._build_task is None or self._build_task.done():
+            self._build_task = asyncio.get_running_loop().create_task(self._build_in_background())
+
+    async def _build_in_background(self):
+        try:
+            await run_ephemeris(self.load_or_build)
+        except Exception as e:
+            logger.error(f"Error building event index: {str(e)}", exc_info=True)
+
+    def load_or_build(self):
+        start_jd, end_jd = julian_day(self.start), julian_day(self.end)
+        if self._load(start_jd, end_jd):
+            return
+
+        began = time.perf_counter()
+        events = self.build(start_jd, end_jd)
+        self.build_seconds = time.perf_counter() - began
+        self._install(events)
+        logger.info(f"Built event index: {len(events)} events in {self.build_seconds:.1f}s")
+        if self.path:
+            self._save(events, start_jd, end_jd)
+
+    def _load(self, start_jd: float, end_jd: float) -> bool:
+        """Install the saved index if there is one for this range"""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path) as saved:
+                if float(saved["start_jd"]) == start_jd and float(saved["end_jd"]) == end_jd:
+                    self._install(saved["events"])
+                    logger.info(f"Loaded {len(self.events)} events from {self.path}")
+                    return True
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Could not load event index {self.path}: {e}")
+        return False
+
+    def _save(self, events: np.ndarray, start_jd: float, end_jd: float):
+        # Workers starting together may all build; each writes its own
+        # temporary file and the atomic rename makes the last one win
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with tempfile.NamedTemporaryFile(dir=directory, prefix=".event_index.", suffix=".npz", delete=False) as temporary:
+            try:
+                np.savez(temporary, events=events, start_jd=start_jd, end_jd=end_jd)
+            except Exception:
+                os.unlink(temporary.name)
+                raise
+        os.replace(temporary.name, self.path)
+
+    def _install(self, events: np.ndarray):
+        # Per-planet views are built before the swap so a query never sees half an index
+        by_planet = {planet: events[events["planet"] == planet] for planet in range(len(GRAHAS))}
+        self.by_planet = by_planet
+        self.events = events
+
+    def build(self, start_jd: float, end_jd: float) -> np.ndarray:
+        steps = int(np.ceil((end_jd - start_jd) / self.step_days))
+        jds = start_jd + np.arange(steps + 1) * self.step_days
+        positions = self.ephemeris.positions(jds, sidereal=True, ayanamsa=swe.SIDM_FAGAN_BRADLEY)
+        longitudes, speeds = positions.longitudes, positions.speeds
+
+        # Brackets: (sample, planet, kind, boundary longitude or NaN for a station, value)
+        samples: List[np.ndarray] = []
+        planets: List[np.ndarray] = []
+        kinds: List[np.ndarray] = []
+        boundaries: List[np.ndarray] = []
+        values: List[np.ndarray] = []
+
+        unwrapped = np.unwrap(longitudes, period=360.0, axis=0)
+        for kind, width, count in ((INGRESS, 30.0, 12), (NAKSHATRA, NAKSHATRA_WIDTH, len(NAKSHATRAS))):
+            division = np.floor(unwrapped / width).astype(np.int64)
+            sample, planet = np.nonzero(np.diff(division, axis=0))
+            before, after = division[sample, planet], division[sample + 1, planet]
+            samples.append(sample)
+            planets.append(planet)
+            kinds.append(np.full(sample.size, kind))
+            boundaries.append((np.maximum(before, after) * width) % 360.0)
+            values.append(after % count)
+
+        moving = [planet for planet in range(len(GRAHAS)) if planet not in NODE_INDEXES]
+        direction = np.sign(speeds[:, moving])
+        sample, column = np.nonzero(np.diff(direction, axis=0))
+        planet = np.asarray(moving, dtype=np.int64)[column]
+        samples.append(sample)
+        planets.append(planet)
+        kinds.append(np.where(direction[sample + 1, column] < 0, STATION_RETROGRADE, STATION_DIRECT))
+        boundaries.append(np.full(sample.size, np.nan))
+        values.append(np.zeros(sample.size, dtype=np.int64))
+
+        sample = np.concatenate(samples)
+        planet = np.concatenate(planets)
+        kind = np.concatenate(kinds)
+        boundary = np.concatenate(boundaries)
+        value = np.concatenate(values)
+
+        event_jds = self._bisect(jds[sample], jds[sample + 1], planet, boundary)
+
+        # A station's value is the sign it happens in
+        is_station = np.isnan(boundary)
+        if is_station.any():
+            station_longitudes, _ = self.ephemeris.body_positions(
+                event_jds[is_station], planet[is_station], sidereal=True, ayanamsa=swe.SIDM_FAGAN_BRADLEY
+            )
+            value[is_station] = (station_longitudes // 30).astype(np.int64) % 12
+
+        eclipses = self.ephemeris.eclipses(start_jd, end_jd)
+        eclipse_planet = {"solar": GRAHAS.index("sun"), "lunar": GRAHAS.index("moon")}
+        eclipse_kind = {"solar": SOLAR_ECLIPSE, "lunar": LUNAR_ECLIPSE}
+
+        events = np.empty(event_jds.size + len(eclipses), dtype=EVENT_DTYPE)
+        events["jd"][:event_jds.size] = event_jds
+        events["planet"][:event_jds.size] = planet
+        events["kind"][:event_jds.size] = kind
+        events["value"][:event_jds.size] = value
+        for row, (jd, eclipse, eclipse_kind_name) in enumerate(eclipses, start=event_jds.size):
+            events[row] = (jd, eclipse_planet[eclipse], eclipse_kind[eclipse], ECLIPSE_TYPES.index(eclipse_kind_name))
+
+        events = events[(events["jd"] >= start_jd) & (events["jd"] < end_jd)]
+        return events[np.argsort(events["jd"], kind="stable")]
+
+    def _bisect(self, low: np.ndarray, high: np.ndarray, planet: np.ndarray, boundary: np.ndarray) -> np.ndarray:
+        """Narrow every bracket to its event time together, one ephemeris call per step.
+
+        A bracket with a boundary longitude holds a crossing of it; one with
+        NaN holds a zero of the planet's speed.
+        """
+        is_station = np.isnan(boundary)
+
+        def measure(jds: np.ndarray) -> np.ndarray:
+            longitudes, speeds = self.ephemeris.body_positions(
+                jds, planet, sidereal=True, ayanamsa=swe.SIDM_FAGAN_BRADLEY
+            )
+            crossing = (longitudes - boundary + 180.0) % 360.0 - 180.0
+            return np.where(is_station, speeds, crossing)
+
+        if not low.size:
+            return low
+        low_sign = np.sign(measure(low))
+        for _ in range(self.iterations):
+            middle = (low + high) / 2
+            same = np.sign(measure(middle)) == low_sign
+            low = np.where(same, middle, low)
+            high = np.where(same, high, middle)
+        return (low + high) / 2
+
+    def query(
+        self,
+        start: datetime,
+        end: datetime,
+        planet: Optional[Planet] = None,
+        kind: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[AstroEvent]:
+        """Events from ``start`` (inclusive) to ``end`` (exclusive), optionally for one planet or kind"""
+        if not self.ready:
+            raise EventIndexNotReady("The event index is still being built")
+        self.counters["queries"] += 1
+        events = self.events if planet is None else self.by_planet[GRAHAS.index(planet.value)]
+        low, high = np.searchsorted(events["jd"], [to_julian_day(start), to_julian_day(end)])
+        selected = events[low:high]
+        if kind is not None:
+            selected = selected[selected["kind"] == EVENT_KINDS.index(kind)]
+        if limit is not None:
+            selected = selected[:limit]
+        return [self.describe(event) for event in selected]
+
+    def describe(self, event: np.void) -> AstroEvent:
+        kind = int(event["kind"])
+        value = int(event["value"])
+        described = {
+            "time": from_julian_day(float(event["jd"])),
+            "planet": Planet(GRAHAS[int(event["planet"])]),
+            "event": EVENT_KINDS[kind],
+        }
+        if kind == NAKSHATRA:
+            described["nakshatra"] = NAKSHATRAS[value]
+        elif kind in (SOLAR_ECLIPSE, LUNAR_ECLIPSE):
+            described["eclipse_type"] = ECLIPSE_TYPES[value]
+        else:
+            described["zodiac_sign"] = list(ZodiacSign)[value]
+        return AstroEvent(**described)
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        return self.start <= start and end <= self.end
+
+    def stats(self) -> Dict:
+        return {
+            **self.counters,
+            "ready": self.ready,
+            "events": 0 if self.events is None else len(self.events),
+            "bytes": 0 if self.events is None else int(self.events.nbytes),
+            "build_seconds": self.build_seconds,
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat()
+        }
+
+
+_event_index: Optional[EventIndex] = None
+
+
+def get_event_index() -> EventIndex:
+    """Return the process-wide event index.
+
+    EVENT_INDEX_START_YEAR and EVENT_INDEX_END_YEAR (exclusive) set the
+    indexed range, by default last year to five years ahead;
+    EVENT_INDEX_PATH saves the built index for the next start.
+    """
+    global _event_index
+    if _event_index is None:
+        this_year = datetime.now(timezone.utc).year
+        start_year = int(os.getenv("EVENT_INDEX_START_YEAR", str(this_year - 1)))
+        end_year = int(os.getenv("EVENT_INDEX_END_YEAR", str(this_year + 5)))
+        _event_index = EventIndex(
+            get_ephemeris_engine(),
+            start=datetime(start_year, 1, 1, tzinfo=timezone.utc),
+            end=datetime(end_year, 1, 1, tzinfo=timezone.utc),
+            path=os.getenv("EVENT_INDEX_PATH")
+        )
+        register_cache("event_index", _event_index)
+    return _event_index
@@ -0,0 +1,249 @@
+"""Offline gazetteer for resolving "city, country" to coordinates without the network.
+
+Entries are kept in one sorted array of normalized ``"city, cc"`` keys (cc is
+the ISO country code) with parallel coordinate arrays, so exact and prefix
+lookups are a binary search. Two TSV layouts are accepted:
+
+* GeoNames dumps such as ``cities15000.txt`` (19 columns; name, ascii name,
+  latitude, longitude, country code and population are used). Names of
+  common countries ("India", "United States", ...) resolve to their codes
+  out of the box; point GAZETTEER_COUNTRY_INFO at GeoNames'
+  ``countryInfo.txt`` for every other country name.
+* A compact ``city<TAB>country<TAB>latitude<TAB>longitude`` file.
+
+Set GAZETTEER_PATH to the file to load. Without it the bundled
+``app/data/major_cities.tsv`` (about a hundred major Indian and world cities,
+compact layout) is used, so only other places go to the online geocoder.
+"""
+import bisect
+import logging
+import os
+import re
+import unicodedata
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "major_cities.tsv")
+
+# English names of the countries users most often give, so GeoNames dumps
+# (keyed by ISO code) resolve them without countryInfo.txt
+COUNTRY_NAMES = {
+    "india": "in",
+    "nepal": "np",
+    "sri lanka": "lk",
+    "bangladesh": "bd",
+    "pakistan": "pk",
+    "bhutan": "bt",
+    "maldives": "mv",
+    "afghanistan": "af",
+    "myanmar": "mm",
+    "thailand": "th",
+    "malaysia": "my",
+    "singapore": "sg",
+    "indonesia": "id",
+    "philippines": "ph",
+    "vietnam": "vn",
+    "china": "cn",
+    "hong kong": "hk",
+    "taiwan": "tw",
+    "japan": "jp",
+    "united arab emirates": "ae",
+    "saudi arabia": "sa",
+    "qatar": "qa",
+    "kuwait": "kw",
+    "oman": "om",
+    "bahrain": "bh",
+    "iran": "ir",
+    "israel": "il",
+    "turkey": "tr",
+    "egypt": "eg",
+    "south africa": "za",
+    "kenya": "ke",
+    "nigeria": "ng",
+    "mauritius": "mu",
+    "united states": "us",
+    "canada": "ca",
+    "mexico": "mx",
+    "brazil": "br",
+    "argentina": "ar",
+    "trinidad and tobago": "tt",
+    "guyana": "gy",
+    "fiji": "fj",
+    "united kingdom": "gb",
+    "ireland": "ie",
+    "france": "fr",
+    "germany": "de",
+    "netherlands": "nl",
+    "belgium": "be",
+    "switzerland": "ch",
+    "austria": "at",
+    "italy": "it",
+    "spain": "es",
+    "portugal": "pt",
+    "sweden": "se",
+    "norway": "no",
+    "denmark": "dk",
+    "finland": "fi",
+    "poland": "pl",
+    "ukraine": "ua",
+    "australia": "au",
+    "new zealand": "nz",
+}
+
+# Common spellings not covered by countryInfo.txt
+COUNTRY_ALIASES = {
+    "usa": "us",
+    "united states of america": "us",
+    "america": "us",
+    "uk": "gb",
+    "england": "gb",
+    "great britain": "gb",
+    "uae": "ae",
+    "russia": "ru",
+    "south korea": "kr",
+    "bharat": "in",
+    "hindustan": "in",
+}
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and punctuation, and collapse whitespace"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s-]", " ", text.lower())
+    return " ".join(text.split())
+
+
+class Gazetteer:
+    def __init__(self, country_names: Optional[Dict[str, str]] = None):
+        self.country_names: Dict[str, str] = {**COUNTRY_NAMES, **COUNTRY_ALIASES}
+        if country_names:
+            self.country_names.update(country_names)
+        self._keys: List[str] = []
+        self._latitudes = array("d")
+        self._longitudes = array("d")
+        self._populations = array("q")
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def country_code(self, country: str) -> str:
+        """Resolve a country name or code to the code used in keys"""
+        normalized = normalize(country)
+        return self.country_names.get(normalized, normalized)
+
+    def make_key(self, city: str, country: str) -> str:
+        return f"{normalize(city)}, {self.country_code(country)}"
+
+    def build(self, entries: Iterable[Tuple[str, str, float, float, int]]):
+        """Index (city, country, latitude, longitude, population) entries.
+
+        When several entries share a key the most populous one wins.
+        """
+        best: Dict[str, Tuple[float, float, int]] = {}
+        for city, country, latitude, longitude, population in entries:
+            key = self.make_key(city, country)
+            if key not in best or population > best[key][2]:
+                best[key] = (latitude, longitude, population)
+
+        self._keys = sorted(best)
+        self._latitudes = array("d", (best[key][0] for key in self._keys))
+        self._longitudes = array("d", (best[key][1] for key in self._keys))
+        self._populations = array("q", (best[key][2] for key in self._keys))
+        logger.info(f"Gazetteer indexed {len(self._keys)} places")
+
+    def lookup(self, city: str, country: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        """Exact lookup; without a country the most populous city of that name is returned"""
+        if country:
+            key = self.make_key(city, country)
+            index = bisect.bisect_left(self._keys, key)
+            if index < len(self._keys) and self._keys[index] == key:
+                return self._latitudes[index], self._longitudes[index]
+            return None
+
+        start, end = self._prefix_range(f"{normalize(city)}, ")
+        if start == end:
+            return None
+        index = max(range(start, end), key=lambda i: self._populations[i])
+        return self._latitudes[index], self._longitudes[index]
+
+    def prefix(self, query: str, limit: int = 10) -> List[Tuple[str, float, float]]:
+        """Places whose normalized "city, cc" key starts with the normalized query"""
+        start, end = self._prefix_range(normalize(query))
+        end = min(end, start + limit)
+        return [
+            (self._keys[i], self._latitudes[i], self._longitudes[i])
+            for i in range(start, end)
+        ]
+
+    def _prefix_range(self, prefix: str) -> Tuple[int, int]:
+        start = bisect.bisect_left(self._keys, prefix)
+        # Every key with this prefix sorts below prefix followed by the highest code point
+        end = bisect.bisect_left(self._keys, prefix + "\U0010ffff", lo=start)
+        return start, end
+
+
+def load_country_info(path: str) -> Dict[str, str]:
+    """Map normalized country names to ISO codes from GeoNames countryInfo.txt"""
+    names = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) > 4:
+                names[normalize(fields[4])] = fields[0].lower()
+                names[normalize(fields[1])] = fields[0].lower()  # ISO3
+    return names
+
+
+def read_entries(path: str) -> Iterable[Tuple[str, str, float, float, int]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            try:
+                if len(fields) >= 15:
+                    # GeoNames: index both the local and the ASCII name
+                    latitude, longitude = float(fields[4]), float(fields[5])
+                    population = int(fields[14] or 0)
+                    yield fields[1], fields[8], latitude, longitude, population
+                    if fields[2] and fields[2] != fields[1]:
+                        yield fields[2], fields[8], latitude, longitude, population
+                elif len(fields) >= 4:
+                    yield fields[0], fields[1], float(fields[2]), float(fields[3]), 0
+            except ValueError:
+                logger.warning(f"Skipping malformed gazetteer line: {line.strip()[:80]}")
+
+
+def load_gazetteer(path: str, country_info_path: Optional[str] = None) -> Gazetteer:
+    gazetteer = Gazetteer(load_country_info(country_info_path) if country_info_path else None)
+    gazetteer.build(read_entries(path))
+    return gazetteer
+
+
+_gazetteer: Optional[Gazetteer] = None
+
+
+def get_gazetteer() -> Gazetteer:
+    """Return the process-wide gazetteer, from GAZETTEER_PATH or else the bundled major cities"""
+    global _gazetteer
+    if _gazetteer is None:
+        path = os.getenv("GAZETTEER_PATH")
+        if not path:
+            logger.warning(
+                "GAZETTEER_PATH is not set; only the bundled major cities resolve offline, "
+                "other places are looked up online"
+            )
+            path = DEFAULT_GAZETTEER_PATH
+        gazetteer = Gazetteer()
+        try:
+            gazetteer = load_gazetteer(path, os.getenv("GAZETTEER_COUNTRY_INFO"))
+            logger.info(f"Loaded {len(gazetteer)} gazetteer entries from {path}")
+        except OSError as e:
+            logger.error(f"Could not load gazetteer {path}: {e}")
+        _gazetteer = gazetteer
+    return _gazetteer
@@ -0,0 +1,150 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Optional, Tuple
+from geopy.geocoders import Nominatim
+from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
+from app.core.cache import MISSING, LRUCache, SQLiteCache, TieredCache, register_cache
+from app.services.gazetteer import Gazetteer, get_gazetteer
+
+logger = logging.getLogger(__name__)
+
+
+class Geocoder:
+    """Shared place resolver: offline gazetteer, then a result cache, then Nominatim.
+
+    Found coordinates are cached for ``ttl`` seconds and places Nominatim
+    does not know for ``negative_ttl`` seconds, so misses are not retried on
+    every request. Concurrent lookups of the same place wait for a single
+    Nominatim call. Network errors are raised, never cached.
+    """
+
+    def __init__(
+        self,
+        gazetteer: Gazetteer,
+        cache: TieredCache,
+        ttl: float = 30 * 24 * 3600,
+        negative_ttl: float = 3600,
+        max_retries: int = 3
+    ):
+        self.gazetteer = gazetteer
+        self.cache = cache
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_retries = max_retries
+        self.geolocator = Nominatim(user_agent="kundali_generator")
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.counters = {
+            "gazetteer_hits": 0,
+            "cache_hits": 0,
+            "negative_hits": 0,
+            "coalesced": 0,
+            "nominatim_calls": 0,
+            "nominatim_misses": 0,
+        }
+
+    def resolve(self, city: str, country: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        """Return (latitude, longitude), or None if the place is unknown"""
+        coordinates = self.gazetteer.lookup(city, country)
+        if coordinates:
+            self.counters["gazetteer_hits"] += 1
+            return coordinates
+
+        key = self.gazetteer.make_key(city, country or "")
+        cached = self.cache.get(key)
+        if cached is not MISSING:
+            if cached is None:
+                self.counters["negative_hits"] += 1
+                return None
+            self.counters["cache_hits"] += 1
+            return cached[0], cached[1]
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self.counters["coalesced"] += 1
+        if not owner:
+            return future.result()
+
+        try:
+            # Another thread may have finished the same lookup in the meantime
+            cached = self.cache.get(key)
+            if cached is not MISSING:
+                coordinates = None if cached is None else (cached[0], cached[1])
+                future.set_result(coordinates)
+                return coordinates
+
+            coordinates = self._query_nominatim(f"{city}, {country}" if country else city)
+            if coordinates is None:
+                self.cache.set(key, None, ttl=self.negative_ttl)
+            else:
+                self.cache.set(key, list(coordinates), ttl=self.ttl)
+            future.set_result(coordinates)
+            return coordinates
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _query_nominatim(self, query: str) -> Optional[Tuple[float, float]]:
+        for attempt in range(self.max_retries):
+            try:
+                self.counters["nominatim_calls"] += 1
+                location = self.geolocator.geocode(query)
+                if location:
+                    return location.latitude, location.longitude
+                self.counters["nominatim_misses"] += 1
+                logger.warning(f"Could not find coordinates for {query}")
+                return None
+            except (GeocoderTimedOut, GeocoderUnavailable):
+                if attempt == self.max_retries - 1:
+                    raise
+                time.sleep(2)  # Wait before retrying
+
+    def stats(self) -> Dict:
+        lookups = sum(
+            self.counters[name] for name in ("gazetteer_hits", "cache_hits", "negative_hits", "coalesced")
+        ) + self.counters["nominatim_calls"]
+        served_locally = lookups - self.counters["nominatim_calls"]
+        return {
+            **self.counters,
+            "hit_ratio": served_locally / lookups if lookups else 0.0,
+            "cache": self.cache.stats()
+        }
+
+
+_geocoder: Optional[Geocoder] = None
+_geocoder_lock = threading.Lock()
+
+
+def get_geocoder() -> Geocoder:
+    """Return the process-wide geocoder.
+
+    GEOCODE_CACHE_DB adds a SQLite tier shared by all workers; GEOCODE_TTL
+    and GEOCODE_NEGATIVE_TTL set how long found and unknown places are kept.
+    """
+    global _geocoder
+    with _geocoder_lock:
+        if _geocoder is None:
+            db_path = os.getenv("GEOCODE_CACHE_DB")
+            cache = TieredCache(
+                LRUCache(maxsize=int(os.getenv("GEOCODE_CACHE_SIZE", "5000"))),
+                SQLiteCache(db_path, table="geocode") if db_path else None
+            )
+            _geocoder = Geocoder(
+                get_gazetteer(),
+                cache,
+                ttl=float(os.getenv("GEOCODE_TTL", str(30 * 24 * 3600))),
+                negative_ttl=float(os.getenv("GEOCODE_NEGATIVE_TTL", "3600"))
+            )
+            register_cache("geocode", _geocoder)
+    return _geocoder
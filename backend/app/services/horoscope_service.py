@@ -1,22 +1,53 @@
 import swisseph as swe
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 from app.models.horoscope_schemas import (
     ZodiacSign, TimeFrame, Planet, TransitInfo,
-    HoroscopePrediction, NatalChart, BirthDetails
+    HoroscopePrediction, NatalChart, BirthDetails, TransitWindow
 )
+from app.services.ephemeris import (
+    GRAHAS, get_ephemeris_engine,
+    julian_day as ephemeris_julian_day,
+    julian_days as ephemeris_julian_days
+)
+from app.core.cache import MISSING, LRUCache
+from app.services.natal_cache import get_natal_cache
+from app.services.aspects import AspectTable, aspect_matrix, find_aspects, get_aspect_table
+from app.services.transit_windows import get_transit_windows
+from app.services.geocoder import get_geocoder
+import numpy as np
 import random
 import logging
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
+from geopy.exc import GeocoderServiceError
 
 logger = logging.getLogger(__name__)
 
+PREDICTION_CATEGORIES = ("general", "career", "love", "health", "finances")
+
+WINDOW_LABELS = {
+    TimeFrame.WEEKLY: "This week",
+    TimeFrame.MONTHLY: "This month",
+    TimeFrame.YEARLY: "This year",
+}
+
+# Transits have always been reported against Fagan/Bradley and natal charts
+# against Lahiri; transits are moved to the natal ayanamsa before the two are
+# compared (the ayanamsas are about 0.88 degrees apart)
+TRANSIT_AYANAMSA = swe.SIDM_FAGAN_BRADLEY
+NATAL_AYANAMSA = swe.SIDM_LAHIRI
+
+# Transiting planets this close together are reported as conjunct
+TRANSIT_CONJUNCTIONS = AspectTable({"conjunction": (0, 8)})
+
+
 class HoroscopeService:
     def __init__(self):
-        # Initialize Swiss Ephemeris and geocoder
-        swe.set_ephe_path()
-        self.geolocator = Nominatim(user_agent="horoscope_app")
+        # Shared geocoder; Swiss Ephemeris is set up once by the shared engine
+        self.geocoder = get_geocoder()
+        self.ephemeris = get_ephemeris_engine()
+        self.natal_cache = get_natal_cache()
+        # TRANSIT_AYANAMSA -> NATAL_AYANAMSA offsets per UTC day
+        self.ayanamsa_offsets = LRUCache(maxsize=64)
         
         # Planet to Swiss Ephemeris constant mapping
         self.planet_map = {
@@ -30,71 +61,45 @@ class HoroscopeService:
             Planet.RAHU: swe.MEAN_NODE,  # North Node
         }
 
-    def calculate_current_transits(self) -> List[TransitInfo]:
-        """Calculate current planetary positions"""
+    def calculate_current_transits(self, moment: Optional[datetime] = None) -> List[TransitInfo]:
+        """Calculate planetary positions now, or at ``moment`` (UTC) when given"""
         try:
-            # Reset to tropical mode for transit calculations
-            swe.set_sid_mode(swe.SIDM_FAGAN_BRADLEY)
-            
-            current_time = datetime.now(timezone.utc)
-            julian_day = swe.julday(
-                current_time.year,
-                current_time.month,
-                current_time.day,
-                current_time.hour + current_time.minute/60.0
-            )
+            current_time = moment or datetime.now(timezone.utc)
+            julian_day = ephemeris_julian_day(current_time)
             logger.debug(f"Calculating transits for JD: {julian_day}")
-            
-            transits = []
-            for planet, swe_planet in self.planet_map.items():
-                try:
-                    flags = swe.FLG_SIDEREAL | swe.FLG_SPEED
-                    position = swe.calc_ut(julian_day, swe_planet, flags)
-                    longitude = position[0][0]
-                    is_retrograde = position[0][3] < 0
-                    
-                    zodiac_sign = self.get_zodiac_sign(longitude)
-                    house = self.get_house_number(longitude)
-                    degree = longitude % 30
-                    
-                    transit = TransitInfo(
-                        planet=planet,
-                        zodiac_sign=zodiac_sign,
-                        house=house,
-                        degree=degree,
-                        is_retrograde=is_retrograde
-                    )
-                    transits.append(transit)
-                    
-                    logger.debug(f"Transit calculated - {planet.value}: {zodiac_sign.value} {degree:.2f}°{' (R)' if is_retrograde else ''}")
-                except swe.Error as e:
-                    logger.error(f"Error calculating transit for {planet}: {e}")
-                    continue
-            
-            # Calculate Ketu transit
-            rahu_transit = next((t for t in transits if t.planet == Planet.RAHU), None)
-            if rahu_transit:
-                # Calculate Ketu's position (opposite to Rahu)
-                ketu_longitude = (self.get_zodiac_degrees(rahu_transit.zodiac_sign) + rahu_transit.degree + 180) % 360
-                ketu_sign = self.get_zodiac_sign(ketu_longitude)
-                ketu_house = self.get_house_number(ketu_longitude)
-                ketu_degree = ketu_longitude % 30
-                
-                transits.append(TransitInfo(
-                    planet=Planet.KETU,
-                    zodiac_sign=ketu_sign,
-                    house=ketu_house,
-                    degree=ketu_degree,
-                    is_retrograde=rahu_transit.is_retrograde
-                ))
-                logger.debug(f"Ketu transit calculated: {ketu_sign.value} {ketu_degree:.2f}°")
-            
-            return transits
-            
+
+            positions = self.ephemeris.positions(
+                [julian_day],
+                sidereal=True,
+                ayanamsa=TRANSIT_AYANAMSA
+            )
+            return self.build_transits(positions.longitudes[0], positions.speeds[0])
+
         except Exception as e:
             logger.error(f"Error in calculate_current_transits: {str(e)}", exc_info=True)
             raise
 
+    def build_transits(self, longitudes: np.ndarray, speeds: np.ndarray) -> List[TransitInfo]:
+        """Build TransitInfo objects from one row of ephemeris longitudes and speeds"""
+        transits = []
+        for index, planet_name in enumerate(GRAHAS):
+            longitude = longitudes[index]
+            if np.isnan(longitude):
+                continue
+            planet = Planet(planet_name)
+            transit = TransitInfo(
+                planet=planet,
+                zodiac_sign=self.get_zodiac_sign(longitude),
+                house=self.get_house_number(longitude),
+                degree=longitude % 30,
+                is_retrograde=bool(speeds[index] < 0),
+                longitude=float(longitude),
+                speed=float(speeds[index])
+            )
+            transits.append(transit)
+            logger.debug(f"Transit calculated - {planet.value}: {transit.zodiac_sign.value} {transit.degree:.2f}°{' (R)' if transit.is_retrograde else ''}")
+        return transits
+
     def get_zodiac_sign(self, longitude: float) -> ZodiacSign:
         """Get zodiac sign from longitude"""
         sign_index = int((longitude / 30) % 12)
@@ -123,111 +128,84 @@ class HoroscopeService:
         }
         return house_meanings.get(house_number, "unknown area")
 
-    def calculate_aspects(self, natal_pos: float, transit_pos: float) -> Optional[str]:
-        """Calculate aspects between positions"""
-        try:
-            angle = abs(transit_pos - natal_pos) % 360
-            if angle > 180:
-                angle = 360 - angle
-                
-            aspects = {
-                0: ("conjunction", 10),
-                60: ("sextile", 6),
-                90: ("square", 8),
-                120: ("trine", 10),
-                180: ("opposition", 10)
-            }
-            
-            for target_angle, (aspect_name, orb) in aspects.items():
-                if abs(angle - target_angle) <= orb:
-                    return aspect_name
-                    
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error calculating aspects: {str(e)}")
-            return None
+    def calculate_aspects(self, natal_pos: float, transit_pos: float, moment: Optional[datetime] = None) -> Optional[str]:
+        """Calculate the aspect between a natal and a transit longitude (at ``moment``, default now), each in its own ayanamsa"""
+        transit_pos = (transit_pos + self.natal_ayanamsa_offset(moment)) % 360.0
+        aspects = find_aspects([natal_pos], [transit_pos], table=get_aspect_table())
+        return aspects[0].aspect if aspects else None
+
+    def natal_ayanamsa_offset(self, moment: Optional[datetime] = None) -> float:
+        """Degrees to add to a transit longitude at ``moment`` (default now) to measure it against NATAL_AYANAMSA"""
+        julian_day = ephemeris_julian_day(moment or datetime.now(timezone.utc))
+        # The offset drifts by far less than a millionth of a degree a day, so keep one per UTC day
+        key = int(julian_day + 0.5)
+        offset = self.ayanamsa_offsets.get(key)
+        if offset is MISSING:
+            offset = self.ephemeris.ayanamsa_offset(julian_day, TRANSIT_AYANAMSA, NATAL_AYANAMSA)
+            self.ayanamsa_offsets.set(key, offset)
+        return offset
+
+    def transit_longitude(self, transit: TransitInfo) -> float:
+        if transit.longitude is not None:
+            return transit.longitude
+        return self.get_zodiac_degrees(transit.zodiac_sign) + transit.degree
 
     def calculate_natal_positions(self, birth_date: datetime) -> Dict[Planet, float]:
         """Calculate planetary positions at birth"""
         try:
             logger.debug(f"Calculating natal positions for birth date: {birth_date}")
-            
-            # Convert birth_date to Julian Day
-            julian_day = swe.julday(
-                birth_date.year,
-                birth_date.month,
-                birth_date.day,
-                birth_date.hour + birth_date.minute/60.0
-            )
-            logger.debug(f"Birth date Julian Day: {julian_day}")
-            
-            # Set sidereal mode for natal calculations
-            swe.set_sid_mode(swe.SIDM_LAHIRI)
-            
-            positions = {}
-            for planet, swe_planet in self.planet_map.items():
-                try:
-                    # Calculate position for birth time
-                    flags = swe.FLG_SIDEREAL | swe.FLG_SPEED
-                    position = swe.calc_ut(julian_day, swe_planet, flags)
-                    positions[planet] = position[0][0]  # Get longitude
-                    is_retrograde = position[0][3] < 0
-                    logger.debug(f"Natal {planet.value}: {positions[planet]:.2f}° {'(R)' if is_retrograde else ''}")
-                except swe.Error as e:
-                    logger.error(f"Error calculating natal position for {planet}: {e}")
-                    continue
-            
-            # Calculate Ketu (opposite to Rahu)
-            if Planet.RAHU in positions:
-                positions[Planet.KETU] = (positions[Planet.RAHU] + 180) % 360
-                logger.debug(f"Natal Ketu: {positions[Planet.KETU]:.2f}°")
-            
+
+            longitudes = self.calculate_natal_positions_batch([birth_date])[0]
+            positions = {
+                Planet(planet_name): float(longitude)
+                for planet_name, longitude in zip(GRAHAS, longitudes)
+                if not np.isnan(longitude)
+            }
+            for planet, longitude in positions.items():
+                logger.debug(f"Natal {planet.value}: {longitude:.2f}°")
+
             return positions
-            
+
         except Exception as e:
             logger.error(f"Error in calculate_natal_positions: {str(e)}", exc_info=True)
             raise
 
+    def calculate_natal_positions_batch(self, birth_dates: List[datetime]) -> np.ndarray:
+        """Calculate sidereal (Lahiri) natal longitudes as an N x 9 array ordered as GRAHAS"""
+        julian_days = ephemeris_julian_days(birth_dates)
+        positions = self.ephemeris.positions(
+            julian_days,
+            sidereal=True,
+            ayanamsa=NATAL_AYANAMSA
+        )
+        return positions.longitudes
+
     def get_coordinates(self, city: str, country: str) -> Tuple[float, float]:
         """Get latitude and longitude from city and country"""
         try:
-            location = self.geolocator.geocode(f"{city}, {country}")
-            if location:
-                return location.latitude, location.longitude
+            coordinates = self.geocoder.resolve(city, country)
+            if coordinates:
+                return coordinates
             else:
                 logger.warning(f"Could not find coordinates for {city}, {country}")
                 return 0.0, 0.0
-        except (GeocoderTimedOut, GeocoderUnavailable) as e:
+        except GeocoderServiceError as e:
             logger.error(f"Geocoding error: {str(e)}")
             return 0.0, 0.0
 
     def calculate_ascendant(self, birth_date: datetime, city: str, country: str) -> float:
         """Calculate the ascendant degree for a given birth time and location"""
         try:
-            julian_day = swe.julday(
-                birth_date.year,
-                birth_date.month,
-                birth_date.day,
-                birth_date.hour + birth_date.minute/60.0
-            )
+            julian_day = ephemeris_julian_day(birth_date)
             
             # Get coordinates for the birth location
             latitude, longitude = self.get_coordinates(city, country)
             logger.debug(f"Coordinates for {city}, {country}: {latitude}, {longitude}")
             
-            # Using Lahiri ayanamsa for sidereal calculations
-            swe.set_sid_mode(swe.SIDM_LAHIRI)
-            
-            # Calculate houses using actual coordinates
-            houses = swe.houses_ex(
-                julian_day,
-                latitude,
-                longitude,
-                b'P'  # Placidus house system
-            )
+            # Calculate houses using actual coordinates (Placidus, tropical)
+            _, ascendants = self.ephemeris.houses([julian_day], latitude, longitude, b'P')
             
-            ascendant = houses[0][0]
+            ascendant = float(ascendants[0])
             logger.debug(f"Calculated ascendant: {ascendant:.2f}°")
             return ascendant
             
@@ -239,128 +217,230 @@ class HoroscopeService:
         self,
         time_frame: TimeFrame,
         birth_details: Optional[BirthDetails] = None,
-        transits: Optional[List[TransitInfo]] = None
+        transits: Optional[List[TransitInfo]] = None,
+        moment: Optional[datetime] = None
     ) -> HoroscopePrediction:
         """Generate horoscope prediction with natal chart if birth details are provided"""
+        logger.info(f"Birth details received: {birth_details}")
+        return self.generate_predictions(time_frame, [birth_details], transits, moment)[0]
+
+    def generate_predictions(
+        self,
+        time_frame: TimeFrame,
+        birth_details_list: List[Optional[BirthDetails]],
+        transits: Optional[Sequence[TransitInfo]] = None,
+        moment: Optional[datetime] = None
+    ) -> List[HoroscopePrediction]:
+        """Generate one prediction per birth details (None for a transit-only one).
+
+        The transit text is built once for the whole batch, natal charts come
+        from one ephemeris pass and the aspects of every transit to every
+        natal planet of every user are evaluated as one (N, transits, 9)
+        matrix. ``moment`` is the time ``transits`` were calculated for
+        (default now); without ``transits`` the current snapshot is used.
+        """
         try:
-            # logger.info(f"Generating prediction for zodiac: {zodiac_sign}, timeframe: {time_frame}")
-            logger.info(f"Birth details received: {birth_details}")
-            
             if transits is None:
-                transits = self.calculate_current_transits()
-
-            predictions = {
-                "general": [],
-                "career": [],
-                "love": [],
-                "health": [],
-                "finances": []
-            }
-            
-            # Calculate natal positions if birth details are provided
-            natal_positions = None
-            natal_chart = None
-            if birth_details:
-                logger.info("Processing birth details...")
-                birth_date = datetime(
-                    year=birth_details.year,
-                    month=birth_details.month,
-                    day=birth_details.day,
-                    hour=birth_details.hour,
-                    minute=birth_details.minute,
-                    tzinfo=timezone.utc  # Ensure UTC timezone
-                )
-                logger.info(f"Created birth_date: {birth_date}")
-                
-                # Calculate natal positions
-                natal_positions = self.calculate_natal_positions(birth_date)
-                logger.info(f"Calculated natal positions: {natal_positions}")
-                
-                # Calculate ascendant
-                ascendant_degree = self.calculate_ascendant(
-                    birth_date,
-                    birth_details.city,
-                    birth_details.country
-                )
-                logger.info(f"Calculated ascendant: {ascendant_degree}")
-                
-                natal_chart = NatalChart(
-                    ascendant=ascendant_degree,
-                    ascendant_sign=self.get_zodiac_sign(ascendant_degree),
-                    planet_positions=natal_positions,
-                    house_positions={
-                        planet: self.get_house_number(pos) 
-                        for planet, pos in natal_positions.items()
-                    }
-                )
-                logger.info(f"Created natal chart: {natal_chart}")
-            else:
-                logger.info("No birth details provided")
+                from app.services.transit_snapshot import get_transit_snapshot
+                snapshot = get_transit_snapshot().snapshot()
+                transits, moment = snapshot.transits, snapshot.computed_for
+
+            transits = list(transits)
+            table = get_aspect_table()
+            transit_longitudes = np.array([self.transit_longitude(transit) for transit in transits], dtype=np.float64)
+            transit_speeds = np.array([transit.speed or 0.0 for transit in transits], dtype=np.float64)
+
+            # Conjunctions between transiting planets, across sign boundaries too
+            conjunct = aspect_matrix(transit_longitudes, transit_longitudes, table=TRANSIT_CONJUNCTIONS).aspect >= 0
+            np.fill_diagonal(conjunct, False)
 
-            # Process each transit
-            for transit in transits:
+            # Per transit: the text around the natal aspects, and its categories
+            lines = []
+            for column, transit in enumerate(transits):
                 base_prediction = f"Transiting {transit.planet.value} in {transit.zodiac_sign.value} ({transit.house}th house)"
-                
-                # Check for conjunctions with other transiting planets
-                conjunctions = []
-                for other_transit in transits:
-                    if transit.planet != other_transit.planet:
-                        if (transit.zodiac_sign == other_transit.zodiac_sign and 
-                            abs(transit.degree - other_transit.degree) <= 8):
-                            conjunctions.append(other_transit.planet.value)
-                
+
+                conjunctions = [transits[other].planet.value for other in np.flatnonzero(conjunct[column])]
                 if conjunctions:
                     base_prediction += f" conjunct {', '.join(conjunctions)}"
-                
-                # Add natal aspects if available
-                if natal_positions and transit.planet in natal_positions:
-                    natal_pos = natal_positions[transit.planet]
-                    aspect = self.calculate_aspects(natal_pos, transit.degree)
-                    if aspect:
-                        base_prediction += f" is {aspect} your natal {transit.planet.value}"
-                
+
                 # Add interpretation based on house placement
-                house_meaning = self.get_house_meaning(transit.house)
-                base_prediction += f", affecting {house_meaning}"
-                
+                ending = f", affecting {self.get_house_meaning(transit.house)}"
+
                 # Add retrograde status if applicable
                 if transit.is_retrograde:
-                    base_prediction += " (retrograde)"
-                
-                # Categorize prediction
-                if transit.house in [2, 8]:
-                    predictions["finances"].append(base_prediction)
-                elif transit.house in [6, 12]:
-                    predictions["health"].append(base_prediction)
-                elif transit.house in [5, 7]:
-                    predictions["love"].append(base_prediction)
-                elif transit.house in [1, 10]:
-                    predictions["career"].append(base_prediction)
-                predictions["general"].append(base_prediction)
-            
-            # Combine predictions
-            final_predictions = {
-                category: ". ".join(pred_list) if pred_list else f"No significant {category} transits at this time"
-                for category, pred_list in predictions.items()
-            }
-            
-            return HoroscopePrediction(
-                general=final_predictions["general"],
-                career=final_predictions["career"],
-                love=final_predictions["love"],
-                health=final_predictions["health"],
-                finances=final_predictions["finances"],
-                lucky_number=random.randint(1, 9),
-                lucky_color=random.choice(["Blue", "Red", "Green", "Yellow"]),
-                transits=transits,
-                natal_chart=natal_chart,
-                timestamp=datetime.now(timezone.utc)
+                    ending += " (retrograde)"
+
+                lines.append((base_prediction, ending, self.get_categories(transit.house)))
+
+            # Weekly, monthly and yearly horoscopes also cover the events of their window
+            time_frame = TimeFrame(time_frame)
+            window = None
+            if time_frame != TimeFrame.DAILY:
+                window = get_transit_windows().get(time_frame)
+
+            natal_charts, natal_longitudes = self.calculate_natal_charts(birth_details_list)
+
+            # Every transit against every natal planet of every chart: (N, transits, 9),
+            # both measured against the natal ayanamsa
+            aspects = aspect_matrix(
+                ((transit_longitudes + self.natal_ayanamsa_offset(moment)) % 360.0)[np.newaxis, :],
+                natal_longitudes,
+                speeds_a=transit_speeds[np.newaxis, :],
+                table=table
             )
-            
+            aspect_phrases = {
+                (aspect, applying, natal): f"{table.names[aspect]} your natal {GRAHAS[natal]} ({'applying' if applying else 'separating'})"
+                for aspect in range(len(table.names))
+                for applying in (False, True)
+                for natal in range(len(GRAHAS))
+            }
+            natal_aspects: List[Dict[int, List[str]]] = [{} for _ in birth_details_list]
+            found = aspects.aspect >= 0
+            for row, column, natal in zip(*np.nonzero(found)):
+                natal_aspects[row].setdefault(column, []).append(aspect_phrases[
+                    (aspects.aspect[row, column, natal], bool(aspects.applying[row, column, natal]), natal)
+                ])
+
+            timestamp = datetime.now(timezone.utc)
+            results = []
+            for natal_chart, chart_aspects in zip(natal_charts, natal_aspects):
+                predictions = {category: [] for category in PREDICTION_CATEGORIES}
+                for column, (base_prediction, ending, categories) in enumerate(lines):
+                    line = base_prediction
+                    if column in chart_aspects:
+                        line += f" is {', '.join(chart_aspects[column])}"
+                    line += ending
+                    for category in categories:
+                        predictions[category].append(line)
+
+                if window is not None:
+                    predictions["general"].append(self.describe_window(window))
+
+                # Combine predictions
+                final_predictions = {
+                    category: ". ".join(pred_list) if pred_list else f"No significant {category} transits at this time"
+                    for category, pred_list in predictions.items()
+                }
+
+                results.append(HoroscopePrediction(
+                    **final_predictions,
+                    lucky_number=random.randint(1, 9),
+                    lucky_color=random.choice(["Blue", "Red", "Green", "Yellow"]),
+                    transits=transits,
+                    natal_chart=natal_chart,
+                    window=window,
+                    timestamp=timestamp
+                ))
+            return results
+
         except Exception as e:
-            logger.error(f"Error in generate_prediction: {str(e)}", exc_info=True)
-            raise 
+            logger.error(f"Error in generate_predictions: {str(e)}", exc_info=True)
+            raise
+
+    def describe_window(self, window: TransitWindow, max_aspects: int = 5) -> str:
+        """One sentence listing a window's ingresses, stations and tightest peak aspects in time order"""
+        events = [
+            (ingress.time, f"{ingress.planet.value} enters {ingress.to_sign.value}")
+            for ingress in window.ingresses
+        ]
+        events += [
+            (station.time, f"{station.planet.value} turns {station.turns}")
+            for station in window.stations
+        ]
+        events += [
+            (aspect.time, f"{aspect.first.value} {aspect.aspect} {aspect.second.value} is exact")
+            for aspect in sorted(window.aspects, key=lambda aspect: aspect.orb)[:max_aspects]
+        ]
+        if not events:
+            return f"{WINDOW_LABELS[window.time_frame]}: no sign changes or stations"
+        events.sort(key=lambda event: event[0])
+        return f"{WINDOW_LABELS[window.time_frame]}: " + ", ".join(
+            f"{text} on {time.strftime('%b %d')}" for time, text in events
+        )
+
+    def get_categories(self, house_number: int) -> Tuple[str, ...]:
+        """Prediction categories a transit through a house is reported under"""
+        if house_number in [2, 8]:
+            return ("finances", "general")
+        elif house_number in [6, 12]:
+            return ("health", "general")
+        elif house_number in [5, 7]:
+            return ("love", "general")
+        elif house_number in [1, 10]:
+            return ("career", "general")
+        return ("general",)
+
+    def calculate_natal_charts(
+        self,
+        birth_details_list: List[Optional[BirthDetails]]
+    ) -> Tuple[List[Optional[NatalChart]], np.ndarray]:
+        """Natal charts and an N x 9 array of sidereal (Lahiri) longitudes, NaN rows where details are missing"""
+        natal_longitudes = np.full((len(birth_details_list), len(GRAHAS)), np.nan)
+        natal_charts: List[Optional[NatalChart]] = [None] * len(birth_details_list)
+        rows = [row for row, birth_details in enumerate(birth_details_list) if birth_details]
+        if not rows:
+            return natal_charts, natal_longitudes
+
+        # Geocode each distinct place once
+        places = {}
+        for row in rows:
+            place = (birth_details_list[row].city, birth_details_list[row].country)
+            if place not in places:
+                places[place] = self.get_coordinates(*place)
+        coordinates = [
+            places[(birth_details_list[row].city, birth_details_list[row].country)] for row in rows
+        ]
+
+        # Look up (or calculate) every natal chart in one pass
+        charts = self.natal_cache.charts(
+            [
+                datetime(
+                    year=birth_details_list[row].year,
+                    month=birth_details_list[row].month,
+                    day=birth_details_list[row].day,
+                    hour=birth_details_list[row].hour,
+                    minute=birth_details_list[row].minute,
+                    tzinfo=timezone.utc  # Ensure UTC timezone
+                )
+                for row in rows
+            ],
+            [latitude for latitude, _ in coordinates],
+            [longitude for _, longitude in coordinates],
+            b'P',  # Placidus house system
+            ayanamsa=NATAL_AYANAMSA
+        )
+
+        planets = [Planet(planet_name) for planet_name in GRAHAS]
+        for row, chart in zip(rows, charts):
+            natal_longitudes[row] = chart.longitudes
+            natal_positions = {
+                planet: position
+                for planet, position in zip(planets, chart.longitudes)
+                if not np.isnan(position)
+            }
+            natal_charts[row] = NatalChart(
+                ascendant=chart.ascendant,
+                ascendant_sign=self.get_zodiac_sign(chart.ascendant),
+                planet_positions=natal_positions,
+                house_positions={
+                    planet: self.get_house_number(pos)
+                    for planet, pos in natal_positions.items()
+                }
+            )
+        return natal_charts, natal_longitudes
+
     def get_zodiac_degrees(self, sign: ZodiacSign) -> float:
         """Convert zodiac sign to degrees"""
         zodiac_signs = list(ZodiacSign)
-        return zodiac_signs.index(sign) * 30 
+        return zodiac_signs.index(sign) * 30
+
+
+_horoscope_service: Optional[HoroscopeService] = None
+
+
+def get_horoscope_service() -> HoroscopeService:
+    """Return the process-wide horoscope service"""
+    global _horoscope_service
+    if _horoscope_service is None:
+        _horoscope_service = HoroscopeService()
+    return _horoscope_service
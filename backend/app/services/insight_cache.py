@@ -0,0 +1,92 @@
+import hashlib
+import logging
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+from app.core.cache import MISSING, LRUCache, SQLiteCache, TieredCache, register_cache
+
+logger = logging.getLogger(__name__)
+
+ZODIAC_SIGN_NAMES = (
+    "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+    "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"
+)
+
+# Bump when the insight prompt changes, so old answers are not served for it
+PROMPT_VERSION = 1
+
+
+class InsightCache:
+    """LLM house insights keyed by a quantized chart signature.
+
+    The ascendant and the 12 house cusps are snapped to the centre of
+    ``quantization``-degree buckets (30 keeps only the sign; 0 keeps the two
+    decimals the prompt shows). The prompt is built from the snapped values,
+    so every chart with the same signature asks the LLM the same question
+    and a cached answer is exactly what a fresh call would have been asked.
+    """
+
+    def __init__(self, cache: TieredCache, quantization: float = 1.0):
+        self.cache = cache
+        self.quantization = quantization
+
+    def quantize(self, longitude: float) -> float:
+        longitude = longitude % 360
+        if not self.quantization:
+            return round(longitude, 2)
+        bucket = math.floor(longitude / self.quantization)
+        return round((bucket + 0.5) * self.quantization, 2)
+
+    def quantize_chart(self, house_cusps: List[float], ascendant: float) -> Tuple[List[float], float]:
+        return [self.quantize(cusp) for cusp in house_cusps[:12]], self.quantize(ascendant)
+
+    def signature(self, house_cusps: List[float], ascendant: float, model: str) -> str:
+        """Hash of the prompt version, model, quantization and the snapped ascendant and cusps"""
+        cusps, ascendant = self.quantize_chart(house_cusps, ascendant)
+
+        def describe(longitude: float) -> str:
+            return f"{ZODIAC_SIGN_NAMES[int(longitude // 30) % 12]} {longitude % 30:.2f}"
+
+        raw = "|".join([
+            f"v{PROMPT_VERSION}",
+            model,
+            str(self.quantization),
+            describe(ascendant),
+            ",".join(describe(cusp) for cusp in cusps)
+        ])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        value = self.cache.get(key)
+        return None if value is MISSING else value
+
+    def set(self, key: str, insights: Dict[str, str]):
+        self.cache.set(key, insights)
+
+    def stats(self) -> Dict:
+        return {"quantization": self.quantization, **self.cache.stats()}
+
+
+_insight_cache: Optional[InsightCache] = None
+
+
+def get_insight_cache() -> InsightCache:
+    """Return the process-wide house insight cache.
+
+    INSIGHT_QUANTIZATION_DEGREES sets the bucket width, INSIGHT_CACHE_SIZE
+    and INSIGHT_CACHE_TTL bound the entries kept, and INSIGHT_CACHE_DB adds a
+    SQLite tier shared by all workers.
+    """
+    global _insight_cache
+    if _insight_cache is None:
+        ttl = float(os.getenv("INSIGHT_CACHE_TTL", str(30 * 24 * 3600)))
+        db_path = os.getenv("INSIGHT_CACHE_DB")
+        _insight_cache = InsightCache(
+            TieredCache(
+                LRUCache(maxsize=int(os.getenv("INSIGHT_CACHE_SIZE", "5000")), ttl=ttl),
+                SQLiteCache(db_path, table="house_insights", ttl=ttl) if db_path else None
+            ),
+            quantization=float(os.getenv("INSIGHT_QUANTIZATION_DEGREES", "1.0"))
+        )
+        register_cache("house_insights", _insight_cache)
+    return _insight_cache
@@ -0,0 +1,106 @@
+"""Rule-based house insights, a zero-LLM alternative to generate_house_insights.
+
+Each insight is assembled from lookup tables: the sign on the house cusp
+sets the tone for the house's topic, and every planet occupying the house
+adds its influence. All sentences are built once at import, so producing a
+Kundali's five insights is a handful of dictionary lookups. The result has
+the same shape as the LLM insights: keys "1" to "5" for the ascendant and
+the 10th, 7th, 2nd and 4th houses.
+"""
+import bisect
+from typing import Dict, List, Optional, Tuple
+
+SIGNS = (
+    "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+    "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"
+)
+
+# What each sign brings to whatever house it rules
+SIGN_QUALITIES = {
+    "Aries": "bold, pioneering energy and a need to act first",
+    "Taurus": "patience, steadiness and a love of lasting comfort",
+    "Gemini": "curiosity, quick wit and a gift for communication",
+    "Cancer": "deep feeling, loyalty and a protective instinct",
+    "Leo": "warmth, generosity and a natural wish to shine",
+    "Virgo": "care for detail, service and steady self-improvement",
+    "Libra": "grace, fairness and a search for harmony",
+    "Scorpio": "intensity, focus and a talent for transformation",
+    "Sagittarius": "optimism, a love of learning and wide horizons",
+    "Capricorn": "discipline, ambition and patient long-term building",
+    "Aquarius": "originality, independence and a humanitarian streak",
+    "Pisces": "compassion, imagination and spiritual sensitivity",
+}
+
+# Insight number -> (house, topic phrase)
+INSIGHT_HOUSES = {
+    "1": (1, "life path and personality"),
+    "2": (10, "career and public standing"),
+    "3": (7, "relationships and partnerships"),
+    "4": (2, "wealth and possessions"),
+    "5": (4, "home and emotional well-being"),
+}
+
+ORDINALS = {2: "2nd", 4: "4th", 7: "7th", 10: "10th"}
+
+# How each planet colours a house it occupies
+PLANET_INFLUENCES = {
+    "Sun": "the Sun here puts this area at the centre of your identity",
+    "Moon": "the Moon here makes this area emotionally important and changeable",
+    "Mars": "Mars here brings drive and courage, along with some impatience",
+    "Mercury": "Mercury here favours thinking, talking and trading your way forward",
+    "Jupiter": "Jupiter here expands opportunities and brings good fortune",
+    "Venus": "Venus here adds charm, pleasure and ease",
+    "Saturn": "Saturn here asks for patience, but rewards steady effort",
+    "Rahu": "Rahu here brings strong ambition and unconventional paths",
+    "Ketu": "Ketu here brings detachment and a pull towards inner growth",
+}
+
+
+def _build_sign_sentences() -> Dict[Tuple[int, str], str]:
+    sentences = {}
+    for house, topic in INSIGHT_HOUSES.values():
+        for sign, quality in SIGN_QUALITIES.items():
+            if house == 1:
+                sentence = f"With {sign} rising, your {topic} are marked by {quality}."
+            else:
+                sentence = f"{sign} on the cusp of your {ORDINALS[house]} house shapes your {topic} with {quality}."
+            sentences[(house, sign)] = sentence
+    return sentences
+
+
+# (house, sign on cusp) -> sentence, for every house an insight covers
+SIGN_SENTENCES = _build_sign_sentences()
+
+
+def sign_of(longitude: float) -> str:
+    return SIGNS[int(longitude % 360 // 30)]
+
+
+def house_of(longitude: float, house_cusps: List[float]) -> int:
+    """House (1-12) containing a longitude, given the 12 cusp longitudes"""
+    # Measure everything from the first cusp so the cusps increase monotonically
+    start = house_cusps[0]
+    offsets = [(cusp - start) % 360 for cusp in house_cusps[:12]]
+    return bisect.bisect_right(offsets, (longitude - start) % 360)
+
+
+def generate_rule_insights(
+    house_cusps: List[float],
+    ascendant: float,
+    planet_positions: Optional[Dict[str, float]] = None
+) -> Dict[str, str]:
+    """The five house insights from the lookup tables"""
+    occupants: Dict[int, List[str]] = {}
+    for planet, longitude in (planet_positions or {}).items():
+        occupants.setdefault(house_of(longitude, house_cusps), []).append(planet)
+
+    insights = {}
+    for number, (house, _) in INSIGHT_HOUSES.items():
+        cusp = ascendant if house == 1 else house_cusps[house - 1]
+        parts = [SIGN_SENTENCES[(house, sign_of(cusp))]]
+        influences = [PLANET_INFLUENCES[planet] for planet in occupants.get(house, []) if planet in PLANET_INFLUENCES]
+        if influences:
+            influence = "; ".join(influences)
+            parts.append(influence[0].upper() + influence[1:] + ".")
+        insights[number] = " ".join(parts)
+    return insights
@@ -0,0 +1,215 @@
+"""Background jobs with per-job progress events.
+
+A job is an async function that receives a ``progress(stage, message)``
+callback and returns a JSON-serializable result. Jobs wait in a bounded
+queue for one of a fixed number of worker tasks, so submitting returns at
+once and long pipelines do not hold an HTTP worker. Each job records its own
+ordered list of events, which clients can poll or follow as they arrive.
+
+Jobs live in the memory of the process that accepted them, so the job
+endpoints need a single worker process (or sticky routing per job ID): with
+several uvicorn workers a status request can reach a worker that never saw
+the job and get a 404.
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.core.cache import LRUCache, MISSING, register_cache
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[str, str], None]
+JobFunction = Callable[[ProgressCallback], Awaitable[Any]]
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+
+class JobQueueFull(Exception):
+    """Raised when the job queue is at capacity"""
+
+
+class Job:
+    def __init__(self, kind: str, work: JobFunction):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.work = work
+        self.status = QUEUED
+        self.events: List[Dict] = []
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        # Set and replaced on every event, waking anyone following the job
+        self._changed = asyncio.Event()
+        self.emit("queued", "Waiting for a worker")
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def emit(self, stage: str, message: str):
+        self.events.append({
+            "seq": len(self.events),
+            "stage": stage,
+            "message": message,
+            "status": self.status,
+            "time": time.time()
+        })
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def follow(self, after: int = -1) -> AsyncIterator[Dict]:
+        """Yield the events after sequence number ``after``, then new ones until the job finishes"""
+        seq = after + 1
+        while True:
+            changed = self._changed
+            while seq < len(self.events):
+                yield self.events[seq]
+                seq += 1
+            if self.finished:
+                return
+            await changed.wait()
+
+    def to_dict(self, include_events: bool = True) -> Dict:
+        job = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.events[-1]["stage"],
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error
+        }
+        if include_events:
+            job["events"] = self.events
+        return job
+
+
+class JobQueue:
+    """Bounded queue of jobs run by ``workers`` tasks on the event loop.
+
+    At most ``max_pending`` jobs are queued or running; further submissions
+    raise JobQueueFull. Finished jobs stay available for ``retention``
+    seconds (up to ``max_jobs`` of them) so clients can collect the result.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 100, retention: float = 3600, max_jobs: int = 10000):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.jobs = LRUCache(maxsize=max_jobs, ttl=retention)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._pending = 0
+        self.counters = {"submitted": 0, "rejected": 0, "succeeded": 0, "failed": 0}
+
+    def start(self):
+        """Start the worker tasks on the running event loop"""
+        if self._tasks:
+            return
+        if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+            logger.warning(
+                "Jobs are kept per process; with several workers GET /api/kundali/jobs/{job_id} "
+                "only finds jobs submitted to the same worker"
+            )
+        self._queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the workers; queued jobs are marked failed"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                self._fail(self._queue.get_nowait(), "Server shutting down")
+            self._queue = None
+
+    def submit(self, kind: str, work: JobFunction) -> Job:
+        if self._pending >= self.max_pending:
+            self.counters["rejected"] += 1
+            raise JobQueueFull(f"Job queue is full ({self.max_pending} jobs)")
+        if self._queue is None:
+            self.start()
+        job = Job(kind, work)
+        self.jobs.set(job.id, job)
+        self._pending += 1
+        self.counters["submitted"] += 1
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        job = self.jobs.get(job_id)
+        return None if job is MISSING else job
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._pending -= 1
+
+    async def _run(self, job: Job):
+        job.status = RUNNING
+        job.emit("started", "Job started")
+        try:
+            job.result = await job.work(job.emit)
+        except asyncio.CancelledError:
+            self._fail(job, "Server shutting down")
+            raise
+        except Exception as e:
+            logger.error(f"{job.kind} job {job.id} failed: {str(e)}")
+            self._fail(job, str(e) or type(e).__name__)
+            return
+        job.status = SUCCEEDED
+        job.finished_at = time.time()
+        self.counters["succeeded"] += 1
+        job.emit("complete", "Job complete")
+
+    def _fail(self, job: Job, error: str):
+        job.status = FAILED
+        job.error = error
+        job.finished_at = time.time()
+        self.counters["failed"] += 1
+        job.emit("failed", error)
+
+    def stats(self) -> Dict:
+        return {
+            **self.counters,
+            "workers": self.workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "retained": len(self.jobs)
+        }
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue.
+
+    JOB_WORKERS sets the number of jobs run at once, JOB_QUEUE_SIZE the
+    queued or running job limit and JOB_RETENTION_SECONDS how long finished
+    jobs can be fetched.
+    """
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(
+            workers=int(os.getenv("JOB_WORKERS", "4")),
+            max_pending=int(os.getenv("JOB_QUEUE_SIZE", "100")),
+            retention=float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+        )
+        register_cache("jobs", _job_queue)
+    return _job_queue
@@ -1,105 +1,92 @@
-import swisseph as swe
+import logging
+import matplotlib
+matplotlib.use("Agg")  # headless: figures are only ever saved, never shown
 import matplotlib.pyplot as plt
 import numpy as np
-from typing import Dict, List, Tuple
-import math
-from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import datetime
 from app.models.schemas import BirthDetails
-import groq
-import os
-from dotenv import load_dotenv
+from app.services.natal_cache import NatalChartData, get_natal_cache
+from app.services.ephemeris import (
+    get_ephemeris_engine,
+    run_ephemeris,
+    julian_day as ephemeris_julian_day,
+    julian_days as ephemeris_julian_days
+)
+from app.services.llm_gateway import LLMGateway, get_llm_gateway, llm_deadline, run_in_background, run_with_deadline
+from app.services.chart_renderer import DEFAULT_THEME, PLANET_SYMBOLS, ZODIAC_SIGNS
+from app.services.chart_store import get_chart_store
+from app.services.insight_cache import get_insight_cache
+from app.services.insight_rules import generate_rule_insights
 
-# Load environment variables
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+INSIGHT_MODES = ("rules", "llm", "hybrid")
 
 class KundaliGenerator:
-    def __init__(self):
-        # Initialize Swiss Ephemeris and Groq client
-        swe.set_ephe_path()
+    def __init__(self, llm: Optional[LLMGateway] = None):
+        # Shared LLM gateway; Swiss Ephemeris is set up once by the shared engine
         self.current_figure = None
-        self.groq_client = groq.Groq(api_key=os.getenv("GROQ_API_KEY"))
+        self.chart_id = None
+        self.chart_svg = None
+        self.chart_png = None
+        self.chart_store = get_chart_store()
+        self.insight_cache = get_insight_cache()
+        self.ephemeris = get_ephemeris_engine()
+        self.natal_cache = get_natal_cache()
+        self.llm = llm or get_llm_gateway()
+        self.insight_deadline = llm_deadline("insights", 8)
         
         # Define planets and their symbols
-        self.planets = {
-            'Sun': '☉',
-            'Moon': '☽',
-            'Mars': '♂',
-            'Mercury': '☿',
-            'Jupiter': '♃',
-            'Venus': '♀',
-            'Saturn': '♄',
-            'Rahu': '☊',
-            'Ketu': '☋'
-        }
+        self.planets = dict(PLANET_SYMBOLS)
         
         # Define zodiac signs and their symbols
-        self.zodiac_signs = [
-            'Aries ♈', 'Taurus ♉', 'Gemini ♊', 'Cancer ♋',
-            'Leo ♌', 'Virgo ♍', 'Libra ♎', 'Scorpio ♏',
-            'Sagittarius ♐', 'Capricorn ♑', 'Aquarius ♒', 'Pisces ♓'
-        ]
+        self.zodiac_signs = list(ZODIAC_SIGNS)
 
     def calculate_planet_positions(self, birth_details: BirthDetails) -> Dict[str, float]:
         """Calculate positions of planets at time of birth"""
-        # Convert local time to UTC
-        local_datetime = datetime.combine(birth_details.date, birth_details.time)
-        utc_datetime = local_datetime.replace(tzinfo=timezone.utc)
-        julian_day = swe.julday(
-            birth_details.date.year,
-            birth_details.date.month,
-            birth_details.date.day,
-            birth_details.time.hour + birth_details.time.minute/60.0
-        )
-        
-        # Calculate positions for each planet
-        planet_positions = {}
-        
-        # Map of planets to their Swiss Ephemeris constants
-        planet_map = {
-            'Sun': swe.SUN,
-            'Moon': swe.MOON,
-            'Mars': swe.MARS,
-            'Mercury': swe.MERCURY,
-            'Jupiter': swe.JUPITER,
-            'Venus': swe.VENUS,
-            'Saturn': swe.SATURN,
-            'Rahu': swe.MEAN_NODE  # North Node
-        }
-        
-        for planet, swe_constant in planet_map.items():
-            position = swe.calc_ut(julian_day, swe_constant)[0]
-            planet_positions[planet] = position[0]
-        
-        # Calculate Ketu (South Node) as opposite to Rahu
-        planet_positions['Ketu'] = (planet_positions['Rahu'] + 180) % 360
-        
-        return planet_positions
+        return self.calculate_planet_positions_batch([birth_details])[0]
+
+    def calculate_planet_positions_batch(self, birth_details_list: List[BirthDetails]) -> List[Dict[str, float]]:
+        """Calculate tropical planet positions for many births in one ephemeris pass"""
+        julian_days = ephemeris_julian_days([
+            datetime.combine(birth_details.date, birth_details.time)
+            for birth_details in birth_details_list
+        ])
+        positions = self.ephemeris.positions(julian_days)
+
+        planet_names = list(self.planets)  # same order as GRAHAS
+        return [
+            {planet: float(longitude) for planet, longitude in zip(planet_names, row)}
+            for row in positions.longitudes
+        ]
 
     def calculate_ascendant(self, birth_details: BirthDetails) -> Tuple[float, List[float]]:
         """Calculate the ascendant (Lagna) and house cusps at time of birth"""
-        julian_day = swe.julday(
-            birth_details.date.year,
-            birth_details.date.month,
-            birth_details.date.day,
-            birth_details.time.hour + birth_details.time.minute/60.0
-        )
+        julian_day = ephemeris_julian_day(datetime.combine(birth_details.date, birth_details.time))
         
         # Calculate houses using Placidus system
-        houses = swe.houses(
-            julian_day,
+        cusps, ascendants = self.ephemeris.houses(
+            [julian_day],
             birth_details.latitude,
             birth_details.longitude,
             b'P'  # Placidus house system
         )
         
         # Extract the ascendant and house cusps
-        ascendant = houses[1][0]  # First house cusp (ascendant)
-        house_cusps = list(houses[0])  # All house cusps
+        ascendant = float(ascendants[0])
+        house_cusps = cusps[0].tolist()  # All house cusps
         
         return ascendant, house_cusps
 
     def draw_kundali_chart(self, planet_positions: Dict[str, float], ascendant: float):
-        """Draw a beautiful Kundali chart using matplotlib"""
+        """Draw a beautiful Kundali chart using matplotlib.
+
+        Requests are served by the template renderer in chart_renderer; this
+        figure is kept for callers that want to edit the plot further. Any
+        previous figure is closed first; call close_figure when done.
+        """
+        self.close_figure()
         # Create figure with white background
         self.current_figure, ax = plt.subplots(figsize=(12, 12), subplot_kw={'projection': 'polar'}, facecolor='white')
         
@@ -147,8 +134,51 @@ class KundaliGenerator:
         plt.tight_layout()
         return self.current_figure
 
-    def generate_house_insights(self, house_cusps: List[float], ascendant: float) -> Dict[str, str]:
-        """Generate insights about house placements and ascendant using Groq LLM"""
+    def close_figure(self):
+        """Release the matplotlib figure from pyplot's global registry"""
+        if self.current_figure is not None:
+            plt.close(self.current_figure)
+            self.current_figure = None
+
+    async def generate_house_insights(
+        self,
+        house_cusps: List[float],
+        ascendant: float,
+        mode: str = "llm",
+        planet_positions: Optional[Dict[str, float]] = None
+    ) -> Dict[str, str]:
+        """Generate insights about house placements and ascendant.
+
+        ``mode`` is one of INSIGHT_MODES:
+        - "rules": the rule tables in insight_rules, without any network call
+        - "llm": Groq, cached per quantized chart signature (the prompt is
+          built from the quantized positions); past the insights deadline the
+          rule-based insights are returned and the answer is still cached
+          when it arrives
+        - "hybrid": a cached LLM answer if there is one, otherwise the
+          rule-based insights at once while the LLM answer is cached in the
+          background
+        """
+        if mode == "rules":
+            return generate_rule_insights(house_cusps, ascendant, planet_positions)
+
+        cache_key = self.insight_cache.signature(house_cusps, ascendant, self.llm.model)
+        cached = self.insight_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        if mode == "hybrid":
+            run_in_background(self._generate_house_insights(cache_key, house_cusps, ascendant))
+            return generate_rule_insights(house_cusps, ascendant, planet_positions)
+        return await run_with_deadline(
+            self._generate_house_insights(cache_key, house_cusps, ascendant),
+            self.insight_deadline,
+            lambda: generate_rule_insights(house_cusps, ascendant, planet_positions),
+            call_site="insights"
+        )
+
+    async def _generate_house_insights(self, cache_key: str, house_cusps: List[float], ascendant: float) -> Dict[str, str]:
+        house_cusps, ascendant = self.insight_cache.quantize_chart(house_cusps, ascendant)
+
         # Prepare the house and ascendant information
         house_info = {
             f"House {i+1}": f"{house_cusps[i]:.2f}°"
@@ -173,74 +203,100 @@ Based on these positions, provide 5 key insights about:
 
 Format each insight on a new line starting with the number (1., 2., etc.) followed by your insight. """
 
-        # Generate insights using Groq
-        try:
-            completion = self.groq_client.chat.completions.create(
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }],
-                model="mixtral-8x7b-32768",
-                temperature=0.7,
-                max_tokens=1000
-            )
-            
-            # Extract and process insights
-            content = completion.choices[0].message.content
-            
-            # Split insights into a dictionary
-            import re
-            insights_dict = {}
-            
-            # Split content into lines and process each line
-            lines = content.split('\n')
-            current_number = None
-            current_text = []
-            
-            for line in lines:
-                # Check if line starts with a number
-                number_match = re.match(r'(\d+)\.', line)
-                if number_match:
-                    # If we have previous content, save it
-                    if current_number is not None:
-                        insights_dict[str(current_number)] = ' '.join(current_text).strip()
-                        current_text = []
-                    
-                    # Start new number
-                    current_number = int(number_match.group(1))
-                    # Add text after the number
-                    current_text.append(re.sub(r'^\d+\.', '', line).strip())
-                elif line.strip() and current_number is not None:
-                    # Continue previous insight
-                    current_text.append(line.strip())
-            
-            # Add the last insight
-            if current_number is not None and current_text:
-                insights_dict[str(current_number)] = ' '.join(current_text).strip()
-            
-            return insights_dict
-            
-        except Exception as e:
-            print(f"Error generating insights: {str(e)}")
-            return {"error": "Unable to generate insights. Please check your Groq API key and try again."}
-
-    def generate_kundali(self, birth_details: BirthDetails) -> Dict:
-        """Generate complete Kundali data"""
-        # Calculate planetary positions
-        print("Calculating planetary positions...")
-        planet_positions = self.calculate_planet_positions(birth_details)
+        # Generate insights using Groq; errors reach the caller, which serves the rule-based insights
+        content = await self.llm.complete(
+            messages=[{
+                "role": "user",
+                "content": prompt
+            }],
+            temperature=0.7,
+            max_tokens=1000
+        )
+        
+        # Extract and process insights
         
-        # Calculate ascendant and houses
-        print("Calculating ascendant and houses...")
-        ascendant, house_cusps = self.calculate_ascendant(birth_details)
+        # Split insights into a dictionary
+        import re
+        insights_dict = {}
+        
+        # Split content into lines and process each line
+        lines = content.split('\n')
+        current_number = None
+        current_text = []
+        
+        for line in lines:
+            # Check if line starts with a number
+            number_match = re.match(r'(\d+)\.', line)
+            if number_match:
+                # If we have previous content, save it
+                if current_number is not None:
+                    insights_dict[str(current_number)] = ' '.join(current_text).strip()
+                    current_text = []
+                
+                # Start new number
+                current_number = int(number_match.group(1))
+                # Add text after the number
+                current_text.append(re.sub(r'^\d+\.', '', line).strip())
+            elif line.strip() and current_number is not None:
+                # Continue previous insight
+                current_text.append(line.strip())
+        
+        # Add the last insight
+        if current_number is not None and current_text:
+            insights_dict[str(current_number)] = ' '.join(current_text).strip()
+        
+        if insights_dict:
+            self.insight_cache.set(cache_key, insights_dict)
+        else:
+            logger.warning("Insights reply had no numbered insights; not caching it")
+        return insights_dict
+
+    async def generate_kundali(
+        self,
+        birth_details: BirthDetails,
+        chart_format: str = "none",
+        theme: str = DEFAULT_THEME,
+        insights_mode: str = "llm",
+        progress: Optional[Callable[[str, str], None]] = None,
+        chart: Optional[NatalChartData] = None
+    ) -> Dict:
+        """Generate complete Kundali data.
+
+        The chart is stored under ``chart_id`` and rendered on demand from
+        the chart store; with ``chart_format`` "svg" or "png" it is also
+        rendered now into ``chart_svg`` or ``chart_png``. ``progress`` is
+        called with (stage, message) as each stage starts. A ``chart`` already computed for these birth
+        details (e.g. by a batch) skips the ephemeris stage.
+        """
+        progress = progress or (lambda stage, message: None)
+
+        # Calculate planetary positions, ascendant and houses (cached per birth moment and place)
+        progress("ephemeris", "Calculating planetary positions, ascendant and houses...")
+        if chart is None:
+            chart = await run_ephemeris(
+                self.natal_cache.chart,
+                datetime.combine(birth_details.date, birth_details.time),
+                birth_details.latitude,
+                birth_details.longitude,
+                b'P'  # Placidus house system
+            )
+        planet_positions = dict(zip(self.planets, chart.longitudes))
+        ascendant = chart.ascendant
+        house_cusps = list(chart.house_cusps)
         
-        # Generate insights using Groq
-        print("Generating astrological insights...")
-        insights = self.generate_house_insights(house_cusps, ascendant)
+        # Generate insights using Groq and/or the rule tables
+        progress("insights", "Generating astrological insights...")
+        insights = await self.generate_house_insights(house_cusps, ascendant, insights_mode, planet_positions)
         
         # Draw the chart
-        print("Drawing Kundali chart...")
-        self.draw_kundali_chart(planet_positions, ascendant)
+        progress("chart", "Drawing Kundali chart...")
+        self.chart_id = self.chart_store.put(planet_positions, ascendant)
+        if chart_format == "svg":
+            variant = await self.chart_store.variant(self.chart_id, "svg", theme=theme)
+            self.chart_svg = variant.content.decode()
+        elif chart_format == "png":
+            variant = await self.chart_store.variant(self.chart_id, "png", theme=theme)
+            self.chart_png = variant.content
         
         # Prepare response data
         kundali_data = {
@@ -260,5 +316,5 @@ Format each insight on a new line starting with the number (1., 2., etc.) follow
             "insights": insights
         }
         
-        print("\nKundali generation complete!")
+        progress("done", "Kundali generation complete!")
         return kundali_data 
\ No newline at end of file
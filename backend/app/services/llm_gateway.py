@@ -0,0 +1,324 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, TypeVar
+import httpx
+from groq import AsyncGroq
+from dotenv import load_dotenv
+from app.core.cache import register_cache
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+DEFAULT_MODEL = "mixtral-8x7b-32768"
+
+T = TypeVar("T")
+
+
+class LLMUnavailable(Exception):
+    """Raised without calling the provider while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Stops calls to a failing provider.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are refused. Once ``reset_timeout`` seconds have passed, one probe
+    call is let through; its success closes the circuit and its failure
+    keeps it open for another ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.counters = {"opened": 0, "rejected": 0}
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            # Re-arm, so only this call probes until the timeout passes again
+            self.opened_at = time.monotonic()
+            return True
+        self.counters["rejected"] += 1
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                self.counters["opened"] += 1
+                logger.warning(f"LLM circuit opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict:
+        return {"state": self.state, "consecutive_failures": self.failures, **self.counters}
+
+
+class LLMGateway:
+    """Shared async Groq client for every LLM call site.
+
+    One pooled keep-alive HTTP client serves all requests, a semaphore caps
+    the number of completions in flight and every call carries a timeout, so
+    a slow completion only ever occupies its own request.
+
+    Identical concurrent completions (same model, messages and sampling
+    parameters) are coalesced: the first caller starts one upstream call and
+    later callers await its result. The shared call is shielded, so a caller
+    that goes away does not cancel it for the others.
+
+    A circuit breaker refuses new calls with LLMUnavailable while the
+    provider keeps failing.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = DEFAULT_MODEL,
+        max_concurrency: int = 16,
+        timeout: float = 60.0,
+        max_connections: int = 32,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.model = model
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout = timeout
+        self.client = AsyncGroq(
+            api_key=api_key,
+            timeout=timeout,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections
+                ),
+                timeout=timeout
+            )
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self.counters = {"upstream_calls": 0, "coalesced": 0, "max_waiters": 0}
+
+    @staticmethod
+    def request_key(model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int, top_p: float) -> str:
+        payload = json.dumps(
+            [model, messages, temperature, max_tokens, top_p],
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        top_p: float = 1,
+        timeout: Optional[float] = None
+    ) -> str:
+        """Return the text of a chat completion; raises asyncio.TimeoutError past ``timeout``"""
+        model = model or self.model
+        key = self.request_key(model, messages, temperature, max_tokens, top_p)
+        task = self._in_flight.get(key)
+        if task is None:
+            if not self.breaker.allow():
+                raise LLMUnavailable("LLM provider is failing; not calling it for now")
+            task = asyncio.ensure_future(
+                self._complete(messages, model, temperature, max_tokens, top_p, timeout)
+            )
+            self._in_flight[key] = task
+            self._waiters[key] = 1
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self._waiters[key] += 1
+            self.counters["coalesced"] += 1
+            self.counters["max_waiters"] = max(self.counters["max_waiters"], self._waiters[key])
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        self._in_flight.pop(key, None)
+        self._waiters.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            # Retrieved here so an error nobody is left waiting for is logged once
+            logger.error(f"LLM completion failed: {task.exception()}")
+
+    async def _complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        top_p: float,
+        timeout: Optional[float]
+    ) -> str:
+        self.counters["upstream_calls"] += 1
+        try:
+            async with self._semaphore:
+                completion = await asyncio.wait_for(
+                    self.client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        top_p=top_p,
+                        stream=False
+                    ),
+                    timeout=timeout or self.timeout
+                )
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return completion.choices[0].message.content
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        top_p: float = 1,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """Yield the text of a chat completion as it is generated.
+
+        ``timeout`` bounds the wait for the stream to start. Closing or
+        cancelling the iterator closes the upstream response, so abandoned
+        streams stop consuming tokens.
+        """
+        if not self.breaker.allow():
+            raise LLMUnavailable("LLM provider is failing; not calling it for now")
+        async with self._semaphore:
+            try:
+                stream = await asyncio.wait_for(
+                    self.client.chat.completions.create(
+                        model=model or self.model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        top_p=top_p,
+                        stream=True
+                    ),
+                    timeout=timeout or self.timeout
+                )
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                await stream.close()
+
+    async def aclose(self):
+        await self.client.close()
+
+    def stats(self) -> Dict:
+        return {
+            **self.counters,
+            "breaker": self.breaker.stats(),
+            "in_flight": len(self._in_flight),
+            # Callers waiting on each in-flight completion, by key prefix
+            "waiters": {key[:12]: waiters for key, waiters in self._waiters.items()}
+        }
+
+
+_gateway: Optional[LLMGateway] = None
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Return the process-wide LLM gateway, configured from the environment"""
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway(
+            api_key=os.getenv("GROQ_API_KEY"),
+            model=os.getenv("LLM_MODEL", DEFAULT_MODEL),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+            timeout=float(os.getenv("LLM_TIMEOUT", "60")),
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "32")),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+                reset_timeout=float(os.getenv("LLM_BREAKER_RESET", "30"))
+            )
+        )
+        register_cache("llm", _gateway)
+    return _gateway
+
+
+async def close_llm_gateway():
+    """Close the pooled connections of the gateway, if one was created"""
+    global _gateway
+    if _gateway is not None:
+        await _gateway.aclose()
+        _gateway = None
+
+
+def llm_deadline(call_site: str, default: float) -> float:
+    """Latency budget in seconds for an LLM call site, from LLM_DEADLINE_<CALL_SITE>"""
+    return float(os.getenv(f"LLM_DEADLINE_{call_site.upper()}", str(default)))
+
+
+# Work that outlived its deadline, referenced until it finishes
+_background_tasks: Set[asyncio.Task] = set()
+
+
+async def run_with_deadline(
+    work: Awaitable[T],
+    deadline: float,
+    fallback: Callable[[], T],
+    call_site: str = "llm",
+    error_fallback: Optional[Callable[[], T]] = None
+) -> T:
+    """Await ``work`` for up to ``deadline`` seconds, else return ``fallback()``.
+
+    Past the deadline ``work`` keeps running in the background, so whatever
+    cache it fills is warm for the next request. LLMUnavailable from an open
+    circuit breaker is answered with the fallback straight away, and so is an
+    error from the provider, unless ``error_fallback`` is given for those.
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), timeout=deadline)
+    except asyncio.TimeoutError:
+        logger.warning(f"{call_site}: LLM call exceeded its {deadline}s budget; serving fallback")
+        run_in_background(task)
+        return fallback()
+    except LLMUnavailable:
+        logger.warning(f"{call_site}: LLM circuit is open; serving fallback")
+        return fallback()
+    except Exception as e:
+        logger.error(f"{call_site}: LLM call failed ({str(e)}); serving fallback")
+        return (error_fallback or fallback)()
+
+
+def run_in_background(work: Awaitable) -> asyncio.Future:
+    """Keep ``work`` running after the request that started it has returned"""
+    task = asyncio.ensure_future(work)
+    _background_tasks.add(task)
+    task.add_done_callback(_finish_background_task)
+    return task
+
+
+def _finish_background_task(task: asyncio.Task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background LLM work failed: {task.exception()}")
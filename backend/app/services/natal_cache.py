@@ -0,0 +1,181 @@
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import swisseph as swe
+from app.core.cache import MISSING, LRUCache, SQLiteCache, TieredCache, register_cache
+from app.services.ephemeris import EphemerisEngine, get_ephemeris_engine, julian_day, julian_days
+
+logger = logging.getLogger(__name__)
+
+AYANAMSA_NAMES = {
+    swe.SIDM_LAHIRI: "lahiri",
+    swe.SIDM_FAGAN_BRADLEY: "fagan_bradley",
+}
+
+
+class NatalChartData(NamedTuple):
+    """Positions (ordered as GRAHAS), house cusps and ascendant of one birth chart"""
+    longitudes: Tuple[float, ...]
+    speeds: Tuple[float, ...]
+    house_cusps: Tuple[float, ...]
+    ascendant: float
+
+    def to_dict(self) -> Dict:
+        return self._asdict()
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "NatalChartData":
+        return cls(
+            longitudes=tuple(data["longitudes"]),
+            speeds=tuple(data["speeds"]),
+            house_cusps=tuple(data["house_cusps"]),
+            ascendant=data["ascendant"]
+        )
+
+
+class NatalChartCache:
+    """Natal chart cache keyed by (UTC birth minute, rounded lat/lon, house system, ayanamsa).
+
+    Charts are computed from the rounded coordinates, so a cached chart is
+    exactly what a fresh calculation for the same key would return.
+    """
+
+    def __init__(
+        self,
+        ephemeris: EphemerisEngine,
+        maxsize: int = 10000,
+        db_path: Optional[str] = None,
+        coordinate_decimals: int = 3
+    ):
+        self.ephemeris = ephemeris
+        self.coordinate_decimals = coordinate_decimals
+        persistent = SQLiteCache(db_path, table="natal_charts") if db_path else None
+        self.cache = TieredCache(LRUCache(maxsize=maxsize), persistent)
+
+    def make_key(
+        self,
+        birth_moment: datetime,
+        latitude: float,
+        longitude: float,
+        house_system: bytes,
+        ayanamsa: Optional[int]
+    ) -> str:
+        ayanamsa_name = "tropical" if ayanamsa is None else AYANAMSA_NAMES.get(ayanamsa, str(ayanamsa))
+        return "|".join([
+            birth_moment.strftime("%Y-%m-%dT%H:%M"),
+            f"{round(latitude, self.coordinate_decimals):.{self.coordinate_decimals}f}",
+            f"{round(longitude, self.coordinate_decimals):.{self.coordinate_decimals}f}",
+            house_system.decode(),
+            ayanamsa_name
+        ])
+
+    def chart(
+        self,
+        birth_moment: datetime,
+        latitude: float,
+        longitude: float,
+        house_system: bytes = b'P',
+        ayanamsa: Optional[int] = None
+    ) -> NatalChartData:
+        """Return the natal chart for a UTC birth moment and place.
+
+        ``ayanamsa`` is a ``swe.SIDM_*`` constant for sidereal planet
+        positions, or None for tropical ones. House cusps are tropical.
+        """
+        key = self.make_key(birth_moment, latitude, longitude, house_system, ayanamsa)
+        cached = self.cache.get(key)
+        if cached is not MISSING:
+            return NatalChartData.from_dict(cached)
+
+        latitude = round(latitude, self.coordinate_decimals)
+        longitude = round(longitude, self.coordinate_decimals)
+        jd = julian_day(birth_moment)
+        if ayanamsa is None:
+            positions = self.ephemeris.positions([jd])
+        else:
+            positions = self.ephemeris.positions([jd], sidereal=True, ayanamsa=ayanamsa)
+        cusps, ascendants = self.ephemeris.houses([jd], latitude, longitude, house_system)
+
+        chart = NatalChartData(
+            longitudes=tuple(positions.longitudes[0].tolist()),
+            speeds=tuple(positions.speeds[0].tolist()),
+            house_cusps=tuple(cusps[0].tolist()),
+            ascendant=float(ascendants[0])
+        )
+        self.cache.set(key, chart.to_dict())
+        logger.debug(f"Cached natal chart {key}")
+        return chart
+
+    def charts(
+        self,
+        birth_moments: Sequence[datetime],
+        latitudes: Sequence[float],
+        longitudes: Sequence[float],
+        house_system: bytes = b'P',
+        ayanamsa: Optional[int] = None
+    ) -> List[NatalChartData]:
+        """Return the natal charts for many births, computing every miss in one ephemeris pass"""
+        keys = [
+            self.make_key(moment, latitude, longitude, house_system, ayanamsa)
+            for moment, latitude, longitude in zip(birth_moments, latitudes, longitudes)
+        ]
+        charts: Dict[str, NatalChartData] = {}
+        misses: Dict[str, int] = {}
+        for index, key in enumerate(keys):
+            if key in charts or key in misses:
+                continue
+            cached = self.cache.get(key)
+            if cached is MISSING:
+                misses[key] = index
+            else:
+                charts[key] = NatalChartData.from_dict(cached)
+
+        if misses:
+            indexes = list(misses.values())
+            jds = julian_days([birth_moments[i] for i in indexes])
+            if ayanamsa is None:
+                positions = self.ephemeris.positions(jds)
+            else:
+                positions = self.ephemeris.positions(jds, sidereal=True, ayanamsa=ayanamsa)
+            cusps, ascendants = self.ephemeris.houses(
+                jds,
+                [round(latitudes[i], self.coordinate_decimals) for i in indexes],
+                [round(longitudes[i], self.coordinate_decimals) for i in indexes],
+                house_system
+            )
+            for row, key in enumerate(misses):
+                chart = NatalChartData(
+                    longitudes=tuple(positions.longitudes[row].tolist()),
+                    speeds=tuple(positions.speeds[row].tolist()),
+                    house_cusps=tuple(cusps[row].tolist()),
+                    ascendant=float(ascendants[row])
+                )
+                self.cache.set(key, chart.to_dict())
+                charts[key] = chart
+            logger.debug(f"Computed {len(misses)} natal charts in one pass")
+
+        return [charts[key] for key in keys]
+
+    def stats(self) -> Dict:
+        return self.cache.stats()
+
+
+_natal_cache: Optional[NatalChartCache] = None
+
+
+def get_natal_cache() -> NatalChartCache:
+    """Return the process-wide natal chart cache.
+
+    NATAL_CACHE_SIZE caps the in-memory entries and NATAL_CACHE_DB, when set,
+    adds a SQLite tier shared by all workers.
+    """
+    global _natal_cache
+    if _natal_cache is None:
+        _natal_cache = NatalChartCache(
+            get_ephemeris_engine(),
+            maxsize=int(os.getenv("NATAL_CACHE_SIZE", "10000")),
+            db_path=os.getenv("NATAL_CACHE_DB")
+        )
+        register_cache("natal_charts", _natal_cache)
+    return _natal_cache
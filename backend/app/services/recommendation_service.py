@@ -1,9 +1,16 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set
 import os
 import json
-from groq import Groq
+import asyncio
+import hashlib
+import time
 from dotenv import load_dotenv
-from .horoscope_service import HoroscopeService
+from .horoscope_service import get_horoscope_service
+from .transit_snapshot import get_transit_snapshot
+from .ephemeris import run_ephemeris
+from .llm_gateway import LLMGateway, get_llm_gateway, llm_deadline, run_with_deadline
+from .gazetteer import normalize
+from ..core.cache import MISSING, LRUCache, SQLiteCache, TieredCache, register_cache
 from ..models.horoscope_schemas import BirthDetails, TransitInfo
 import uuid
 import logging
@@ -12,13 +19,55 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 class RecommendationService:
-    def __init__(self):
+    """Personalized recommendations, cached per birth details and transit window.
+
+    An entry is fresh while the transits it was generated for (each planet's
+    sign and house, everything the prompt sees) are still current and it is
+    younger than ``fresh_for`` seconds. A stale entry younger than
+    ``max_stale`` is returned at once while a background task regenerates it;
+    older or missing entries are generated before responding, within a
+    latency budget: past it the caller gets the expired entry or the default
+    recommendations, and the generation finishes in the background to fill
+    the cache.
+    """
+
+    def __init__(
+        self,
+        llm: Optional[LLMGateway] = None,
+        cache: Optional[TieredCache] = None,
+        fresh_for: float = 24 * 3600,
+        max_stale: float = 7 * 24 * 3600
+    ):
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
             logger.error("GROQ_API_KEY not found in environment variables")
             raise ValueError("GROQ_API_KEY not found")
-        self.client = Groq(api_key=api_key)
-        self.horoscope_service = HoroscopeService()
+        self.llm = llm or get_llm_gateway()
+        self.horoscope_service = get_horoscope_service()
+        self.transit_snapshot = get_transit_snapshot()
+        self.cache = cache or TieredCache(LRUCache(maxsize=10000))
+        self.fresh_for = fresh_for
+        self.max_stale = max_stale
+        self._refreshing: Set[str] = set()
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        self.deadline = llm_deadline("recommendations", 8)
+        self.counters = {
+            "fresh_hits": 0, "stale_hits": 0, "misses": 0, "fallbacks": 0, "refreshes": 0, "refresh_errors": 0
+        }
+
+    @staticmethod
+    def birth_key(birth_details: BirthDetails) -> str:
+        """Hash of the birth details the prompt uses"""
+        fields = [
+            birth_details.year, birth_details.month, birth_details.day,
+            birth_details.hour, birth_details.minute,
+            normalize(birth_details.city), normalize(birth_details.country)
+        ]
+        return hashlib.sha256(json.dumps(fields).encode()).hexdigest()
+
+    @staticmethod
+    def transit_key(transits: List[TransitInfo]) -> str:
+        return "|".join(f"{t.planet.value}:{t.zodiac_sign.value}:{t.house}" for t in transits)
 
     def _generate_prompt(self, birth_details: BirthDetails, transits: List[TransitInfo]) -> str:
         """Generate a prompt for the LLM to create personalized recommendations"""
@@ -68,18 +117,81 @@ class RecommendationService:
 
     async def get_personalized_recommendations(self, birth_details: BirthDetails) -> List[Dict]:
         try:
-            logger.info(f"Generating recommendations for birth details: {birth_details}")
-            
             # Get current transits
-            transits = self.horoscope_service.calculate_current_transits()
+            transits = await run_ephemeris(self.transit_snapshot.get)
+            key = self.birth_key(birth_details)
+            transit_key = self.transit_key(transits)
+
+            entry = self.cache.get(key)
+            if entry is not MISSING:
+                age = time.time() - entry["created_at"]
+                if entry["transit_key"] == transit_key and age < self.fresh_for:
+                    self.counters["fresh_hits"] += 1
+                    return entry["recommendations"]
+                if age < self.max_stale:
+                    self.counters["stale_hits"] += 1
+                    self._refresh_in_background(key, birth_details, transits)
+                    return entry["recommendations"]
+
+            self.counters["misses"] += 1
+            expired = None if entry is MISSING else entry["recommendations"]
+            return await run_with_deadline(
+                self._refresh(key, birth_details, transits),
+                self.deadline,
+                lambda: self._fallback_recommendations(expired),
+                call_site="recommendations"
+            )
+
+        except Exception as e:
+            logger.error(f"Error in get_personalized_recommendations: {str(e)}")
+            raise
+
+    async def _refresh(self, key: str, birth_details: BirthDetails, transits: List[TransitInfo]) -> List[Dict]:
+        recommendations = await self._generate_recommendations(birth_details, transits)
+        self.cache.set(key, {
+            "transit_key": self.transit_key(transits),
+            "created_at": time.time(),
+            "recommendations": recommendations
+        })
+        return recommendations
+
+    def _fallback_recommendations(self, expired: Optional[List[Dict]]) -> List[Dict]:
+        self.counters["fallbacks"] += 1
+        return expired or self._get_default_recommendations()
+
+    def _refresh_in_background(self, key: str, birth_details: BirthDetails, transits: List[TransitInfo]):
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                await self._refresh(key, birth_details, transits)
+                self.counters["refreshes"] += 1
+            except Exception as e:
+                # The stale entry keeps being served until a refresh succeeds
+                self.counters["refresh_errors"] += 1
+                logger.error(f"Error refreshing recommendations: {str(e)}")
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    def stats(self) -> Dict:
+        return {**self.counters, "refreshing": len(self._refreshing), **self.cache.stats()}
+
+    async def _generate_recommendations(self, birth_details: BirthDetails, transits: List[TransitInfo]) -> List[Dict]:
+        try:
+            logger.info(f"Generating recommendations for birth details: {birth_details}")
             logger.info(f"Calculated transits: {transits}")
 
             # Generate recommendations using Groq
             prompt = self._generate_prompt(birth_details, transits)
             logger.info("Generated prompt for LLM")
 
-            completion = self.client.chat.completions.create(
-                model="mixtral-8x7b-32768",
+            response_content = await self.llm.complete(
                 messages=[
                     {
                         "role": "system", 
@@ -96,7 +208,6 @@ class RecommendationService:
             )
 
             # Parse and process recommendations
-            response_content = completion.choices[0].message.content
             logger.info(f"Raw LLM response: {response_content}")
 
             try:
@@ -127,7 +238,7 @@ class RecommendationService:
                 raise ValueError(f"Invalid JSON response from LLM: {str(e)}")
 
         except Exception as e:
-            logger.error(f"Error in get_personalized_recommendations: {str(e)}")
+            logger.error(f"Error generating recommendations: {str(e)}")
             raise
 
     def _get_default_recommendations(self) -> List[Dict]:
@@ -181,4 +292,34 @@ class RecommendationService:
                 "rating": 4.8,
                 "affinity": 89
             }
-        ] 
\ No newline at end of file
+        ]
+
+
+_recommendation_service: Optional[RecommendationService] = None
+
+
+def get_recommendation_service() -> RecommendationService:
+    """Return the process-wide recommendation service.
+
+    RECOMMENDATION_CACHE_SIZE caps the entries kept in memory,
+    RECOMMENDATION_CACHE_DB adds a SQLite tier shared by all workers, and
+    RECOMMENDATION_FRESH_SECONDS / RECOMMENDATION_MAX_STALE_SECONDS set when
+    an entry is refreshed in the background and when it is no longer served.
+    """
+    global _recommendation_service
+    if _recommendation_service is None:
+        max_stale = float(os.getenv("RECOMMENDATION_MAX_STALE_SECONDS", str(7 * 24 * 3600)))
+        db_path = os.getenv("RECOMMENDATION_CACHE_DB")
+        # Entries past max_stale are kept a while longer as the fallback for slow regenerations
+        retention = 4 * max_stale
+        cache = TieredCache(
+            LRUCache(maxsize=int(os.getenv("RECOMMENDATION_CACHE_SIZE", "10000")), ttl=retention),
+            SQLiteCache(db_path, table="recommendations", ttl=retention) if db_path else None
+        )
+        _recommendation_service = RecommendationService(
+            cache=cache,
+            fresh_for=float(os.getenv("RECOMMENDATION_FRESH_SECONDS", str(24 * 3600))),
+            max_stale=max_stale
+        )
+        register_cache("recommendations", _recommendation_service)
+    return _recommendation_service
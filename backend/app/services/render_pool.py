@@ -0,0 +1,171 @@
+"""Chart rasterization in a pool of worker processes.
+
+Encoding a PNG holds the GIL for most of its run, so rasterizing in the API
+process competes with every other request. Workers are spawned once, build
+their own ChartRenderer and warm its background cache at startup, then only
+receive planet longitudes and the ascendant and send back encoded bytes.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+from app.services.chart_renderer import DEFAULT_THEME, SUPERSAMPLE, ChartRenderer, get_chart_renderer
+from app.services.ephemeris import run_ephemeris
+from app.core.cache import register_cache
+
+logger = logging.getLogger(__name__)
+
+# Renderer owned by a worker process
+_worker_renderer: Optional[ChartRenderer] = None
+
+
+def _init_worker(size: int):
+    global _worker_renderer
+    # Headless backend for any matplotlib use in the worker
+    import matplotlib
+    matplotlib.use("Agg")
+    _worker_renderer = ChartRenderer(size=size)
+    _worker_renderer.background(size * SUPERSAMPLE, DEFAULT_THEME)
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def _render_raster(
+    planet_positions: Dict[str, float],
+    ascendant: float,
+    image_format: str,
+    size: Optional[int],
+    theme: str,
+    dpi: int
+) -> bytes:
+    return _worker_renderer.render_raster(planet_positions, ascendant, image_format, size, theme, dpi)
+
+
+class RenderQueueFull(Exception):
+    """Raised when the render queue is at capacity"""
+
+
+class RenderPool:
+    """Bounded queue of chart rasterization jobs in front of worker processes.
+
+    At most ``max_pending`` jobs are queued or running; further jobs are
+    rejected with RenderQueueFull instead of piling up in memory. A job that
+    does not finish within ``timeout`` seconds raises asyncio.TimeoutError;
+    if it has not started yet it is also dropped from the queue. With
+    ``workers=0`` jobs run on the ephemeris thread pool instead.
+    """
+
+    def __init__(self, workers: int, max_pending: int = 64, timeout: float = 10.0, size: int = 1200):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.size = size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self.counters = {"completed": 0, "rejected": 0, "timeouts": 0, "restarts": 0}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.size,)
+            )
+        return self._executor
+
+    def start(self):
+        """Spawn and warm every worker so the first charts do not pay for it"""
+        if self.workers:
+            executor = self._get_executor()
+            for _ in range(self.workers):
+                executor.submit(_warm_up)
+
+    async def render_raster(
+        self,
+        planet_positions: Dict[str, float],
+        ascendant: float,
+        image_format: str = "PNG",
+        size: Optional[int] = None,
+        theme: str = DEFAULT_THEME,
+        dpi: int = 300
+    ) -> bytes:
+        """Return the chart encoded as ``image_format`` (PNG or WEBP)"""
+        if self._pending >= self.max_pending:
+            self.counters["rejected"] += 1
+            raise RenderQueueFull(f"Chart render queue is full ({self.max_pending} jobs)")
+
+        self._pending += 1
+        executor = None
+        try:
+            if not self.workers:
+                future = asyncio.ensure_future(run_ephemeris(
+                    get_chart_renderer().render_raster, planet_positions, ascendant, image_format, size, theme, dpi
+                ))
+            else:
+                executor = self._get_executor()
+                future = asyncio.wrap_future(executor.submit(
+                    _render_raster, dict(planet_positions), float(ascendant), image_format, size, theme, dpi
+                ))
+            try:
+                content = await asyncio.wait_for(future, timeout=self.timeout)
+            except asyncio.TimeoutError:
+                self.counters["timeouts"] += 1
+                logger.warning(f"Chart render timed out after {self.timeout}s")
+                raise
+            self.counters["completed"] += 1
+            return content
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool for the next
+            # job, once, however many jobs the broken pool fails
+            if executor is not None and self._executor is executor:
+                logger.error("Chart render pool broke; restarting it")
+                self.counters["restarts"] += 1
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            raise
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict:
+        return {**self.counters, "workers": self.workers, "pending": self._pending, "max_pending": self.max_pending}
+
+
+_render_pool: Optional[RenderPool] = None
+
+
+def get_render_pool() -> RenderPool:
+    """Return the process-wide render pool.
+
+    CHART_RENDER_WORKERS sets the number of worker processes (0 renders on
+    threads in this process), CHART_RENDER_QUEUE the queued job limit and
+    CHART_RENDER_TIMEOUT the per-job timeout in seconds.
+    """
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = RenderPool(
+            workers=int(os.getenv("CHART_RENDER_WORKERS", str(min(4, os.cpu_count() or 1)))),
+            max_pending=int(os.getenv("CHART_RENDER_QUEUE", "64")),
+            timeout=float(os.getenv("CHART_RENDER_TIMEOUT", "10")),
+            size=int(os.getenv("CHART_SIZE", "1200"))
+        )
+        register_cache("render_pool", _render_pool)
+    return _render_pool
+
+
+def shutdown_render_pool():
+    """Stop the worker processes, if they were started"""
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown()
+        _render_pool = None
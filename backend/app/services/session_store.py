@@ -0,0 +1,242 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+from app.core.cache import register_cache
+
+logger = logging.getLogger(__name__)
+
+# Messages are stored as (role code, content) tuples
+ROLES = ("user", "assistant", "system")
+ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+
+# Rough per-message overhead of a tuple, an int and a str header, in bytes
+MESSAGE_OVERHEAD = 120
+
+
+class SessionStore(ABC):
+    """Chat history per session"""
+
+    @abstractmethod
+    def get_history(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """Return the last ``limit`` messages (all when None) as role/content dicts"""
+
+    @abstractmethod
+    def append(self, session_id: str, role: str, content: str):
+        """Add a message to the end of a session"""
+
+    @abstractmethod
+    def clear(self, session_id: str):
+        """Forget a session's history"""
+
+    @abstractmethod
+    def stats(self) -> Dict:
+        """Counters for the metrics endpoint"""
+
+
+class _Session:
+    __slots__ = ("messages", "last_access", "size")
+
+    def __init__(self, max_messages: int):
+        self.messages: Deque[Tuple[int, str]] = deque(maxlen=max_messages)
+        self.last_access = time.time()
+        self.size = 0
+
+
+class InMemorySessionStore(SessionStore):
+    """Bounded in-process store with LRU eviction, an idle TTL and a global memory cap.
+
+    Each session keeps at most ``max_messages``; when the store holds more
+    than ``max_sessions`` sessions or ``max_bytes`` of message text, the
+    least recently used sessions are dropped first.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 10000,
+        max_messages: int = 50,
+        idle_ttl: float = 24 * 3600,
+        max_bytes: int = 64 * 1024 * 1024
+    ):
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.evictions = 0
+
+    def get_history(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        with self._lock:
+            self._evict()
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            session.last_access = time.time()
+            self._sessions.move_to_end(session_id)
+            messages = list(session.messages)
+        if limit is not None:
+            messages = messages[-limit:] if limit else []
+        return [{"role": ROLES[code], "content": content} for code, content in messages]
+
+    def append(self, session_id: str, role: str, content: str):
+        size = len(content.encode("utf-8")) + MESSAGE_OVERHEAD
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _Session(self.max_messages)
+            if len(session.messages) == session.messages.maxlen:
+                oldest = session.messages[0]
+                dropped = len(oldest[1].encode("utf-8")) + MESSAGE_OVERHEAD
+                session.size -= dropped
+                self._bytes -= dropped
+            session.messages.append((ROLE_CODES[role], content))
+            session.size += size
+            session.last_access = time.time()
+            self._bytes += size
+            self._sessions.move_to_end(session_id)
+            self._evict()
+
+    def clear(self, session_id: str):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self._bytes -= session.size
+
+    def _evict(self):
+        # Idle sessions sit at the LRU end, so stop at the first active one
+        cutoff = time.time() - self.idle_ttl
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if (
+                session.last_access >= cutoff
+                and len(self._sessions) <= self.max_sessions
+                and self._bytes <= self.max_bytes
+            ):
+                break
+            self._sessions.popitem(last=False)
+            self._bytes -= session.size
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        return {
+            "backend": "memory",
+            "sessions": len(self._sessions),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions
+        }
+
+
+class SQLiteSessionStore(SessionStore):
+    """Message log in SQLite, shared by all workers and kept across restarts.
+
+    Each append trims its session to the newest ``max_messages`` rows and
+    clearing a session deletes its rows. Sessions idle for longer than
+    ``idle_ttl`` are compacted away every ``compact_every`` appends.
+    """
+
+    # Written by earlier versions to clear a session; reads still skip past it
+    CLEAR_MARKER = -1
+
+    def __init__(self, path: str, max_messages: int = 50, idle_ttl: float = 24 * 3600, compact_every: int = 1000):
+        self.path = path
+        self.max_messages = max_messages
+        self.idle_ttl = idle_ttl
+        self.compact_every = compact_every
+        self._appends = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS chat_messages ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, "
+                "role INTEGER NOT NULL, content TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS chat_messages_session ON chat_messages (session_id, seq)"
+            )
+            self._connection.commit()
+
+    def get_history(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT role, content FROM chat_messages WHERE session_id = ? AND seq > "
+                "(SELECT COALESCE(MAX(seq), 0) FROM chat_messages WHERE session_id = ? AND role = ?) "
+                "ORDER BY seq DESC LIMIT ?",
+                (session_id, session_id, self.CLEAR_MARKER, -1 if limit is None else limit)
+            ).fetchall()
+        return [{"role": ROLES[role], "content": content} for role, content in reversed(rows)]
+
+    def append(self, session_id: str, role: str, content: str):
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO chat_messages (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                (session_id, ROLE_CODES[role], content, time.time())
+            )
+            self._connection.execute(
+                "DELETE FROM chat_messages WHERE session_id = ? AND seq NOT IN "
+                "(SELECT seq FROM chat_messages WHERE session_id = ? ORDER BY seq DESC LIMIT ?)",
+                (session_id, session_id, self.max_messages)
+            )
+            self._connection.commit()
+            self._appends += 1
+            if self._appends % self.compact_every == 0:
+                self._compact()
+
+    def clear(self, session_id: str):
+        with self._lock:
+            self._connection.execute("DELETE FROM chat_messages WHERE session_id = ?", (session_id,))
+            self._connection.commit()
+
+    def _compact(self):
+        cursor = self._connection.execute(
+            "DELETE FROM chat_messages WHERE session_id IN ("
+            "SELECT session_id FROM chat_messages GROUP BY session_id HAVING MAX(created_at) < ?)",
+            (time.time() - self.idle_ttl,)
+        )
+        self._connection.commit()
+        logger.info(f"Compacted {cursor.rowcount} idle chat messages")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            sessions, messages = self._connection.execute(
+                "SELECT COUNT(DISTINCT session_id), COUNT(*) FROM chat_messages"
+            ).fetchone()
+        return {"backend": "sqlite", "path": self.path, "sessions": sessions, "messages": messages}
+
+
+_session_store: Optional[SessionStore] = None
+
+
+def get_session_store() -> SessionStore:
+    """Return the process-wide chat session store.
+
+    CHAT_SESSION_BACKEND selects ``memory`` (default) or ``sqlite``, the
+    latter stored at CHAT_SESSION_DB.
+    """
+    global _session_store
+    if _session_store is None:
+        idle_ttl = float(os.getenv("CHAT_SESSION_IDLE_TTL", str(24 * 3600)))
+        max_messages = int(os.getenv("CHAT_SESSION_MAX_MESSAGES", "50"))
+        if os.getenv("CHAT_SESSION_BACKEND", "memory") == "sqlite":
+            _session_store = SQLiteSessionStore(
+                os.getenv("CHAT_SESSION_DB", "chat_sessions.db"),
+                max_messages=max_messages,
+                idle_ttl=idle_ttl
+            )
+        else:
+            _session_store = InMemorySessionStore(
+                max_sessions=int(os.getenv("CHAT_SESSION_MAX", "10000")),
+                max_messages=max_messages,
+                idle_ttl=idle_ttl,
+                max_bytes=int(os.getenv("CHAT_SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+            )
+        register_cache("chat_sessions", _session_store)
+    return _session_store
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, NamedTuple, Optional, Tuple
+from app.models.horoscope_schemas import TransitInfo
+from app.services.horoscope_service import HoroscopeService, get_horoscope_service
+from app.services.ephemeris import run_ephemeris
+
+logger = logging.getLogger(__name__)
+
+
+class TransitSnapshot(NamedTuple):
+    bucket: int
+    computed_for: datetime
+    transits: Tuple[TransitInfo, ...]
+
+
+class TransitSnapshotCache:
+    """Process-wide transit positions shared by every request in the same time bucket.
+
+    Time is divided into buckets of ``granularity_seconds``; the transits of a
+    bucket are computed once, at the bucket's start, and handed out as an
+    immutable tuple. A background task computes the next bucket
+    ``refresh_ahead_seconds`` before it begins so requests never wait on the
+    ephemeris.
+    """
+
+    def __init__(
+        self,
+        horoscope_service: HoroscopeService,
+        granularity_seconds: int = 60,
+        refresh_ahead_seconds: float = 5.0
+    ):
+        if granularity_seconds <= 0:
+            raise ValueError("granularity_seconds must be positive")
+        self.horoscope_service = horoscope_service
+        self.granularity_seconds = granularity_seconds
+        self.refresh_ahead_seconds = min(refresh_ahead_seconds, granularity_seconds / 2)
+        self._snapshots: Dict[int, TransitSnapshot] = {}
+        self._lock = threading.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def bucket_for(self, timestamp: float) -> int:
+        return int(timestamp // self.granularity_seconds)
+
+    def bucket_start(self, bucket: int) -> datetime:
+        return datetime.fromtimestamp(bucket * self.granularity_seconds, tz=timezone.utc)
+
+    def snapshot(self) -> TransitSnapshot:
+        """Return the snapshot for the current bucket, computing it on a miss"""
+        bucket = self.bucket_for(time.time())
+        snapshot = self._snapshots.get(bucket)
+        if snapshot is None:
+            snapshot = self._compute(bucket)
+        return snapshot
+
+    def get(self) -> Tuple[TransitInfo, ...]:
+        """Return the current transits"""
+        return self.snapshot().transits
+
+    def _compute(self, bucket: int) -> TransitSnapshot:
+        with self._lock:
+            snapshot = self._snapshots.get(bucket)
+            if snapshot is not None:
+                return snapshot
+
+            computed_for = self.bucket_start(bucket)
+            transits = tuple(self.horoscope_service.calculate_current_transits(computed_for))
+            snapshot = TransitSnapshot(bucket=bucket, computed_for=computed_for, transits=transits)
+
+            # Keep only the snapshots that can still be requested
+            self._snapshots = {
+                key: value for key, value in self._snapshots.items() if key >= bucket - 1
+            }
+            self._snapshots[bucket] = snapshot
+            logger.debug(f"Computed transit snapshot for {computed_for.isoformat()}")
+            return snapshot
+
+    async def _refresh_loop(self):
+        while True:
+            next_bucket = self.bucket_for(time.time()) + 1
+            next_start = next_bucket * self.granularity_seconds
+            await asyncio.sleep(max(0.0, next_start - self.refresh_ahead_seconds - time.time()))
+            try:
+                await run_ephemeris(self._compute, next_bucket)
+            except Exception as e:
+                logger.error(f"Error refreshing transit snapshot: {str(e)}", exc_info=True)
+            # Do not start on the following bucket before this one has begun
+            await asyncio.sleep(max(0.0, next_start - time.time()))
+
+    def start(self):
+        """Start the background refresher on the running event loop"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Cancel the background refresher"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+
+_transit_snapshot: Optional[TransitSnapshotCache] = None
+
+
+def get_transit_snapshot() -> TransitSnapshotCache:
+    """Return the process-wide transit snapshot cache"""
+    global _transit_snapshot
+    if _transit_snapshot is None:
+        _transit_snapshot = TransitSnapshotCache(
+            get_horoscope_service(),
+            granularity_seconds=int(os.getenv("TRANSIT_SNAPSHOT_SECONDS", "60")),
+            refresh_ahead_seconds=float(os.getenv("TRANSIT_SNAPSHOT_REFRESH_AHEAD", "5"))
+        )
+    return _transit_snapshot
@@ -0,0 +1,201 @@
+"""Transit summaries for weekly, monthly and yearly horoscopes.
+
+A window (the current ISO week, calendar month or calendar year, in UTC) is
+sampled on a regular time grid with one batched ephemeris call. Sign
+ingresses and retrograde/direct stations are found where the sampled sign
+or speed changes sign and timed by linear interpolation between the two
+samples; peak aspects between transiting planets are the samples where the
+orb reaches a local minimum. The summary is the same for every user, so it
+is computed once per window and cached.
+"""
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+import swisseph as swe
+from app.core.cache import MISSING, LRUCache, register_cache
+from app.models.horoscope_schemas import (
+    Planet, PeakAspect, SignIngress, Station, TimeFrame, TransitWindow, ZodiacSign
+)
+from app.services.aspects import AspectTable, aspect_matrix, get_aspect_table
+from app.services.ephemeris import GRAHAS, EphemerisEngine, get_ephemeris_engine, julian_day
+
+logger = logging.getLogger(__name__)
+
+UNIX_EPOCH_JD = 2440587.5
+MOON_INDEX = GRAHAS.index("moon")
+# The mean nodes never station, and Rahu and Ketu are always in opposition
+NODE_INDEXES = (GRAHAS.index("rahu"), GRAHAS.index("ketu"))
+
+
+class WindowSpec(NamedTuple):
+    step_days: float
+    # The Moon changes sign every 2.5 days; only weekly windows report it
+    include_moon: bool
+
+
+WINDOW_SPECS = {
+    TimeFrame.WEEKLY: WindowSpec(step_days=1 / 12, include_moon=True),
+    TimeFrame.MONTHLY: WindowSpec(step_days=0.25, include_moon=False),
+    TimeFrame.YEARLY: WindowSpec(step_days=1.0, include_moon=False),
+}
+
+
+def window_bounds(time_frame: TimeFrame, moment: datetime) -> Tuple[datetime, datetime]:
+    """Start and end (UTC) of the week, month or year containing ``moment``"""
+    day = datetime(moment.year, moment.month, moment.day, tzinfo=timezone.utc)
+    if time_frame == TimeFrame.WEEKLY:
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7)
+    if time_frame == TimeFrame.MONTHLY:
+        start = day.replace(day=1)
+        if start.month == 12:
+            return start, start.replace(year=start.year + 1, month=1)
+        return start, start.replace(month=start.month + 1)
+    if time_frame == TimeFrame.YEARLY:
+        start = day.replace(month=1, day=1)
+        return start, start.replace(year=start.year + 1)
+    raise ValueError(f"No transit window for {time_frame.value} horoscopes")
+
+
+def from_julian_day(jd: float) -> datetime:
+    return datetime.fromtimestamp((jd - UNIX_EPOCH_JD) * 86400, tz=timezone.utc)
+
+
+class TransitWindowCache:
+    """Per-window transit summaries, shared by every user in the window"""
+
+    def __init__(self, ephemeris: EphemerisEngine, aspect_table: AspectTable, maxsize: int = 64):
+        self.ephemeris = ephemeris
+        self.aspect_table = aspect_table
+        self.cache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def get(self, time_frame: TimeFrame, moment: Optional[datetime] = None) -> TransitWindow:
+        """Return the summary of the window containing ``moment`` (default now)"""
+        start, end = window_bounds(time_frame, moment or datetime.now(timezone.utc))
+        key = (time_frame.value, start.isoformat())
+        window = self.cache.get(key)
+        if window is not MISSING:
+            return window
+        with self._lock:
+            window = self.cache.get(key)
+            if window is MISSING:
+                window = self.compute(time_frame, start, end)
+                self.cache.set(key, window)
+            return window
+
+    def compute(self, time_frame: TimeFrame, start: datetime, end: datetime) -> TransitWindow:
+        spec = WINDOW_SPECS[time_frame]
+        start_jd = julian_day(start)
+        steps = int(round((julian_day(end) - start_jd) / spec.step_days))
+        jds = start_jd + np.arange(steps + 1) * spec.step_days
+
+        # Same ayanamsa as the instantaneous transits
+        positions = self.ephemeris.positions(jds, sidereal=True, ayanamsa=swe.SIDM_FAGAN_BRADLEY)
+        longitudes, speeds = positions.longitudes, positions.speeds
+        planets = [
+            index for index in range(len(GRAHAS))
+            if not np.isnan(longitudes[:, index]).any() and (spec.include_moon or index != MOON_INDEX)
+        ]
+
+        window = TransitWindow(
+            time_frame=time_frame,
+            start=start,
+            end=end,
+            ingresses=self._ingresses(jds, longitudes, speeds, planets),
+            stations=self._stations(jds, longitudes, speeds, planets),
+            aspects=self._peak_aspects(jds, longitudes, speeds, planets)
+        )
+        logger.info(
+            f"Computed {time_frame.value} transit window from {start.date()}: {len(window.ingresses)} ingresses, "
+            f"{len(window.stations)} stations, {len(window.aspects)} peak aspects"
+        )
+        return window
+
+    def _ingresses(self, jds: np.ndarray, longitudes: np.ndarray, speeds: np.ndarray, planets: List[int]) -> List[SignIngress]:
+        signs = list(ZodiacSign)
+        unwrapped = np.unwrap(longitudes[:, planets], period=360.0, axis=0)
+        sign_numbers = np.floor(unwrapped / 30.0).astype(np.int64)
+        ingresses = []
+        for row, column in zip(*np.nonzero(np.diff(sign_numbers, axis=0))):
+            before, after = sign_numbers[row, column], sign_numbers[row + 1, column]
+            boundary = max(before, after) * 30.0
+            fraction = (boundary - unwrapped[row, column]) / (unwrapped[row + 1, column] - unwrapped[row, column])
+            planet = planets[column]
+            ingresses.append(SignIngress(
+                planet=Planet(GRAHAS[planet]),
+                from_sign=signs[before % 12],
+                to_sign=signs[after % 12],
+                time=from_julian_day(jds[row] + fraction * (jds[row + 1] - jds[row])),
+                is_retrograde=bool(after < before)
+            ))
+        return sorted(ingresses, key=lambda ingress: ingress.time)
+
+    def _stations(self, jds: np.ndarray, longitudes: np.ndarray, speeds: np.ndarray, planets: List[int]) -> List[Station]:
+        signs = list(ZodiacSign)
+        columns = [planet for planet in planets if planet not in NODE_INDEXES]
+        planet_speeds = speeds[:, columns]
+        direction = np.sign(planet_speeds)
+        stations = []
+        for row, column in zip(*np.nonzero(np.diff(direction, axis=0))):
+            before, after = planet_speeds[row, column], planet_speeds[row + 1, column]
+            fraction = before / (before - after)
+            planet = columns[column]
+            longitude = longitudes[row, planet] + fraction * (
+                (longitudes[row + 1, planet] - longitudes[row, planet] + 180.0) % 360.0 - 180.0
+            )
+            longitude %= 360.0
+            stations.append(Station(
+                planet=Planet(GRAHAS[planet]),
+                turns="retrograde" if after < 0 else "direct",
+                time=from_julian_day(jds[row] + fraction * (jds[row + 1] - jds[row])),
+                zodiac_sign=signs[int(longitude // 30) % 12],
+                degree=float(longitude % 30)
+            ))
+        return sorted(stations, key=lambda station: station.time)
+
+    def _peak_aspects(self, jds: np.ndarray, longitudes: np.ndarray, speeds: np.ndarray, planets: List[int]) -> List[PeakAspect]:
+        matrix = aspect_matrix(longitudes[:, planets], longitudes[:, planets], table=self.aspect_table)
+        orbs = np.where(matrix.aspect >= 0, matrix.orb, np.inf)
+
+        # Each pair once; the orb falls to a minimum inside the window
+        pairs = np.triu(np.ones((len(planets), len(planets)), dtype=bool), k=1)
+        peaks = (
+            pairs
+            & np.isfinite(orbs[1:-1])
+            & (orbs[1:-1] < orbs[:-2])
+            & (orbs[1:-1] <= orbs[2:])
+        )
+        aspects = []
+        for row, first, second in zip(*np.nonzero(peaks)):
+            sample = row + 1
+            aspects.append(PeakAspect(
+                first=Planet(GRAHAS[planets[first]]),
+                second=Planet(GRAHAS[planets[second]]),
+                aspect=self.aspect_table.names[matrix.aspect[sample, first, second]],
+                time=from_julian_day(jds[sample]),
+                orb=float(orbs[sample, first, second])
+            ))
+        return sorted(aspects, key=lambda aspect: aspect.time)
+
+    def stats(self) -> Dict:
+        return self.cache.stats()
+
+
+_transit_windows: Optional[TransitWindowCache] = None
+
+
+def get_transit_windows() -> TransitWindowCache:
+    """Return the process-wide transit window cache (TRANSIT_WINDOW_CACHE_SIZE windows)"""
+    global _transit_windows
+    if _transit_windows is None:
+        _transit_windows = TransitWindowCache(
+            get_ephemeris_engine(),
+            get_aspect_table(),
+            maxsize=int(os.getenv("TRANSIT_WINDOW_CACHE_SIZE", "64"))
+        )
+        register_cache("transit_windows", _transit_windows)
+    return _transit_windows
@@ -1,17 +1,37 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from app.api.router import router
 from app.core.logging_config import setup_logging
 from app.routers import chatbot_router, recommendation_router, user_router
+from app.services.transit_snapshot import get_transit_snapshot
+from app.services.llm_gateway import close_llm_gateway
+from app.services.render_pool import get_render_pool, shutdown_render_pool
+from app.services.job_queue import get_job_queue
+from app.services.event_index import get_event_index
 
 # Setup logging
 setup_logging()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start background workers
+    get_transit_snapshot().start()
+    get_render_pool().start()
+    get_job_queue().start()
+    get_event_index().start_build()
+    yield
+    await get_job_queue().stop()
+    await get_transit_snapshot().stop()
+    await close_llm_gateway()
+    shutdown_render_pool()
+
 app = FastAPI(
     title="Vedic Astrology API",
     description="API for Kundali Generation and Horoscope Predictions",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
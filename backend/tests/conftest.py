@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The app package lives next to this directory; services read their settings at import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+os.environ.setdefault("CHART_RENDER_WORKERS", "0")
@@ -0,0 +1,68 @@
+import numpy as np
+from app.services.aspects import DEFAULT_TABLE, AspectTable, aspect_matrix, find_aspects
+
+
+def aspect_name(matrix, *index):
+    aspect = matrix.aspect[index]
+    return None if aspect < 0 else DEFAULT_TABLE.names[aspect]
+
+
+def test_finds_each_aspect():
+    matrix = aspect_matrix([10.0], [12.0, 71.0, 98.0, 131.0, 188.0, 45.0])
+    assert [aspect_name(matrix, 0, column) for column in range(6)] == [
+        "conjunction", "sextile", "square", "trine", "opposition", None
+    ]
+    np.testing.assert_allclose(matrix.orb[0, :5], [2.0, 1.0, 2.0, 1.0, 2.0])
+
+
+def test_wraps_around_zero_degrees():
+    matrix = aspect_matrix([359.0], [3.0, 182.0])
+    assert aspect_name(matrix, 0, 0) == "conjunction"
+    assert matrix.separation[0, 0] == 4.0
+    assert aspect_name(matrix, 0, 1) == "opposition"
+    assert matrix.orb[0, 1] == 3.0
+
+
+def test_tightest_aspect_wins():
+    table = AspectTable({"conjunction": (0, 40), "semisextile": (30, 5)})
+    matrix = aspect_matrix([0.0], [28.0], table=table)
+    assert table.names[matrix.aspect[0, 0]] == "semisextile"
+
+
+def test_missing_longitudes_have_no_aspect():
+    matrix = aspect_matrix([np.nan, 0.0], [0.0])
+    assert matrix.aspect[0, 0] == -1
+    assert matrix.aspect[1, 0] >= 0
+
+
+def test_applying_and_separating():
+    # A fast planet 2 degrees behind a natal point closes in; 2 degrees past it, it pulls away
+    behind = aspect_matrix([8.0], [10.0], speeds_a=[1.0])
+    past = aspect_matrix([12.0], [10.0], speeds_a=[1.0])
+    assert behind.applying[0, 0]
+    assert not past.applying[0, 0]
+    # Retrograde motion reverses it, across 0 degrees too
+    retrograde = aspect_matrix([1.0], [359.0], speeds_a=[-1.0])
+    assert retrograde.applying[0, 0]
+    # Beyond the exact angle of a square, the separation must shrink to apply
+    wide_square = aspect_matrix([0.0], [93.0], speeds_a=[1.0])
+    assert wide_square.applying[0, 0]
+    assert not aspect_matrix([0.0], [87.0], speeds_a=[1.0]).applying[0, 0]
+
+
+def test_broadcasts_a_batch_of_charts():
+    transits = np.array([[0.0, 90.0, 200.0]])
+    natal = np.array([[0.0, 120.0], [180.0, 270.0]])
+    matrix = aspect_matrix(transits, natal)
+    assert matrix.aspect.shape == (2, 3, 2)
+    for row in range(2):
+        single = aspect_matrix(transits[0], natal[row])
+        np.testing.assert_array_equal(matrix.aspect[row], single.aspect)
+        np.testing.assert_allclose(matrix.orb[row], single.orb)
+
+
+def test_find_aspects_reports_each_pair_once():
+    aspects = find_aspects([0.0, 91.0, 181.0])
+    pairs = [(aspect.first, aspect.second, aspect.aspect) for aspect in aspects]
+    assert sorted(pairs) == [(0, 1, "square"), (0, 2, "opposition"), (1, 2, "square")]
+    assert [aspect.orb for aspect in aspects] == sorted(aspect.orb for aspect in aspects)
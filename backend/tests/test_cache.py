@@ -0,0 +1,43 @@
+import time
+from app.core.cache import MISSING, LRUCache, SQLiteCache, TieredCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_entries_expire(tmp_path):
+    for cache in (LRUCache(), SQLiteCache(str(tmp_path / "cache.db"))):
+        cache.set("key", None, ttl=0.05)
+        assert cache.get("key") is None
+        time.sleep(0.1)
+        assert cache.get("key") is MISSING
+
+
+def test_promoted_entry_keeps_its_remaining_ttl(tmp_path):
+    path = str(tmp_path / "shared.db")
+    writer = TieredCache(LRUCache(), SQLiteCache(path))
+    reader = TieredCache(LRUCache(), SQLiteCache(path))
+
+    # A negative result cached by one worker and read by another
+    writer.set("nowhere, xx", None, ttl=0.2)
+    assert reader.get("nowhere, xx") is None
+    time.sleep(0.3)
+    assert reader.get("nowhere, xx") is MISSING
+    assert len(reader.memory) == 0
+
+
+def test_promoted_entry_respects_the_memory_ttl(tmp_path):
+    path = str(tmp_path / "shared.db")
+    TieredCache(LRUCache(), SQLiteCache(path)).set("key", "value")
+    reader = TieredCache(LRUCache(ttl=0.05), SQLiteCache(path))
+    assert reader.get("key") == "value"
+    time.sleep(0.1)
+    assert reader.memory.get("key") is MISSING
@@ -0,0 +1,69 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.api.endpoints.kundali import negotiate_chart_format
+from app.services.chart_store import get_chart_store
+from main import app
+
+POSITIONS = {"Sun": 10.0, "Moon": 95.5, "Mars": 200.25}
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def chart_id():
+    return get_chart_store().put(POSITIONS, 12.0)
+
+
+def test_chart_ids_are_content_addressed():
+    store = get_chart_store()
+    assert store.put(POSITIONS, 12.0) == store.put(dict(reversed(list(POSITIONS.items()))), 12.00001)
+    assert store.put(POSITIONS, 13.0) != store.put(POSITIONS, 12.0)
+
+
+def test_etag_follows_the_normalized_variant_key(chart_id):
+    store = get_chart_store()
+    assert store.etag(chart_id, "png") == store.etag(chart_id, "png", size=store.renderer.size, dpi=300)
+    # SVG is resolution independent
+    assert store.etag(chart_id, "svg", dpi=72) == store.etag(chart_id, "svg", dpi=600)
+    tags = {
+        store.etag(chart_id, "png"), store.etag(chart_id, "webp"), store.etag(chart_id, "png", size=512),
+        store.etag(chart_id, "png", dpi=150), store.etag(chart_id, "png", theme="dark")
+    }
+    assert len(tags) == 5
+
+
+@pytest.mark.parametrize("accept,expected", [
+    (None, "png"),
+    ("image/svg+xml", "svg"),
+    ("image/webp,image/png;q=0.8", "webp"),
+    ("image/*;q=0.5,image/png", "png"),
+    ("text/html", None),
+])
+def test_format_negotiation(accept, expected):
+    assert negotiate_chart_format(accept) == expected
+
+
+def test_conditional_get_answers_304_without_rendering(client, chart_id):
+    store = get_chart_store()
+    response = client.get(f"/api/kundali/charts/{chart_id}?format=png&size=300")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    etag = response.headers["etag"]
+    assert etag == store.etag(chart_id, "png", size=512)
+
+    store.variants.clear()
+    response = client.get(f"/api/kundali/charts/{chart_id}?format=png&size=300", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert len(store.variants) == 0
+
+    response = client.get(f"/api/kundali/charts/{chart_id}?format=png&size=300", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+
+def test_unknown_and_unacceptable_charts(client, chart_id):
+    assert client.get("/api/kundali/charts/" + "0" * 32, headers={"If-None-Match": "*"}).status_code == 404
+    assert client.get(f"/api/kundali/charts/{chart_id}", headers={"Accept": "text/html"}).status_code == 406
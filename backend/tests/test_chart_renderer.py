@@ -0,0 +1,32 @@
+import threading
+from app.services.chart_renderer import CHART_SIZES, SUPERSAMPLE, ChartRenderer, chart_size
+
+POSITIONS = {"Sun": 10.0, "Moon": 95.5, "Mars": 200.25}
+
+
+def test_chart_size_rounds_up_to_a_step():
+    assert chart_size(64) == CHART_SIZES[0]
+    assert chart_size(513) == 800
+    assert chart_size(1200) == 1200
+    assert chart_size(4096) == CHART_SIZES[-1]
+
+
+def test_one_canvas_per_thread():
+    renderer = ChartRenderer(size=256)
+    for size in (100, 200, 300):
+        image = renderer.render_image(POSITIONS, 12.0, size=size)
+        assert image.size == (size, size)
+    assert renderer._canvases.canvas.size == (300 * SUPERSAMPLE, 300 * SUPERSAMPLE)
+
+    canvases = []
+    thread = threading.Thread(target=lambda: canvases.append(renderer._canvas(64)))
+    thread.start()
+    thread.join()
+    assert canvases[0] is not renderer._canvases.canvas
+
+
+def test_reused_canvas_does_not_leak_the_previous_chart():
+    renderer = ChartRenderer(size=256)
+    first = renderer.render_raster(POSITIONS, 12.0)
+    renderer.render_raster({"Saturn": 300.0}, 140.0, theme="dark")
+    assert renderer.render_raster(POSITIONS, 12.0) == first
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+import swisseph as swe
+from app.services.ephemeris import GRAHAS, KETU_INDEX, RAHU_INDEX, SWE_BODIES, EphemerisEngine
+
+JDS = [2415020.5, 2447892.25, 2451545.0, 2461000.75]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return EphemerisEngine()
+
+
+def calc(jd, body, sidereal=False, ayanamsa=swe.SIDM_LAHIRI):
+    flags = swe.FLG_SWIEPH | swe.FLG_SPEED
+    if sidereal:
+        swe.set_sid_mode(ayanamsa)
+        flags |= swe.FLG_SIDEREAL
+    position = swe.calc_ut(jd, body, flags)[0]
+    return position[0], position[3]
+
+
+@pytest.mark.parametrize("sidereal,ayanamsa", [(False, swe.SIDM_LAHIRI), (True, swe.SIDM_LAHIRI), (True, swe.SIDM_FAGAN_BRADLEY)])
+def test_positions_match_calc_ut(engine, sidereal, ayanamsa):
+    positions = engine.positions(JDS, sidereal=sidereal, ayanamsa=ayanamsa)
+    assert positions.longitudes.shape == (len(JDS), len(GRAHAS))
+    for row, jd in enumerate(JDS):
+        for column, body in enumerate(SWE_BODIES):
+            longitude, speed = calc(jd, body, sidereal, ayanamsa)
+            assert positions.longitudes[row, column] == pytest.approx(longitude, abs=1e-9)
+            assert positions.speeds[row, column] == pytest.approx(speed, abs=1e-9)
+
+
+def test_ketu_opposes_rahu(engine):
+    positions = engine.positions(JDS, sidereal=True)
+    np.testing.assert_allclose(
+        positions.longitudes[:, KETU_INDEX], (positions.longitudes[:, RAHU_INDEX] + 180.0) % 360.0
+    )
+    np.testing.assert_array_equal(positions.speeds[:, KETU_INDEX], positions.speeds[:, RAHU_INDEX])
+
+
+def test_body_positions_match_positions(engine):
+    positions = engine.positions(JDS, sidereal=True, ayanamsa=swe.SIDM_FAGAN_BRADLEY)
+    columns = [0, 3, KETU_INDEX, 6]
+    longitudes, speeds = engine.body_positions(JDS, columns, sidereal=True, ayanamsa=swe.SIDM_FAGAN_BRADLEY)
+    rows = np.arange(len(JDS))
+    np.testing.assert_allclose(longitudes, positions.longitudes[rows, columns])
+    np.testing.assert_allclose(speeds, positions.speeds[rows, columns])
+
+
+def test_ayanamsa_offset_moves_between_ayanamsas(engine):
+    jd = JDS[2]
+    offset = engine.ayanamsa_offset(jd, swe.SIDM_FAGAN_BRADLEY, swe.SIDM_LAHIRI)
+    fagan = engine.positions([jd], sidereal=True, ayanamsa=swe.SIDM_FAGAN_BRADLEY).longitudes[0]
+    lahiri = engine.positions([jd], sidereal=True, ayanamsa=swe.SIDM_LAHIRI).longitudes[0]
+    np.testing.assert_allclose((fagan + offset) % 360.0, lahiri, atol=1e-6)
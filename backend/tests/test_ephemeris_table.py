@@ -0,0 +1,51 @@
+import struct
+from datetime import datetime, timezone
+import numpy as np
+import pytest
+import swisseph as swe
+from app.services.ephemeris import EphemerisEngine, julian_day
+from app.services.ephemeris_table import HEADER_FORMAT, MAX_ALLOWED_ERROR, ChebyshevEphemeris, build_table
+
+
+@pytest.fixture(scope="module")
+def table_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("ephemeris") / "table.bin")
+    build_table(path, start_year=2024, end_year=2025)
+    return path
+
+
+def test_recorded_error_within_bound(table_path):
+    table = ChebyshevEphemeris(table_path)
+    try:
+        assert 0 < table.max_error <= MAX_ALLOWED_ERROR
+    finally:
+        table.close()
+
+
+@pytest.mark.parametrize("sidereal,ayanamsa", [(False, swe.SIDM_LAHIRI), (True, swe.SIDM_LAHIRI), (True, swe.SIDM_FAGAN_BRADLEY)])
+def test_table_matches_swiss_ephemeris(table_path, sidereal, ayanamsa):
+    table = ChebyshevEphemeris(table_path)
+    try:
+        start = julian_day(datetime(2024, 1, 1, tzinfo=timezone.utc))
+        jds = start + np.random.default_rng(0).uniform(0, 730, 200)
+        assert table.covers(jds, sidereal, ayanamsa)
+        fitted = table.positions(jds, sidereal, ayanamsa)
+        exact = EphemerisEngine().positions(jds, sidereal, ayanamsa)
+        error = np.abs(fitted.longitudes - exact.longitudes)
+        error = np.minimum(error, 360.0 - error)
+        assert error.max() <= MAX_ALLOWED_ERROR
+        np.testing.assert_allclose(fitted.speeds, exact.speeds, atol=1e-2)
+    finally:
+        table.close()
+
+
+def test_table_outside_bound_is_refused(table_path, tmp_path):
+    with open(table_path, "rb") as f:
+        content = bytearray(f.read())
+    fields = list(struct.unpack_from(HEADER_FORMAT, content))
+    fields[-1] = MAX_ALLOWED_ERROR * 2
+    struct.pack_into(HEADER_FORMAT, content, 0, *fields)
+    path = tmp_path / "inaccurate.bin"
+    path.write_bytes(bytes(content))
+    with pytest.raises(ValueError):
+        ChebyshevEphemeris(str(path))
@@ -0,0 +1,84 @@
+from datetime import datetime, timezone
+import numpy as np
+import pytest
+import swisseph as swe
+from app.models.horoscope_schemas import Planet
+from app.services.ephemeris import EphemerisEngine
+from app.services.event_index import (
+    EVENT_KINDS, INGRESS, NAKSHATRA, NAKSHATRA_WIDTH, STATION_DIRECT, STATION_RETROGRADE, EventIndex
+)
+
+START = datetime(2026, 2, 1, tzinfo=timezone.utc)
+END = datetime(2026, 4, 1, tzinfo=timezone.utc)
+# Bisection narrows a 6 hour bracket 24 times, to about a millisecond
+EPSILON_DAYS = 1e-5
+
+
+@pytest.fixture(scope="module")
+def index():
+    event_index = EventIndex(EphemerisEngine(), START, END)
+    event_index.load_or_build()
+    return event_index
+
+
+def around(engine, events, offset):
+    jds = events["jd"] + offset
+    return engine.body_positions(jds, events["planet"], sidereal=True, ayanamsa=swe.SIDM_FAGAN_BRADLEY)
+
+
+@pytest.mark.parametrize("kind,width", [(INGRESS, 30.0), (NAKSHATRA, NAKSHATRA_WIDTH)])
+def test_boundary_crossings_are_timed(index, kind, width):
+    engine = index.ephemeris
+    events = index.events[index.events["kind"] == kind]
+    assert events.size
+    before, _ = around(engine, events, -EPSILON_DAYS)
+    after, _ = around(engine, events, EPSILON_DAYS)
+    division_before = np.floor(before / width).astype(int)
+    division_after = np.floor(after / width).astype(int)
+    assert (division_before != division_after).all()
+    count = 12 if kind == INGRESS else 27
+    np.testing.assert_array_equal(division_after % count, events["value"])
+
+
+def test_stations_are_timed(index):
+    engine = index.ephemeris
+    stations = index.events[np.isin(index.events["kind"], [STATION_RETROGRADE, STATION_DIRECT])]
+    assert stations.size
+    _, before = around(engine, stations, -EPSILON_DAYS * 100)
+    _, after = around(engine, stations, EPSILON_DAYS * 100)
+    retrograde = stations["kind"] == STATION_RETROGRADE
+    assert ((before > 0) & (after < 0) == retrograde).all()
+    assert ((before < 0) & (after > 0) == ~retrograde).all()
+
+
+def test_known_events(index):
+    mercury = [
+        (event.event, event.time.date().isoformat())
+        for event in index.query(START, END, planet=Planet.MERCURY)
+        if event.event.startswith("station")
+    ]
+    assert mercury == [("station_retrograde", "2026-02-26"), ("station_direct", "2026-03-20")]
+    eclipses = index.query(START, END, kind="lunar_eclipse")
+    assert [(event.time.date().isoformat(), event.eclipse_type) for event in eclipses] == [("2026-03-03", "total")]
+
+
+def test_query_is_sorted_and_filtered(index):
+    events = index.query(START, END)
+    assert len(events) == index.events.size
+    assert [event.time for event in events] == sorted(event.time for event in events)
+    middle = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    moon = index.query(START, middle, planet=Planet.MOON, kind="nakshatra", limit=5)
+    assert len(moon) == 5
+    assert all(event.planet.value == "moon" and event.event == EVENT_KINDS[NAKSHATRA] and event.time < middle for event in moon)
+
+
+def test_saved_index_is_loaded(index, tmp_path):
+    path = str(tmp_path / "events.npz")
+    first = EventIndex(index.ephemeris, START, END, path=path)
+    first.load_or_build()
+    assert first.build_seconds is not None
+    second = EventIndex(index.ephemeris, START, END, path=path)
+    second.load_or_build()
+    assert second.build_seconds is None
+    np.testing.assert_array_equal(first.events, second.events)
+    assert [entry.name for entry in tmp_path.iterdir()] == ["events.npz"]
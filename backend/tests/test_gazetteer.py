@@ -0,0 +1,43 @@
+import pytest
+from app.services.gazetteer import DEFAULT_GAZETTEER_PATH, Gazetteer, load_gazetteer, normalize
+
+GEONAMES_LINE = "\t".join([
+    "1275339", "Mumbai", "Mumbai", "Bombay", "19.07283", "72.88261", "P", "PPLA", "IN", "",
+    "16", "", "", "", "12691836", "", "8", "Asia/Kolkata", "2019-01-01"
+])
+
+
+@pytest.fixture(scope="module")
+def default_gazetteer():
+    return load_gazetteer(DEFAULT_GAZETTEER_PATH)
+
+
+def test_normalize_strips_accents_and_punctuation():
+    assert normalize("  São   Paulo! ") == "sao paulo"
+
+
+def test_geonames_dump_resolves_country_names(tmp_path):
+    path = tmp_path / "cities.txt"
+    path.write_text(GEONAMES_LINE + "\n", encoding="utf-8")
+    gazetteer = load_gazetteer(str(path))
+    for country in ("IN", "India", "india", "Bharat"):
+        assert gazetteer.lookup("Mumbai", country) == (19.07283, 72.88261)
+    assert gazetteer.lookup("Mumbai", "Nepal") is None
+
+
+def test_most_populous_entry_wins():
+    gazetteer = Gazetteer()
+    gazetteer.build([("Hyderabad", "IN", 17.38, 78.48, 7000000), ("Hyderabad", "IN", 1.0, 1.0, 10)])
+    assert gazetteer.lookup("hyderabad", "in") == (17.38, 78.48)
+
+
+def test_prefix_lookup(default_gazetteer):
+    names = [name for name, _, _ in default_gazetteer.prefix("new ")]
+    assert "new delhi, in" in names and "new york, us" in names
+
+
+def test_bundled_cities_resolve(default_gazetteer):
+    assert len(default_gazetteer) >= 100
+    latitude, longitude = default_gazetteer.lookup("Bangalore", "India")
+    assert latitude == pytest.approx(12.97, abs=0.01) and longitude == pytest.approx(77.59, abs=0.01)
+    assert default_gazetteer.lookup("New York", "USA") is not None
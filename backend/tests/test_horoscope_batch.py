@@ -0,0 +1,57 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.api.endpoints import horoscope
+from app.models.horoscope_schemas import BirthDetails, TimeFrame
+from app.services.horoscope_service import HoroscopeService
+from app.services.transit_snapshot import get_transit_snapshot
+from main import app
+
+PEOPLE = [
+    BirthDetails(year=1990, month=5, day=5, hour=10, minute=30, city="Mumbai", country="India", gender="M"),
+    BirthDetails(year=1985, month=11, day=23, hour=4, minute=15, city="Delhi", country="India", gender="F"),
+    BirthDetails(year=2001, month=2, day=14, hour=21, minute=0, city="London", country="UK", gender="F")
+]
+
+# Drawn at random on every prediction
+RANDOM_FIELDS = {"lucky_number", "lucky_color", "timestamp"}
+
+
+def comparable(prediction):
+    return prediction.model_dump(exclude=RANDOM_FIELDS)
+
+
+def test_batch_predictions_match_single_predictions():
+    service = HoroscopeService()
+    snapshot = get_transit_snapshot().snapshot()
+
+    batch = service.generate_predictions(TimeFrame.DAILY, PEOPLE, snapshot.transits, snapshot.computed_for)
+    single = [
+        service.generate_prediction(TimeFrame.DAILY, birth_details, snapshot.transits, snapshot.computed_for)
+        for birth_details in PEOPLE
+    ]
+
+    assert [comparable(p) for p in batch] == [comparable(p) for p in single]
+    assert all(p.natal_chart is not None for p in batch)
+
+
+def test_batch_endpoint_keeps_request_order():
+    client = TestClient(app)
+    response = client.post("/api/horoscope/predict/batch", json={
+        "time_frame": "daily",
+        "birth_details": [p.model_dump() for p in PEOPLE]
+    })
+
+    assert response.status_code == 200
+    ascendants = [p["natal_chart"]["ascendant"] for p in response.json()]
+    charts = HoroscopeService().generate_predictions(TimeFrame.DAILY, PEOPLE)
+    assert ascendants == pytest.approx([p.natal_chart.ascendant for p in charts])
+
+
+def test_oversized_batch_is_rejected(monkeypatch):
+    monkeypatch.setattr(horoscope, "BATCH_MAX_ITEMS", 2)
+
+    response = TestClient(app).post("/api/horoscope/predict/batch", json={
+        "time_frame": "daily",
+        "birth_details": [p.model_dump() for p in PEOPLE]
+    })
+    assert response.status_code == 413
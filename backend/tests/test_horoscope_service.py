@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+import pytest
+from app.services.ephemeris import julian_day
+from app.services.horoscope_service import NATAL_AYANAMSA, TRANSIT_AYANAMSA, HoroscopeService
+
+
+@pytest.fixture(scope="module")
+def service():
+    return HoroscopeService()
+
+
+def test_ayanamsa_offset_is_taken_at_the_transit_time(service):
+    moment = datetime(1950, 6, 1, tzinfo=timezone.utc)
+    expected = service.ephemeris.ayanamsa_offset(julian_day(moment), TRANSIT_AYANAMSA, NATAL_AYANAMSA)
+    assert service.natal_ayanamsa_offset(moment) == pytest.approx(expected, abs=1e-9)
+    assert service.natal_ayanamsa_offset(moment) == pytest.approx(0.883, abs=0.001)
+
+
+def test_ayanamsa_offset_is_computed_once_per_day(service, monkeypatch):
+    calls = []
+    real = service.ephemeris.ayanamsa_offset
+
+    def counting(*args):
+        calls.append(args)
+        return real(*args)
+
+    monkeypatch.setattr(service.ephemeris, "ayanamsa_offset", counting)
+    for hour in (1, 9, 17):
+        service.natal_ayanamsa_offset(datetime(2031, 3, 4, hour, tzinfo=timezone.utc))
+    assert len(calls) == 1
+
+
+def test_calculate_aspects_compares_in_the_natal_ayanamsa(service):
+    moment = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    # The transit ayanamsa is about 0.88 degrees larger, so the same transit
+    # sits that much further along against the natal ayanamsa
+    assert service.calculate_aspects(0.0, 9.0, moment) == "conjunction"
+    assert service.calculate_aspects(0.0, 9.5, moment) is None
@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from app.services.job_queue import FAILED, SUCCEEDED, JobQueue, JobQueueFull
+
+
+async def collect(job):
+    return [event["stage"] async for event in job.follow()]
+
+
+def test_job_runs_and_reports_progress():
+    async def work(progress):
+        progress("chart", "Drawing chart")
+        return {"ok": True}
+
+    async def main():
+        queue = JobQueue(workers=1)
+        job = queue.submit("test", work)
+        stages = await collect(job)
+        await queue.stop()
+        return job, stages
+
+    job, stages = asyncio.run(main())
+    assert stages == ["queued", "started", "chart", "complete"]
+    assert job.status == SUCCEEDED
+    assert job.to_dict()["result"] == {"ok": True}
+
+
+def test_failed_job_records_the_error():
+    async def work(progress):
+        raise ValueError("bad birth details")
+
+    async def main():
+        queue = JobQueue(workers=1)
+        job = queue.submit("test", work)
+        stages = await collect(job)
+        await queue.stop()
+        return queue, job, stages
+
+    queue, job, stages = asyncio.run(main())
+    assert stages[-1] == "failed"
+    assert job.status == FAILED
+    assert job.error == "bad birth details"
+    assert queue.counters["failed"] == 1
+
+
+def test_full_queue_rejects_submissions():
+    release = None
+
+    async def work(progress):
+        await release.wait()
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        queue = JobQueue(workers=1, max_pending=2)
+        jobs = [queue.submit("test", work), queue.submit("test", work)]
+        with pytest.raises(JobQueueFull):
+            queue.submit("test", work)
+        release.set()
+        for job in jobs:
+            await collect(job)
+        # Finished jobs free their slot
+        queue.submit("test", work)
+        await queue.stop()
+        return queue
+
+    queue = asyncio.run(main())
+    assert queue.counters["rejected"] == 1
+    assert queue.counters["submitted"] == 3
+
+
+def test_follow_resumes_after_a_sequence_number():
+    async def work(progress):
+        progress("one", "")
+        progress("two", "")
+
+    async def main():
+        queue = JobQueue(workers=1)
+        job = queue.submit("test", work)
+        await collect(job)
+        await queue.stop()
+        return [event["stage"] async for event in job.follow(after=2)]
+
+    assert asyncio.run(main()) == ["two", "complete"]
+
+
+def test_stop_fails_queued_jobs():
+    async def work(progress):
+        await asyncio.sleep(10)
+
+    async def main():
+        queue = JobQueue(workers=1)
+        running = queue.submit("test", work)
+        queued = queue.submit("test", work)
+        await asyncio.sleep(0)
+        await queue.stop()
+        return running, queued
+
+    running, queued = asyncio.run(main())
+    assert running.status == queued.status == FAILED
+    assert queued.error == "Server shutting down"
+
+
+def test_lookup_of_unknown_job():
+    assert JobQueue().get("missing") is None
@@ -0,0 +1,44 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app.api.endpoints import kundali
+from main import app
+
+BIRTH = {"year": 1990, "month": 5, "day": 5, "hour": 10, "minute": 30, "city": "Mumbai", "country": "IN", "gender": "M"}
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def batch(client, items):
+    response = client.post("/api/kundali/batch?insights=rules", json=items)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    return {line["index"]: line for line in lines}
+
+
+def test_invalid_items_fail_alone(client):
+    lines = batch(client, [BIRTH, {**BIRTH, "month": 2, "day": 30}, {**BIRTH, "hour": 25}, {**BIRTH, "city": "Delhi"}])
+
+    assert sorted(lines) == [0, 1, 2, 3]
+    assert lines[0]["status"] == lines[3]["status"] == "ok"
+    assert lines[1] == {"index": 1, "status": "error", "status_code": 400, "error": "day is out of range for month"}
+    assert lines[2]["status_code"] == 400 and lines[2]["error"] == "Invalid hour"
+    assert lines[3]["result"]["kundali_data"]["birth_details"]["location"]["city"] == "Delhi"
+
+
+def test_batch_result_matches_single_generation(client):
+    single = client.post("/api/kundali/generate?insights=rules", json=BIRTH)
+    assert single.status_code == 200
+
+    assert batch(client, [BIRTH])[0]["result"]["kundali_data"] == single.json()["kundali_data"]
+
+
+def test_oversized_batch_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(kundali, "BATCH_MAX_ITEMS", 2)
+
+    response = client.post("/api/kundali/batch", json=[BIRTH] * 3)
+    assert response.status_code == 413
@@ -0,0 +1,139 @@
+import asyncio
+import pytest
+from app.services.chatbot_service import BUSY_REPLY, ERROR_REPLY, ChatbotService
+from app.services.insight_rules import generate_rule_insights
+from app.services.kundali_generator import KundaliGenerator
+from app.services.llm_gateway import CircuitBreaker, LLMGateway, LLMUnavailable, run_with_deadline
+from app.services.session_store import InMemorySessionStore
+
+
+class UpstreamError(Exception):
+    pass
+
+
+def failing_gateway(failure_threshold=2):
+    """A gateway whose provider refuses every request"""
+    gateway = LLMGateway(api_key="test-key", breaker=CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=60))
+
+    async def create(**kwargs):
+        raise UpstreamError("connection refused")
+
+    gateway.client.chat.completions.create = create
+    return gateway
+
+
+def test_deadline_serves_fallback_and_finishes_in_background():
+    finished = []
+
+    async def slow():
+        await asyncio.sleep(0.2)
+        finished.append(True)
+        return "late"
+
+    async def main():
+        result = await run_with_deadline(slow(), 0.01, lambda: "fallback", call_site="test")
+        await asyncio.sleep(0.3)
+        return result
+
+    assert asyncio.run(main()) == "fallback"
+    assert finished == [True]
+
+
+@pytest.mark.parametrize("error", [LLMUnavailable("open"), UpstreamError("boom")])
+def test_errors_serve_fallback(error):
+    async def fail():
+        raise error
+
+    assert asyncio.run(run_with_deadline(fail(), 1.0, lambda: "fallback", call_site="test")) == "fallback"
+
+
+@pytest.mark.parametrize("error,expected", [(LLMUnavailable("open"), "fallback"), (UpstreamError("boom"), "error")])
+def test_provider_errors_can_have_their_own_fallback(error, expected):
+    async def fail():
+        raise error
+
+    result = asyncio.run(run_with_deadline(
+        fail(), 1.0, lambda: "fallback", call_site="test", error_fallback=lambda: "error"
+    ))
+    assert result == expected
+
+
+def test_breaker_opens_after_consecutive_failures():
+    gateway = failing_gateway(failure_threshold=2)
+    messages = [{"role": "user", "content": "hello"}]
+
+    async def main():
+        for _ in range(2):
+            with pytest.raises(UpstreamError):
+                await gateway.complete(messages)
+        assert gateway.breaker.state == "open"
+        with pytest.raises(LLMUnavailable):
+            await gateway.complete(messages)
+
+    asyncio.run(main())
+    assert gateway.counters["upstream_calls"] == 2
+
+
+def test_breaker_lets_a_probe_through_after_reset():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+@pytest.mark.parametrize("calls", [1, 3])
+def test_house_insights_fall_back_to_rules(calls):
+    # First call: the provider error itself; third call: the breaker is open
+    generator = KundaliGenerator(llm=failing_gateway(failure_threshold=2))
+    house_cusps = [(7.5 + calls + 30.0 * house) % 360.0 for house in range(12)]
+    ascendant = house_cusps[0]
+
+    async def main():
+        insights = None
+        for _ in range(calls):
+            insights = await generator.generate_house_insights(house_cusps, ascendant, mode="llm")
+        return insights
+
+    insights = asyncio.run(main())
+    assert insights == generate_rule_insights(house_cusps, ascendant)
+    assert "error" not in insights
+    assert generator.insight_cache.get(generator.insight_cache.signature(house_cusps, ascendant, generator.llm.model)) is None
+
+
+def test_late_chat_reply_keeps_history_in_pairs():
+    gateway = failing_gateway()
+
+    async def complete(messages, **kwargs):
+        await asyncio.sleep(0.1)
+        return "late answer"
+
+    gateway.complete = complete
+    chatbot = ChatbotService(llm=gateway, sessions=InMemorySessionStore())
+    chatbot.deadline = 0.01
+
+    async def main():
+        reply = await chatbot.chat("user", "hello")
+        pending = chatbot.sessions.get_history("user")
+        await asyncio.sleep(0.2)
+        return reply, pending
+
+    reply, pending = asyncio.run(main())
+    assert reply == BUSY_REPLY
+    assert pending == []
+    assert chatbot.sessions.get_history("user") == [
+        {"role": "user", "content": "hello"},
+        {"role": "assistant", "content": "late answer"},
+    ]
+
+
+def test_failed_chat_reply_is_not_stored():
+    chatbot = ChatbotService(llm=failing_gateway(failure_threshold=1), sessions=InMemorySessionStore())
+
+    async def main():
+        # The provider's error, then the breaker it opened
+        return [await chatbot.chat("user", "hello"), await chatbot.chat("user", "hello")]
+
+    assert asyncio.run(main()) == [ERROR_REPLY, BUSY_REPLY]
+    assert chatbot.sessions.get_history("user") == []
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import time
+from app.models.horoscope_schemas import BirthDetails
+from app.services.recommendation_service import RecommendationService
+
+BIRTH = BirthDetails(year=1990, month=5, day=5, hour=10, minute=30, city="Mumbai", country="IN", gender="M")
+
+RECOMMENDATIONS = [
+    {"id": "1", "title": "Rose Quartz", "description": "Opens the heart.", "category": "crystals", "affinity": 80, "rating": 4.5}
+]
+
+
+class FakeLLM:
+    def __init__(self, delay=0.0, error=None):
+        self.calls = 0
+        self.delay = delay
+        self.error = error
+
+    async def complete(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return json.dumps(RECOMMENDATIONS)
+
+
+def test_second_request_is_a_fresh_hit():
+    llm = FakeLLM()
+    service = RecommendationService(llm=llm)
+
+    async def main():
+        first = await service.get_personalized_recommendations(BIRTH)
+        second = await service.get_personalized_recommendations(BIRTH)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == second == RECOMMENDATIONS
+    assert llm.calls == 1
+    assert service.counters["misses"] == 1
+    assert service.counters["fresh_hits"] == 1
+
+
+def test_stale_entry_is_served_and_refreshed_in_background():
+    llm = FakeLLM()
+    service = RecommendationService(llm=llm, fresh_for=60)
+    key = service.birth_key(BIRTH)
+    stale = [{**RECOMMENDATIONS[0], "title": "Old"}]
+    service.cache.set(key, {"transit_key": "outdated", "created_at": time.time(), "recommendations": stale})
+
+    async def main():
+        served = await service.get_personalized_recommendations(BIRTH)
+        await asyncio.gather(*service._refresh_tasks)
+        return served
+
+    assert asyncio.run(main()) == stale
+    assert service.counters["stale_hits"] == 1
+    assert service.counters["refreshes"] == 1
+    assert service.cache.get(key)["recommendations"] == RECOMMENDATIONS
+
+
+def test_expired_entry_is_regenerated_before_responding():
+    llm = FakeLLM()
+    service = RecommendationService(llm=llm, fresh_for=60, max_stale=120)
+    key = service.birth_key(BIRTH)
+    old = time.time() - 600
+    service.cache.set(key, {"transit_key": "outdated", "created_at": old, "recommendations": []})
+
+    assert asyncio.run(service.get_personalized_recommendations(BIRTH)) == RECOMMENDATIONS
+    assert service.counters["misses"] == 1
+    assert llm.calls == 1
+
+
+def test_slow_generation_serves_defaults_and_fills_the_cache():
+    llm = FakeLLM(delay=0.2)
+    service = RecommendationService(llm=llm)
+    service.deadline = 0.01
+
+    async def main():
+        served = await service.get_personalized_recommendations(BIRTH)
+        await asyncio.sleep(0.3)
+        return served
+
+    assert asyncio.run(main()) == service._get_default_recommendations()
+    assert service.counters["fallbacks"] == 1
+    assert service.cache.get(service.birth_key(BIRTH))["recommendations"] == RECOMMENDATIONS
+
+
+def test_provider_error_serves_defaults():
+    service = RecommendationService(llm=FakeLLM(error=RuntimeError("boom")))
+
+    assert asyncio.run(service.get_personalized_recommendations(BIRTH)) == service._get_default_recommendations()
+    assert service.counters["fallbacks"] == 1
@@ -0,0 +1,42 @@
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from app.services.render_pool import RenderPool, RenderQueueFull
+
+POSITIONS = {"Sun": 10.0, "Moon": 95.5}
+PNG_SIGNATURE = b"\x89PNG"
+
+
+def test_thread_rendering_without_workers():
+    pool = RenderPool(workers=0, size=256)
+    content = asyncio.run(pool.render_raster(POSITIONS, 12.0, "PNG"))
+    assert content.startswith(PNG_SIGNATURE)
+    assert pool.counters["completed"] == 1
+
+
+def test_full_queue_is_rejected():
+    pool = RenderPool(workers=0, max_pending=0)
+    with pytest.raises(RenderQueueFull):
+        asyncio.run(pool.render_raster(POSITIONS, 12.0))
+    assert pool.counters["rejected"] == 1
+
+
+def test_broken_pool_is_shut_down_and_replaced():
+    pool = RenderPool(workers=1, size=256)
+    try:
+        broken = pool._get_executor()
+        # Kill the worker, as the OOM killer would
+        with pytest.raises(BrokenProcessPool):
+            broken.submit(os._exit, 1).result(timeout=60)
+        with pytest.raises(BrokenProcessPool):
+            asyncio.run(pool.render_raster(POSITIONS, 12.0))
+        assert pool.counters["restarts"] == 1
+        assert broken._shutdown_thread
+        assert pool._executor is None
+
+        content = asyncio.run(pool.render_raster(POSITIONS, 12.0))
+        assert content.startswith(PNG_SIGNATURE)
+        assert pool._executor is not broken
+    finally:
+        pool.shutdown()
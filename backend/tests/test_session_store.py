@@ -0,0 +1,57 @@
+import pytest
+from app.services.session_store import InMemorySessionStore, SQLiteSessionStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteSessionStore(str(tmp_path / "sessions.db"), max_messages=4)
+    return InMemorySessionStore(max_messages=4)
+
+
+def test_history_in_order_with_limit(store):
+    for number in range(3):
+        store.append("session", "user", f"question {number}")
+        store.append("session", "assistant", f"answer {number}")
+    assert store.get_history("session", limit=2) == [
+        {"role": "user", "content": "question 2"},
+        {"role": "assistant", "content": "answer 2"},
+    ]
+    assert store.get_history("other") == []
+
+
+def test_sessions_are_trimmed_to_max_messages(store):
+    for number in range(10):
+        store.append("session", "user", f"message {number}")
+    assert [message["content"] for message in store.get_history("session")] == [
+        f"message {number}" for number in range(6, 10)
+    ]
+    if isinstance(store, SQLiteSessionStore):
+        assert store.stats()["messages"] == 4
+
+
+def test_clear_forgets_the_session(store):
+    store.append("session", "user", "hello")
+    store.append("kept", "user", "hello")
+    store.clear("session")
+    assert store.get_history("session") == []
+    assert len(store.get_history("kept")) == 1
+    if isinstance(store, SQLiteSessionStore):
+        assert store.stats()["messages"] == 1
+
+
+def test_memory_store_evicts_least_recently_used_sessions():
+    store = InMemorySessionStore(max_sessions=2)
+    for session in ("a", "b", "c"):
+        store.append(session, "user", "hello")
+    assert store.get_history("a") == []
+    assert store.stats()["sessions"] == 2
+    assert store.evictions == 1
+
+
+def test_memory_store_byte_cap():
+    store = InMemorySessionStore(max_bytes=1000)
+    for session in range(5):
+        store.append(str(session), "user", "x" * 300)
+    assert store.stats()["bytes"] <= 1000
+    assert store.get_history("4") != []
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.models.horoscope_schemas import Planet, TimeFrame
+from app.services.aspects import get_aspect_table
+from app.services.ephemeris import get_ephemeris_engine
+from app.services.transit_windows import TransitWindowCache, window_bounds
+
+MOMENT = datetime(2026, 3, 10, 15, 30, tzinfo=timezone.utc)
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@pytest.fixture(scope="module")
+def windows():
+    return TransitWindowCache(get_ephemeris_engine(), get_aspect_table())
+
+
+@pytest.mark.parametrize("time_frame,start,end", [
+    (TimeFrame.WEEKLY, utc(2026, 3, 9), utc(2026, 3, 16)),
+    (TimeFrame.MONTHLY, utc(2026, 3, 1), utc(2026, 4, 1)),
+    (TimeFrame.YEARLY, utc(2026, 1, 1), utc(2027, 1, 1)),
+])
+def test_window_bounds(time_frame, start, end):
+    assert window_bounds(time_frame, MOMENT) == (start, end)
+
+
+def test_december_window_ends_next_year():
+    assert window_bounds(TimeFrame.MONTHLY, utc(2026, 12, 31)) == (utc(2026, 12, 1), utc(2027, 1, 1))
+
+
+def test_daily_has_no_window():
+    with pytest.raises(ValueError):
+        window_bounds(TimeFrame.DAILY, MOMENT)
+
+
+def test_monthly_window_finds_known_stations(windows):
+    window = windows.get(TimeFrame.MONTHLY, MOMENT)
+    stations = {(station.planet, station.turns): station.time for station in window.stations}
+
+    assert abs(stations[(Planet.JUPITER, "direct")] - utc(2026, 3, 11)) < timedelta(days=1)
+    assert abs(stations[(Planet.MERCURY, "direct")] - utc(2026, 3, 20, 12)) < timedelta(days=1)
+    assert all(window.start <= event.time < window.end for event in window.ingresses + window.stations + window.aspects)
+
+
+def test_only_weekly_windows_report_the_moon(windows):
+    weekly = windows.get(TimeFrame.WEEKLY, MOMENT)
+    monthly = windows.get(TimeFrame.MONTHLY, MOMENT)
+
+    assert any(ingress.planet == Planet.MOON for ingress in weekly.ingresses)
+    assert all(ingress.planet != Planet.MOON for ingress in monthly.ingresses)
+
+
+def test_window_is_computed_once(windows, monkeypatch):
+    first = windows.get(TimeFrame.YEARLY, MOMENT)
+
+    def fail(*args):
+        raise AssertionError("window recomputed")
+
+    monkeypatch.setattr(windows, "compute", fail)
+    assert windows.get(TimeFrame.YEARLY, utc(2026, 11, 2)) is first
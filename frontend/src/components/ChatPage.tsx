@@ -18,6 +18,7 @@ const ChatPage = () => {
   const [messages, setMessages] = useState<Message[]>([]);
   const [inputText, setInputText] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  const [sessionId, setSessionId] = useState<string | null>(null);
 
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
@@ -48,6 +49,7 @@ const ChatPage = () => {
         },
         body: JSON.stringify({
           message: inputText,
+          session_id: sessionId,
           conversation_history: recentMessages,  // Send recent context
           max_length: 150,  // Request shorter responses
           birth_details: userData ? {
@@ -68,6 +70,9 @@ const ChatPage = () => {
       }
 
       const data = await response.json();
+      if (data.session_id) {
+        setSessionId(data.session_id);
+      }
       const formatMessageText = (text: string) => {
         const sentences = text.match(/[^.!?]+[.!?]+/g) || [text];
         